@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 import sys
 import os
 import uuid
@@ -14,8 +14,13 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from codes_translation.translate_sentence import translate_video_to_text
 from codes_translation.translate_single_word import classify_single_word
+from utils.llm_cache import cached_llm_call, get_llm_cache
+from utils.landmark_cache import get_landmark_cache
+from backend.translation_jobs import TranslationJobManager, JobQueueFullError
 
 AZURE_OPENAI_API_KEY = os.getenv('AZURE_OPENAI_API_KEY')
+# Part of the text-to-gloss LLM cache key — bump it whenever the prompt below changes
+TEXT_TO_GLOSS_PROMPT_VERSION = "1"
 
 app = Flask(__name__, static_folder='static')
 CORS(app)  # Enable CORS for all routes
@@ -26,6 +31,9 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 TEMP_FOLDER_PATH_OF_JSONS = 'json_files'
 
+# Background translations for /upload requests sent with async=true
+JOB_MANAGER = TranslationJobManager()
+
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov'}
 
@@ -49,6 +57,18 @@ def upload_file():
         # # Extract keypoints
         # data_frames = extract_motion_data("backend/"+ UPLOAD_FOLDER + "/" + filename)
 
+        # Long translations run as a background job; the client polls /jobs/<id> or listens on its events
+        if request.form.get('async', 'false').lower() == 'true':
+            try:
+                job_id = JOB_MANAGER.submit(run_translation, filename, file_path, mode)
+            except JobQueueFullError as e:
+                return jsonify({"error": str(e)}), 503
+            return jsonify({
+                "job_id": job_id,
+                "status_url": url_for('get_job', job_id=job_id),
+                "events_url": url_for('job_events', job_id=job_id),
+            }), 202
+
         # Process with appropriate model based on mode
         result = translate_sign_language(filename, file_path, mode)
 
@@ -56,34 +76,62 @@ def upload_file():
     else:
         return jsonify({"error": "Invalid file format"}), 400
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = JOB_MANAGER.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job.snapshot()), 200
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job = JOB_MANAGER.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return Response(
+        stream_with_context(JOB_MANAGER.stream_events(job)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # Example function to simulate translation
-def translate_sign_language(filename, file_path, mode='sentence'):
+def translate_sign_language(filename, file_path, mode='sentence', progress_callback=None):
     try:
-        model_filename = os.path.join(os.path.dirname(__file__), '../models/model-5_14000_vpw.keras')
-        label_encoder_path = os.path.join(os.path.dirname(__file__), '../models/label_encoder_model-5_14000_vpw.pkl')
+        return run_translation(filename, file_path, mode, progress_callback)
+
+    except FileNotFoundError as e:
+        return f"File not found: {e}"
+    except Exception as e:
+        return f"An error occurred: {e}"
 
-        if mode == 'word':
-            result = classify_single_word(UPLOAD_FOLDER, filename, TEMP_FOLDER_PATH_OF_JSONS, model_filename, label_encoder_path)
-        elif mode == 'sentence':
 
-            result = translate_video_to_text(file_path, model_filename, label_encoder_path)
-        else:
-            return f"Unknown mode: {mode}"
+def run_translation(filename, file_path, mode='sentence', progress_callback=None):
+    """
+    translate_sign_language without the error-to-text conversion: exceptions propagate, so
+    a failed background job ends with status "error" instead of "done".
+    """
+    model_filename = os.path.join(os.path.dirname(__file__), '../models/model-5_14000_vpw.keras')
+    label_encoder_path = os.path.join(os.path.dirname(__file__), '../models/label_encoder_model-5_14000_vpw.pkl')
 
+    if mode == 'word':
+        if progress_callback is not None:
+            progress_callback("classifying")
+        result = classify_single_word(UPLOAD_FOLDER, filename, TEMP_FOLDER_PATH_OF_JSONS, model_filename, label_encoder_path)
+    elif mode == 'sentence':
 
-        # # Load the label encoder
-        # label_encoder = load_label_mapping(label_encoder_path)
+        result = translate_video_to_text(file_path, model_filename, label_encoder_path, progress_callback)
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
 
-        # # Get the classification result
-        # predicted_label = classify_json_file(model_filename, data_frames, label_encoder)
-        # print(f"[{mode}] Predicted label: {predicted_label}")
 
-        return result
+    # # Load the label encoder
+    # label_encoder = load_label_mapping(label_encoder_path)
 
-    except FileNotFoundError as e:
-        return f"File not found: {e}"
-    except Exception as e:
-        return f"An error occurred: {e}"
+    # # Get the classification result
+    # predicted_label = classify_json_file(model_filename, data_frames, label_encoder)
+    # print(f"[{mode}] Predicted label: {predicted_label}")
+
+    return result
 
 
 def convert_sentence_to_list_of_existing_words_using_gpt(sentence):
@@ -133,15 +181,33 @@ def convert_sentence_to_list_of_existing_words_using_gpt(sentence):
 
     chat_prompt = [{"role": "user", "content": [{"type": "text", "text": prompt}]}]
 
-    completion = client.chat.completions.create(
-        model=deployment,
-        messages=chat_prompt,
-        temperature=0.7,
-        max_tokens=256
-    )
-
-    # return completion.choices[0].message.content.strip()
-    return completion.choices[0].message.content
+    def request():
+        completion = client.chat.completions.create(
+            model=deployment,
+            messages=chat_prompt,
+            temperature=0.7,
+            max_tokens=256
+        )
+
+        # return completion.choices[0].message.content.strip()
+        return completion.choices[0].message.content
+
+    # The same demo phrases are asked for over and over, so answers are cached per sentence
+    return cached_llm_call(TEXT_TO_GLOSS_PROMPT_VERSION, ["text_to_gloss", deployment, sentence], request)
+
+@app.route('/llm_cache_stats', methods=['GET'])
+def llm_cache_stats():
+    cache = get_llm_cache()
+    if cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **cache.stats()}), 200
+
+@app.route('/landmark_cache_stats', methods=['GET'])
+def landmark_cache_stats():
+    cache = get_landmark_cache()
+    if cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **cache.stats()}), 200
 
 @app.route('/generate_video', methods=['POST'])
 def generate_video():
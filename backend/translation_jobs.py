@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Translations running at the same time (each one runs MediaPipe, the model and the GPT calls)
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", "2"))
+# Jobs waiting for a worker before new uploads are rejected
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", "16"))
+# How long finished jobs (and their results) are kept
+JOB_RESULT_TTL_SEC = int(os.getenv("JOB_RESULT_TTL_SEC", "600"))
+# Seconds between SSE keep-alive comments while a job has nothing new to report
+SSE_HEARTBEAT_SEC = 15
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class TranslationJob:
+    """State of one background translation; report() is the progress_callback handed to the pipeline."""
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = "queued"
+        self.stage = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.events = []
+        self.condition = threading.Condition()
+
+    def report(self, stage, **data):
+        with self.condition:
+            self.stage = stage
+            self.events.append({"event": stage, "time": round(time.time() - self.created, 2), **data})
+            self.condition.notify_all()
+
+    def finish(self, status, result=None, error=None):
+        with self.condition:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished = time.time()
+            self.stage = status
+            self.events.append({"event": status, "time": round(self.finished - self.created, 2),
+                                "result": result, "error": error})
+            self.condition.notify_all()
+
+    def snapshot(self):
+        with self.condition:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "stage": self.stage,
+                "result": self.result,
+                "error": self.error,
+                "events": list(self.events),
+            }
+
+
+class TranslationJobManager:
+    """
+    Runs translations on a bounded thread pool and keeps their progress and results.
+
+    Finished jobs are dropped JOB_RESULT_TTL_SEC after they complete; cleanup runs
+    whenever a job is submitted or looked up.
+    """
+    def __init__(self, max_workers=TRANSLATION_WORKERS, max_pending=MAX_PENDING_JOBS, ttl_sec=JOB_RESULT_TTL_SEC):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translation-job")
+        self.max_pending = max_pending
+        self.ttl_sec = ttl_sec
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queues fn(*args, progress_callback=job.report, **kwargs).
+
+        Returns:
+            str: The job id.
+
+        Raises:
+            JobQueueFullError: When MAX_PENDING_JOBS jobs are already waiting.
+        """
+        self.cleanup()
+        with self.lock:
+            pending = sum(job.status == "queued" for job in self.jobs.values())
+            if pending >= self.max_pending:
+                raise JobQueueFullError(f"{pending} translation jobs are already waiting")
+            job = TranslationJob(uuid.uuid4().hex)
+            self.jobs[job.id] = job
+
+        self.executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        with job.condition:
+            job.status = "running"
+        job.report("started")
+        try:
+            result = fn(*args, progress_callback=job.report, **kwargs)
+            job.finish("done", result=result)
+        except Exception as e:
+            traceback.print_exc()
+            job.finish("failed", error=str(e))
+
+    def get(self, job_id):
+        self.cleanup()
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cleanup(self):
+        now = time.time()
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items()
+                       if job.finished is not None and now - job.finished > self.ttl_sec]
+            for job_id in expired:
+                del self.jobs[job_id]
+
+    def stream_events(self, job, heartbeat_sec=SSE_HEARTBEAT_SEC):
+        """
+        Server-Sent Events for a job: every event recorded so far, then new ones as they
+        happen, until the job finishes.
+        """
+        sent = 0
+        while True:
+            with job.condition:
+                if sent == len(job.events) and job.status not in TERMINAL_STATUSES:
+                    job.condition.wait(timeout=heartbeat_sec)
+                new_events = job.events[sent:]
+                done = job.status in TERMINAL_STATUSES
+
+            if not new_events and not done:
+                yield ": keep-alive\n\n"
+                continue
+
+            for event in new_events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            sent += len(new_events)
+
+            if done and sent == len(job.events):
+                return
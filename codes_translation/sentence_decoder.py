@@ -0,0 +1,217 @@
+import numpy as np
+
+# Time resolution of the decoding grid (matches the sliding-window start step)
+DECODER_STEP_SEC = 0.15
+# A sign shorter than this is treated as a transition, not a word
+MIN_GLOSS_DURATION_SEC = 0.45
+# Prior probability of moving to a different sign between two grid steps
+SWITCH_PROBABILITY = 0.05
+# Glosses whose mean probability over their span is lower than this are dropped
+MIN_GLOSS_CONFIDENCE = 0.3
+# How many times the same gloss may appear in one sentence
+MAX_GLOSS_REPEATS = 1
+
+GLOSS_TO_HEBREW = {
+    "hello": "שלום", "thanks": "תודה", "need": "צריך", "now": "עכשיו", "when": "מתי", "why": "למה",
+    "appointment": "תור", "schedule": "לקבוע", "arrive": "להגיע", "station": "תחנה", "bus": "אוטובוס",
+    "phone": "טלפון", "place": "מקום", "help": "לעזור", "name": "שם", "no": "לא", "go": "ללכת",
+    "come": "לבוא", "I": "אני", "you": "אתה", "home": "בית", "ticket": "כרטיס", "later": "אחר כך",
+    "doctor": "רופא", "idCard": "תעודת זהות", "ambulance": "אמבולנס", "clinic": "קופת חולים",
+    "tomorrow": "מחר", "yesterday": "אתמול", "youreWelcome": "בבקשה", "how": "איך", "can": "יכול",
+    "time": "שעה", "1": "אחד", "2": "שתיים", "3": "שלוש", "4": "ארבע", "5": "חמש", "6": "שש",
+    "7": "שבע", "8": "שמונה", "9": "תשע", "10": "עשר", "11": "אחת עשרה", "12": "שתים עשרה",
+    "13": "שלוש עשרה", "14": "ארבע עשרה", "15": "חמש עשרה", "16": "שש עשרה", "17": "שבע עשרה",
+    "18": "שמונה עשרה", "19": "תשע עשרה", "20": "עשרים",
+}
+
+
+def labels_to_probabilities(predictions, label_mapping):
+    """
+    Turns window predictions into probability rows.
+
+    Each prediction may be a bare label (one-hot row), a top-k [[label, prob], ...] list
+    (the listed mass is kept and the rest is spread over the other classes) or None.
+
+    Args:
+        predictions (list): One prediction per window.
+        label_mapping (list): Class index → label.
+
+    Returns:
+        np.ndarray: (num_windows, num_classes) array; unknown windows get a uniform row.
+    """
+    index_of = {label: i for i, label in enumerate(label_mapping)}
+    num_classes = len(label_mapping)
+    probabilities = np.full((len(predictions), num_classes), 1.0 / num_classes, dtype=np.float32)
+    for row, prediction in enumerate(predictions):
+        if isinstance(prediction, (list, tuple)):
+            pairs = [(index_of[label], float(prob)) for label, prob in prediction if label in index_of]
+            if not pairs:
+                continue
+            listed_mass = min(sum(prob for _, prob in pairs), 1.0)
+            remaining = num_classes - len(pairs)
+            probabilities[row] = (1.0 - listed_mass) / remaining if remaining else 0.0
+            for idx, prob in pairs:
+                probabilities[row, idx] = prob
+        elif prediction in index_of:
+            probabilities[row] = 0.0
+            probabilities[row, index_of[prediction]] = 1.0
+    return probabilities
+
+
+def windows_to_timeline(segments_list, probabilities, video_duration, step_sec=DECODER_STEP_SEC):
+    """
+    Averages the class probabilities of all windows covering each step of a fixed time grid.
+
+    Args:
+        segments_list (list): (start_sec, end_sec) per window.
+        probabilities (np.ndarray): (num_windows, num_classes) window probabilities.
+        video_duration (float): Length of the video in seconds.
+        step_sec (float): Grid resolution in seconds.
+
+    Returns:
+        tuple: (step_centers, emissions) — (T,) times in seconds and a (T, num_classes) array.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float32)
+    num_steps = max(1, int(np.ceil(video_duration / step_sec)))
+    step_centers = (np.arange(num_steps) + 0.5) * step_sec
+
+    bounds = np.asarray(segments_list, dtype=np.float32).reshape(-1, 2)
+    coverage = (step_centers[:, None] >= bounds[None, :, 0]) & (step_centers[:, None] < bounds[None, :, 1])
+    counts = coverage.sum(axis=1, keepdims=True)
+
+    emissions = coverage.astype(np.float32) @ probabilities
+    uniform = np.full_like(emissions, 1.0 / probabilities.shape[1])
+    emissions = np.where(counts > 0, emissions / np.maximum(counts, 1), uniform)
+    return step_centers, emissions
+
+
+def viterbi_with_min_duration(emissions, min_duration_steps, switch_probability=SWITCH_PROBABILITY):
+    """
+    Most likely class per time step, where every visited class must last at least min_duration_steps.
+
+    Each class is expanded into a left-to-right chain of min_duration_steps sub-states; only the
+    last one may loop or jump to another class, so short flickers cannot become words.
+
+    Args:
+        emissions (np.ndarray): (T, num_classes) per-step class probabilities.
+        min_duration_steps (int): Minimum run length of a class.
+        switch_probability (float): Prior probability of changing class between steps.
+
+    Returns:
+        np.ndarray: (T,) class index per step.
+    """
+    log_emissions = np.log(np.clip(emissions, 1e-6, 1.0))
+    num_steps, num_classes = log_emissions.shape
+    d = int(max(1, min(min_duration_steps, num_steps)))
+    classes = np.arange(num_classes)
+
+    log_stay = np.log(1.0 - switch_probability)
+    log_switch = np.log(switch_probability / max(num_classes - 1, 1))
+
+    delta = np.full((num_classes, d), -np.inf)
+    delta[:, 0] = log_emissions[0]
+    backpointers = np.zeros((num_steps, num_classes, d), dtype=np.int64)
+
+    for t in range(1, num_steps):
+        last = delta[:, d - 1]
+        if num_classes > 1:
+            order = np.argsort(last)[::-1]
+            entry_source = np.where(classes == order[0], order[1], order[0])
+            entry_score = last[entry_source] + log_switch
+        else:
+            entry_source = classes
+            entry_score = np.full(num_classes, -np.inf)
+
+        new_delta = np.full((num_classes, d), -np.inf)
+        pointers = np.zeros((num_classes, d), dtype=np.int64)
+        stay = last + log_stay
+
+        if d > 1:
+            new_delta[:, 1:] = delta[:, :-1]
+            pointers[:, 1:] = classes[:, None] * d + np.arange(d - 1)[None, :]
+            use_stay = stay > new_delta[:, d - 1]
+            new_delta[:, d - 1] = np.where(use_stay, stay, new_delta[:, d - 1])
+            pointers[:, d - 1] = np.where(use_stay, classes * d + d - 1, classes * d + d - 2)
+            new_delta[:, 0] = entry_score
+            pointers[:, 0] = entry_source * d + d - 1
+        else:
+            use_stay = stay >= entry_score
+            new_delta[:, 0] = np.where(use_stay, stay, entry_score)
+            pointers[:, 0] = np.where(use_stay, classes, entry_source)
+
+        delta = new_delta + log_emissions[t][:, None]
+        backpointers[t] = pointers
+
+    # The last sign must also have completed its minimum duration
+    state = int(np.argmax(delta[:, d - 1])) * d + d - 1
+    path = np.zeros(num_steps, dtype=np.int64)
+    for t in range(num_steps - 1, -1, -1):
+        path[t] = state // d
+        state = backpointers[t, state // d, state % d]
+    return path
+
+
+def decode_gloss_sequence(segments_list, probabilities, label_mapping, video_duration,
+                          step_sec=DECODER_STEP_SEC,
+                          min_duration_sec=MIN_GLOSS_DURATION_SEC,
+                          switch_probability=SWITCH_PROBABILITY,
+                          min_confidence=MIN_GLOSS_CONFIDENCE,
+                          max_repeats=MAX_GLOSS_REPEATS):
+    """
+    Decodes per-window class probabilities into an ordered gloss sequence, without any LLM call.
+
+    Args:
+        segments_list (list): (start_sec, end_sec) per window.
+        probabilities (np.ndarray): (num_windows, num_classes) window probabilities.
+        label_mapping (list): Class index → label.
+        video_duration (float): Length of the video in seconds.
+        step_sec (float): Decoding grid resolution.
+        min_duration_sec (float): Minimum duration of a sign.
+        switch_probability (float): Prior probability of changing sign between grid steps.
+        min_confidence (float): Minimum mean probability of a kept gloss.
+        max_repeats (int): Maximum occurrences of the same gloss in the sentence.
+
+    Returns:
+        list: (label, start_sec, end_sec, confidence) tuples in temporal order.
+    """
+    if len(segments_list) == 0:
+        return []
+
+    step_centers, emissions = windows_to_timeline(segments_list, probabilities, video_duration, step_sec)
+    min_duration_steps = int(np.ceil(min_duration_sec / step_sec))
+    path = viterbi_with_min_duration(emissions, min_duration_steps, switch_probability)
+
+    # Collapse the per-step path into runs
+    run_starts = np.flatnonzero(np.r_[True, path[1:] != path[:-1]])
+    run_ends = np.r_[run_starts[1:], len(path)]
+
+    glosses = []
+    repeats = {}
+    for start, end in zip(run_starts, run_ends):
+        class_idx = int(path[start])
+        confidence = float(emissions[start:end, class_idx].mean())
+        if confidence < min_confidence:
+            continue
+
+        label = label_mapping[class_idx]
+        if glosses and glosses[-1][0] == label:
+            # Same sign on both sides of a dropped run — merge instead of repeating it
+            previous = glosses[-1]
+            glosses[-1] = (label, previous[1], round(float(step_centers[end - 1] + step_sec / 2), 2),
+                           max(previous[3], confidence))
+            continue
+        if repeats.get(label, 0) >= max_repeats:
+            continue
+
+        repeats[label] = repeats.get(label, 0) + 1
+        glosses.append((label,
+                        round(float(step_centers[start] - step_sec / 2), 2),
+                        round(float(step_centers[end - 1] + step_sec / 2), 2),
+                        confidence))
+
+    return glosses
+
+
+def glosses_to_hebrew(glosses):
+    """Maps decoded glosses to a Hebrew word sequence using GLOSS_TO_HEBREW."""
+    return " ".join(GLOSS_TO_HEBREW.get(gloss[0], gloss[0]) for gloss in glosses)
@@ -0,0 +1,129 @@
+import os
+import numpy as np
+
+# Intervals backed by fewer windows than this are dropped as isolated misclassifications
+MIN_INTERVAL_SUPPORT = 2
+# Rough token budget for the timeline block of one prompt
+PROMPT_TIMELINE_TOKEN_BUDGET = int(os.getenv("PROMPT_TIMELINE_TOKEN_BUDGET", "400"))
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token), good enough to enforce a prompt budget."""
+    return int(np.ceil(len(text) / 4))
+
+
+def window_label_and_confidence(prediction):
+    """
+    (label, confidence) of a window prediction.
+
+    A prediction is a bare label (confidence unknown → None), top-k [[label, prob], ...]
+    pairs or None (no prediction).
+    """
+    if isinstance(prediction, (list, tuple)):
+        if not prediction:
+            return None, None
+        label, probability = prediction[0]
+        return label, float(probability)
+    return prediction, None
+
+
+def merge_windows(segments_list, predictions):
+    """
+    Merges overlapping windows that predict the same label into intervals.
+
+    Each label keeps one open interval; a window extends it when it starts before the
+    interval ends, otherwise the interval is closed and a new one starts. Windows of
+    different sizes that start at the same time therefore do not break each other's runs.
+
+    Args:
+        segments_list (list): (start_sec, end_sec) per window.
+        predictions (list): One prediction per window (label, top-k pairs or None).
+
+    Returns:
+        list: Interval dicts {"label", "start", "end", "count", "confidence"} sorted by start;
+        confidence is the mean top-1 probability, or None when windows carry only labels.
+    """
+    windows = sorted(zip(segments_list, predictions), key=lambda item: (item[0][0], item[0][1]))
+    open_intervals = {}
+    intervals = []
+
+    for (start, end), prediction in windows:
+        label, confidence = window_label_and_confidence(prediction)
+        if label is None:
+            continue
+
+        current = open_intervals.get(label)
+        if current is None or start > current["end"]:
+            current = {"label": label, "start": start, "end": end, "count": 0, "confidences": []}
+            open_intervals[label] = current
+            intervals.append(current)
+
+        current["end"] = max(current["end"], end)
+        current["count"] += 1
+        if confidence is not None:
+            current["confidences"].append(confidence)
+
+    for interval in intervals:
+        confidences = interval.pop("confidences")
+        interval["confidence"] = round(float(np.mean(confidences)), 2) if confidences else None
+
+    return sorted(intervals, key=lambda interval: (interval["start"], interval["end"]))
+
+
+def format_interval(interval):
+    """One prompt line: '<start>-<end>s → <word> (x<windows>, p=<mean confidence>)'."""
+    details = f"x{interval['count']}"
+    if interval["confidence"] is not None:
+        details += f", p={interval['confidence']:.2f}"
+    return f"{round(interval['start'], 1)}-{round(interval['end'], 1)}s → {interval['label']} ({details})"
+
+
+def interval_support(interval):
+    """How much evidence an interval carries: its window count, weighted by confidence when known."""
+    confidence = interval["confidence"] if interval["confidence"] is not None else 1.0
+    return interval["count"] * confidence
+
+
+def compact_timeline(segments_list, predictions, min_support=MIN_INTERVAL_SUPPORT,
+                     token_budget=PROMPT_TIMELINE_TOKEN_BUDGET):
+    """
+    Run-length compresses per-window predictions into a short, time-ordered interval list.
+
+    Overlapping same-label windows are merged, intervals backed by fewer than min_support
+    windows are dropped (unless that would drop everything), and the weakest intervals
+    are removed until the formatted text fits token_budget.
+
+    Args:
+        segments_list (list): (start_sec, end_sec) per window.
+        predictions (list): One prediction per window (label, top-k pairs or None).
+        min_support (int): Minimum number of windows behind a kept interval.
+        token_budget (int): Maximum estimated tokens of the formatted timeline.
+
+    Returns:
+        list: The kept intervals, in temporal order.
+    """
+    intervals = merge_windows(segments_list, predictions)
+
+    supported = [interval for interval in intervals if interval["count"] >= min_support]
+    if supported:
+        intervals = supported
+
+    line_tokens = [estimate_tokens(format_interval(interval)) + 1 for interval in intervals]
+    total_tokens = sum(line_tokens)
+    if total_tokens <= token_budget:
+        return intervals
+
+    # Drop the weakest intervals first, keeping at least one
+    keep = np.ones(len(intervals), dtype=bool)
+    for idx in sorted(range(len(intervals)), key=lambda i: interval_support(intervals[i])):
+        if total_tokens <= token_budget or keep.sum() == 1:
+            break
+        keep[idx] = False
+        total_tokens -= line_tokens[idx]
+
+    return [interval for interval, kept in zip(intervals, keep) if kept]
+
+
+def format_timeline(intervals):
+    """The classification_text block of the sentence prompts."""
+    return "\n".join(format_interval(interval) for interval in intervals)
@@ -1,15 +1,29 @@
 import os
-import time
-from openai import AzureOpenAI
+import asyncio
+from collections import Counter
+from openai import AzureOpenAI, AsyncAzureOpenAI
 from dotenv import load_dotenv
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import cv2
 import tempfile
 # from codes_translation.translate_single_word import load_label_mapping, classify_json_file
-from utils.test_mediapipe import extract_motion_data
+from utils.test_mediapipe import extract_motion_data, extract_video_landmark_arrays, slice_motion_data
+from utils.trim_sign_language_dead_time import detect_sign_intervals
+from utils.parallel_extraction import extract_video_landmark_arrays_parallel
+from utils.landmark_extractor import acquire_extractor, extractor_config
+from utils.landmark_arrays import allocate_landmark_arrays
+from utils.landmark_cache import get_landmark_cache, hash_video_file
+from utils.conver_json_to_vector import create_feature_vector, LENGTH_BUCKETS
+from utils.pipeline import Pipeline, Stage
+from utils.llm_cache import cached_llm_call, cached_llm_call_async, get_llm_cache
 import numpy as np
-from models.local_models.classify_attn import load_label_mapping, classify_json_file
+from models.local_models.classify_attn import load_label_mapping, classify_json_file, classify_json_batch, top_k_predictions, TOP_K, VARIABLE_LENGTH_INFERENCE
+from models.local_models.inference_executor import get_inference_executor
+from models.local_models.classify_shared_encoder import classify_segments_shared
+from codes_translation.sentence_decoder import decode_gloss_sequence, glosses_to_hebrew, labels_to_probabilities
+from server_client.client import predict_segments_remote, get_video_duration
+from codes_translation.timeline_compaction import compact_timeline, format_timeline, estimate_tokens
 
 # Load environment variables from the .env file
 load_dotenv()
@@ -19,8 +33,40 @@ MIN_WINDOW_SEC = 1
 MAX_WINDOW_SEC = 2
 START_TIME_STEP_SEC = 0.15
 WINDOW_SIZE_STEP_SEC = 1
+# Place windows only around the sign intervals found by the motion segmenter (landmark modes only)
+USE_MOTION_SEGMENTATION = os.getenv("USE_MOTION_SEGMENTATION", "false").lower() == "true"
+# How far around a detected sign interval windows may start/end
+SIGN_INTERVAL_PADDING_SEC = 0.3
 AZURE_OPENAI_API_KEY = os.getenv('AZURE_OPENAI_API_KEY')
 AMOUNT_OF_GPT_CALLS = 5
+# "threads": 5 chains on a thread pool, prompts 1-3 one after another; "async": asyncio fan-out
+GPT_ORCHESTRATION = os.getenv("GPT_ORCHESTRATION", "threads")
+# In async mode, stop the remaining chains once this many answers agree
+EARLY_STOP_AGREEMENT = AMOUNT_OF_GPT_CALLS // 2 + 1
+# Part of every LLM cache key — bump it whenever a prompt template changes
+PROMPT_TEMPLATE_VERSION = "2"
+# Send run-length compressed intervals to GPT instead of one line per window
+COMPACT_PROMPT_TIMELINE = os.getenv("COMPACT_PROMPT_TIMELINE", "true").lower() == "true"
+# "landmarks": run MediaPipe once over the whole video and classify every window from a slice of it
+# "shared_encoder": like "landmarks", but the model's frame encoder runs once per video and only
+#                   its window head runs per window (models/local_models/classify_shared_encoder.py)
+# "pipeline": like "landmarks", but decoding, MediaPipe, featurization and inference overlap (utils/pipeline.py)
+# "server" (default): send the video and the windows to the segment prediction server on port 5002;
+#                     the other modes need the model file and MediaPipe in this process
+SEGMENT_PREDICTION_MODE = os.getenv("SEGMENT_PREDICTION_MODE", "server")
+# "local": decode the window probabilities offline (sentence_decoder), "gpt": the 5-chain GPT consolidation
+SENTENCE_DECODER = os.getenv("SENTENCE_DECODER", "local")
+# With the local decoder, optionally let one GPT call add Hebrew linking words to the decoded glosses
+USE_GPT_REFINEMENT = os.getenv("USE_GPT_REFINEMENT", "false").lower() == "true"
+# Send windows through the process-wide micro-batching executor, so concurrent uploads share forward passes
+USE_INFERENCE_EXECUTOR = os.getenv("USE_INFERENCE_EXECUTOR", "true").lower() == "true"
+# Extract long videos in overlapping time chunks on several processes (utils/parallel_extraction.py)
+USE_PARALLEL_EXTRACTION = os.getenv("USE_PARALLEL_EXTRACTION", "false").lower() == "true"
+# Threads of the featurize and infer stages in "pipeline" mode (decoding and MediaPipe get one each)
+PIPELINE_FEATURIZE_WORKERS = int(os.getenv("PIPELINE_FEATURIZE_WORKERS", "2"))
+PIPELINE_INFER_WORKERS = int(os.getenv("PIPELINE_INFER_WORKERS", "8"))
+# Finished windows per "window_results" progress event while classification is still running
+PROGRESS_BATCH_WINDOWS = 32
 
 
 def create_segments_list(video_duration):
@@ -45,6 +91,62 @@ def create_segments_list(video_duration):
     return segments_list
 
 
+def create_segments_list_around_intervals(sign_intervals, video_duration):
+    """
+    Places windows only around detected sign intervals instead of over the whole video.
+
+    A sign shorter than the window is covered by windows centred on it (plus one start
+    step either side); a longer sign is swept with the usual start step.
+
+    Args:
+        sign_intervals (list): (start_sec, end_sec) sign intervals, e.g. from detect_sign_intervals.
+        video_duration (float): Length of the video in seconds.
+
+    Returns:
+        list: Sorted, de-duplicated (start_sec, end_sec) windows.
+    """
+    segments = set()
+
+    for sign_start, sign_end in sign_intervals:
+        region_start = max(0.0, sign_start - SIGN_INTERVAL_PADDING_SEC)
+        region_end = min(video_duration, sign_end + SIGN_INTERVAL_PADDING_SEC)
+
+        for segment_duration in np.arange(MIN_WINDOW_SEC, MAX_WINDOW_SEC + 0.001, WINDOW_SIZE_STEP_SEC):
+            if region_end - region_start <= segment_duration:
+                center_start = (sign_start + sign_end - segment_duration) / 2
+                starts = center_start + np.array([-START_TIME_STEP_SEC, 0.0, START_TIME_STEP_SEC])
+            else:
+                starts = np.arange(region_start, region_end - segment_duration + 0.001, START_TIME_STEP_SEC)
+
+            for start_sec in starts:
+                start_sec = min(max(0.0, start_sec), max(0.0, video_duration - segment_duration))
+                end_sec = min(start_sec + segment_duration, video_duration)
+                segments.add((round(float(start_sec), 2), round(float(end_sec), 2)))
+
+    return sorted(segments)
+
+
+def create_motion_segments_list(frames_data, fps, video_duration):
+    """
+    Windows around the signs found by motion segmentation, or the full grid when the clip shows no motion.
+
+    Args:
+        frames_data (list or np.ndarray): Motion data of the whole video (dict frames or a (T, 75, 4) array).
+        fps (float): Frame rate of the video.
+        video_duration (float): Length of the video in seconds.
+
+    Returns:
+        list: (start_sec, end_sec) windows.
+    """
+    sign_intervals, _ = detect_sign_intervals(frames_data, fps)
+    if sign_intervals:
+        segments_list = create_segments_list_around_intervals(sign_intervals, video_duration)
+    else:
+        segments_list = create_segments_list(video_duration)
+    print(f"Motion segmentation: {len(sign_intervals)} sign intervals → {len(segments_list)} windows")
+    return segments_list
+
+
 def segment_video_with_opencv(duration, output_folder, cap, fps):
     segments = []
 
@@ -144,6 +246,223 @@ def process_segments_with_threads(video_path, model_path, label_encoder_path):
     return sorted_predictions, duration
 
 
+def classify_sliced_segments(model_filename, frames_data, fps, segments_list, label_mapping, on_result=None):
+    """
+    Slices every window out of the video's motion data and classifies all of them in one batch.
+
+    With on_result, windows are classified in PROGRESS_BATCH_WINDOWS batches, earliest-ending
+    first, and on_result(index, label) is called as each batch finishes.
+    """
+    predictions = [None] * len(segments_list)
+    probabilities = labels_to_probabilities(predictions, label_mapping)
+    window_indices, window_frames = [], []
+    for i, (start, end) in enumerate(segments_list):
+        segment_frames = slice_motion_data(frames_data, fps, start, end)
+        if len(segment_frames):
+            window_indices.append(i)
+            window_frames.append(segment_frames)
+
+    # All windows go through the model together instead of one predict call per window
+    batches = [list(range(len(window_indices)))]
+    if on_result is not None:
+        order = sorted(range(len(window_indices)), key=lambda j: segments_list[window_indices[j]][::-1])
+        batches = [order[b:b + PROGRESS_BATCH_WINDOWS] for b in range(0, len(order), PROGRESS_BATCH_WINDOWS)]
+
+    executor = get_inference_executor(model_filename, VARIABLE_LENGTH_INFERENCE) if USE_INFERENCE_EXECUTOR else None
+    for batch in batches:
+        batch_indices = [window_indices[j] for j in batch]
+        try:
+            labels, window_probabilities = classify_json_batch(model_filename, [window_frames[j] for j in batch],
+                                                               label_mapping, source_fps=fps, executor=executor)
+            probabilities[batch_indices] = window_probabilities
+        except Exception as e:
+            print(f"  → Error: {e}\n")
+            labels = [None] * len(batch_indices)
+
+        for i, label in zip(batch_indices, labels):
+            predictions[i] = label
+            if on_result is not None:
+                on_result(i, label)
+
+    return predictions, probabilities
+
+
+class WindowResultReporter:
+    """
+    on_result(index, prediction) callback that sends finished windows to a progress_callback
+    as "window_results" events of PROGRESS_BATCH_WINDOWS windows (safe to call from several threads).
+    """
+    def __init__(self, progress_callback, segments_list, batch_windows=PROGRESS_BATCH_WINDOWS):
+        self.progress_callback = progress_callback
+        self.segments_list = segments_list
+        self.batch_windows = batch_windows
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def __call__(self, index, prediction):
+        start, end = self.segments_list[index]
+        with self.lock:
+            self.pending.append({"index": index, "start": float(start), "end": float(end),
+                                 "label": prediction_label(prediction)})
+            if len(self.pending) < self.batch_windows:
+                return
+            windows, self.pending = self.pending, []
+        report_progress(self.progress_callback, "window_results", windows=windows)
+
+    def flush(self):
+        with self.lock:
+            windows, self.pending = self.pending, []
+        if windows:
+            report_progress(self.progress_callback, "window_results", windows=windows)
+
+
+def classify_segments_from_landmarks(frames_data, fps, segments_list, model_path, label_mapping, shared_encoder=False,
+                                     on_result=None):
+    """
+    Classifies every (start_sec, end_sec) window of a video while running MediaPipe only once.
+
+    The landmarks of the whole video are extracted a single time (extract_video_landmark_arrays),
+    and each window is classified from a slice of that frame-indexed data instead of being
+    cut into its own video and extracted again.
+
+    Args:
+        frames_data (list | np.ndarray): Frame-indexed motion data or (T, 75, 4) landmarks of the whole video.
+        fps (float): Frame rate of the video.
+        segments_list (list): (start_sec, end_sec) windows, e.g. from create_segments_list.
+        model_path (str): Path to the saved model.
+        label_mapping (list): Class index → label.
+        shared_encoder (bool): Compute the model's frame encoder once for the whole video.
+        on_result (callable, optional): Called as on_result(index, label) as windows finish.
+
+    Returns:
+        tuple: (predictions, probabilities) — one label (or None) per window, in the order of
+        segments_list, and a (num_windows, num_classes) probability array.
+    """
+    model_filename = os.path.join(os.path.dirname(__file__), model_path)
+
+    print("Processing segments...\n")
+    if shared_encoder:
+        predictions, probabilities = classify_segments_shared(model_filename, frames_data, fps, segments_list, label_mapping,
+                                                              on_result=on_result)
+    else:
+        predictions, probabilities = classify_sliced_segments(model_filename, frames_data, fps, segments_list, label_mapping,
+                                                              on_result)
+
+    print("=== Final Predictions ===")
+    for (start, end), pred in zip(segments_list, predictions):
+        print(f"{start}-{end}s → {pred}")
+
+    return predictions, probabilities
+
+
+def classify_video_pipelined(video_path, segments_list, model_path, label_mapping, on_result=None):
+    """
+    Same result as extracting the landmarks and then classify_segments_from_landmarks, with the
+    steps overlapped: frames are decoded on one thread, MediaPipe runs on another, and every
+    window is featurized and sent to the inference executor as soon as its last frame is extracted.
+
+    Returns:
+        tuple: (predictions, probabilities), as classify_segments_from_landmarks.
+    """
+    model_filename = os.path.join(os.path.dirname(__file__), model_path)
+    cache = get_landmark_cache()
+    cache_key = cache.make_key(hash_video_file(video_path), extractor_config()) if cache is not None else None
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is not None:
+        landmarks, _, fps = cached
+        return classify_sliced_segments(model_filename, landmarks, fps, segments_list, label_mapping, on_result)
+
+    executor = get_inference_executor(model_filename, VARIABLE_LENGTH_INFERENCE)
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps <= 0:
+        cap.release()
+        raise ValueError(f"Invalid FPS value for {video_path}")
+
+    landmarks, present = allocate_landmark_arrays(max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 1))
+    state = {"landmarks": landmarks, "present": present, "frames": 0, "next_window": 0}
+    # (end_frame, start_frame, index), in the order the windows become complete
+    windows = sorted((int(end * fps), int(start * fps), i) for i, (start, end) in enumerate(segments_list))
+
+    def decode():
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            yield frame
+
+    def extract(frame):
+        # Single worker: owns the tracking state and the landmark arrays
+        t = state["frames"]
+        if t == len(state["landmarks"]):
+            more_landmarks, more_present = allocate_landmark_arrays(len(state["landmarks"]))
+            state["landmarks"] = np.concatenate([state["landmarks"], more_landmarks])
+            state["present"] = np.concatenate([state["present"], more_present])
+        extractor.process_frame_into(frame, state["landmarks"][t], state["present"][t])
+        state["frames"] = t + 1
+
+        ready = []
+        while state["next_window"] < len(windows) and windows[state["next_window"]][0] <= t + 1:
+            end_frame, start_frame, i = windows[state["next_window"]]
+            state["next_window"] += 1
+            if end_frame > start_frame:
+                ready.append((i, state["landmarks"][start_frame:end_frame]))
+        return ready
+
+    def featurize(window):
+        i, segment_frames = window
+        if VARIABLE_LENGTH_INFERENCE:
+            return i, create_feature_vector(segment_frames, source_fps=fps, length_buckets=LENGTH_BUCKETS)
+        return i, create_feature_vector(segment_frames)
+
+    def infer(window):
+        i, feature_matrix = window
+        # Concurrent infer workers share the executor's forward passes
+        return i, executor.predict([feature_matrix])[0]
+
+    pipeline = Pipeline([
+        Stage("extract", extract, fan_out=True),
+        Stage("featurize", featurize, workers=PIPELINE_FEATURIZE_WORKERS),
+        Stage("infer", infer, workers=PIPELINE_INFER_WORKERS),
+    ], source_name="decode")
+
+    predictions = [None] * len(segments_list)
+    probabilities = labels_to_probabilities(predictions, label_mapping)
+    try:
+        with acquire_extractor() as extractor:
+            extractor.reset()
+            for i, window_probabilities in pipeline.run(decode()):
+                probabilities[i] = window_probabilities
+                predictions[i] = label_mapping[int(np.argmax(window_probabilities))]
+                if on_result is not None:
+                    on_result(i, predictions[i])
+    finally:
+        cap.release()
+
+    stats = pipeline.stats()
+    print(f"Pipeline: {stats['wall_sec']}s, bottleneck {stats['bottleneck']}, occupancy "
+          + ", ".join(f"{name}={stage['occupancy']}" for name, stage in stats["stages"].items()))
+
+    num_frames = state["frames"]
+    landmarks, present = state["landmarks"][:num_frames], state["present"][:num_frames]
+    if cache is not None:
+        cache.put(cache_key, landmarks, present, fps)
+
+    # Windows running past the real end of the video (the container's duration can be longer)
+    remaining = [i for _, _, i in windows[state["next_window"]:]]
+    if remaining:
+        tail_predictions, tail_probabilities = classify_sliced_segments(
+            model_filename, landmarks, fps, [segments_list[i] for i in remaining], label_mapping
+        )
+        for i, prediction, window_probabilities in zip(remaining, tail_predictions, tail_probabilities):
+            predictions[i] = prediction
+            probabilities[i] = window_probabilities
+            if on_result is not None:
+                on_result(i, prediction)
+
+    return predictions, probabilities
+
+
 def build_prompt1(classification_text, estimated_word_count, video_duration):
     prompt = f"""
         You are analyzing a sign language video.
@@ -151,7 +470,7 @@ def build_prompt1(classification_text, estimated_word_count, video_duration):
         Video duration: {round(video_duration, 1)} seconds.
         Estimated number of signed words: {estimated_word_count}.
 
-        Gesture recognizer output:
+        Gesture recognizer output (each line: <start>-<end>s → <word> (x<number of windows>, p=<mean confidence>)):
         {classification_text}
 
         Your task:
@@ -160,8 +479,8 @@ def build_prompt1(classification_text, estimated_word_count, video_duration):
         - Return a **single English sentence** with space-separated words.
         - The sentence must be **grammatically sensible**.
         - If a **question word** (e.g., when, why) appears not at the beginning, assume it’s a classification error and discard it.
-        - If a word appears more then 4 times in the same period of time and makes sense with the sentence, dont miss it. 
-        - If a word appears only once or twice in the same period of time, dont put ot in the final sentence!!
+        - If a word has x5 or more windows in the same period of time and makes sense with the sentence, dont miss it.
+        - If a word has only x1 or x2 windows in the same period of time, dont put ot in the final sentence!!
         - Do not add any new words. Only use words from the list.
         - Do not include words that appear only once unless needed for grammar.
         - No punctuation. No explanation. Only the final sentence.
@@ -177,7 +496,7 @@ def build_prompt2(classification_text, estimated_word_count, video_duration):
        Video duration: {round(video_duration, 1)} seconds.
        Estimated number of signed words: {estimated_word_count}.
 
-       Gesture recognizer output:
+       Gesture recognizer output (each line: <start>-<end>s → <word> (x<number of windows>, p=<mean confidence>)):
        {classification_text}
 
        From this list:
@@ -188,8 +507,8 @@ def build_prompt2(classification_text, estimated_word_count, video_duration):
        - Do NOT add any new words not in the list.
        - Output up to {estimated_word_count} words.
        - No punctuation, no explanations. Just return the sentence as a single line, with words separated by spaces.
-       - If a word appears more then 4 times in the same period of time and makes sense with the sentence, dont miss it. 
-       - If a word appears less then 3 times and doesnt makes sense with the sentence, skip it.
+       - If a word has x5 or more windows in the same period of time and makes sense with the sentence, dont miss it.
+       - If a word has less then x3 windows and doesnt makes sense with the sentence, skip it.
        """
 
     return prompt
@@ -200,9 +519,11 @@ def build_prompt3(classification_text, estimated_word_count):
     You are given a list of time-aligned classifications, each representing a possible word spoken between specific time intervals in seconds.
 
     Each line follows this format:
-    <start_time>-<end_time>s → <word>
+    <start_time>-<end_time>s → <word> (x<number of windows>, p=<mean confidence>)
+
+    Each line merges the overlapping recognizer windows that agreed on the word; the window count and the mean confidence (when present) are the evidence for it.
 
-    Your task is to infer which distinct words most likely exist in the original sentence. Consider repetition and overlap of time intervals as stronger evidence for a word.
+    Your task is to infer which distinct words most likely exist in the original sentence. Consider more windows and higher confidence as stronger evidence for a word.
 
     Only return the {estimated_word_count} most likely distinct words, in the most probable order they appear in the sentence. Return them as a space-separated string, no explanation.
 
@@ -241,23 +562,55 @@ def build_prompt4_summarize(prompt1_words, prompt2_words, prompt3_words):
     return prompt
 
 
-def call_gpt(message, client, deployment):
+def build_prompt_refine_glosses(gloss_words):
+    prompt = f"""
+    You are given the signed words detected in a sign language video, in temporal order:
+
+    {', '.join(gloss_words)}
+
+    Your task:
+    - Translate the words into **Hebrew** using this dictionary:
+    hello: שלום, thanks: תודה, need: צריך, now: עכשיו, when: מתי, why: למה, appointment: תור,
+    schedule: לקבוע, arrive: להגיע, station: תחנה, bus: אוטובוס, phone: טלפון, place: מקום,
+    help: לעזור, name: שם, no: לא, go: ללכת, come: לבוא, I: אני, you: אתה, home: בית,
+    ticket: כרטיס, later: אחר כך, doctor: רופא, idCard: תעודת זהות, ambulance: אמבולנס,
+    clinic: קופת חולים
+
+    - Keep the word order unless Hebrew grammar requires a change.
+    - Add appropriate Hebrew **linking words** (e.g., ל, עם, ב, מ, אל) and conjugate to make a fluent sentence.
+    - Do not add or remove signed words. No hallucinations.
+    - Output: one **correct Hebrew sentence**, no punctuation, no explanation.
+    """
+
+    return prompt
+
+
+def call_gpt(message, client, deployment, cache_variant=""):
+    """
+    Sends one prompt to GPT, going through the LLM response cache (utils/llm_cache.py).
+
+    cache_variant keeps otherwise identical prompts apart, e.g. the parallel chains of
+    summarize_predictions_gpt, so a cache hit does not collapse them into one answer.
+    """
     chat_prompt = [{"role": "user", "content": [{"type": "text", "text": message}]}]
     # chat_prompt = [{"role": "user", "content": [{"type": "text", "text": msg}]} for msg in messages]
 
-    completion = client.chat.completions.create(
-        model=deployment,
-        messages=chat_prompt,
-        temperature=0.7,
-        max_tokens=256
-    )
-    #
-    # result = completion.choices[0].message.content
-    # return [word.strip() for word in result.split("\n") if word.strip()]
-    return completion.choices[0].message.content.strip()
+    def request():
+        completion = client.chat.completions.create(
+            model=deployment,
+            messages=chat_prompt,
+            temperature=0.7,
+            max_tokens=256
+        )
+        #
+        # result = completion.choices[0].message.content
+        # return [word.strip() for word in result.split("\n") if word.strip()]
+        return completion.choices[0].message.content.strip()
 
+    return cached_llm_call(PROMPT_TEMPLATE_VERSION, [deployment, message, cache_variant], request)
 
-def consolidate_answers(answers, client, deployment):
+
+def build_consolidation_prompt(answers):
     joined_answers = "\n".join(f"Answer {i + 1}: {', '.join(ans)}" for i, ans in enumerate(answers))
     # final_prompt = f"""
     # You are given 5 different GPT responses that each analyzed a sign language video. Your task is to consolidate them into a single final list of signed words.
@@ -289,31 +642,66 @@ def consolidate_answers(answers, client, deployment):
     Return only the final sentence. One line. Words separated by spaces.
     """
 
-    return call_gpt(final_prompt, client, deployment)
+    return final_prompt
+
+
+def consolidate_answers(answers, client, deployment):
+    return call_gpt(build_consolidation_prompt(answers), client, deployment)
 
 
-def get_sentence_translation_from_gpt(client, azure_deployment, predictions, segments_list, video_duration):
+def prediction_label(prediction):
+    """The label of a window prediction, which is either a bare label or top-k [[label, prob], ...] pairs."""
+    if isinstance(prediction, (list, tuple)):
+        return prediction[0][0] if prediction else None
+    return prediction
+
+
+def predictions_with_confidence(predictions, probabilities, label_mapping):
+    """
+    Top-k [[label, prob], ...] of every classified window (unclassified windows stay None),
+    so the merged prompt intervals carry their mean confidence.
+    """
+    top_k = top_k_predictions(probabilities, label_mapping, TOP_K)
+    return [
+        prediction if prediction is None or isinstance(prediction, (list, tuple)) else window_top_k
+        for prediction, window_top_k in zip(predictions, top_k)
+    ]
+
+
+def build_chain_prompts(predictions, segments_list, video_duration):
     # classification_text = "\n".join(
     #     f"{round(start, 1)}-{round(end, 1)}s → {pred or 'UNKNOWN'}"
     #     for start, end, pred in predictions
     # )
     classification_text = "\n".join(
-        f"{round(start, 1)}-{round(end, 1)}s → {pred or 'UNKNOWN'}"
+        f"{round(start, 1)}-{round(end, 1)}s → {prediction_label(pred) or 'UNKNOWN'} (x1)"
         for (start, end), pred in zip(segments_list, predictions)
     )
+    if COMPACT_PROMPT_TIMELINE:
+        intervals = compact_timeline(segments_list, predictions)
+        compact_text = format_timeline(intervals)
+        print(f"🗜️ Prompt timeline: {len(segments_list)} windows → {len(intervals)} intervals "
+              f"(~{estimate_tokens(classification_text)} → ~{estimate_tokens(compact_text)} tokens)")
+        classification_text = compact_text
     estimated_word_count = round(video_duration / ((MIN_WINDOW_SEC + MAX_WINDOW_SEC) / 2))
 
     prompt1 = build_prompt1(classification_text, estimated_word_count, video_duration)
     prompt2 = build_prompt2(classification_text, estimated_word_count, video_duration)
     prompt3 = build_prompt3(classification_text, estimated_word_count)
+    return prompt1, prompt2, prompt3
+
+
+def get_sentence_translation_from_gpt(client, azure_deployment, predictions, segments_list, video_duration, chain_index=0):
+    prompt1, prompt2, prompt3 = build_chain_prompts(predictions, segments_list, video_duration)
+    cache_variant = f"chain-{chain_index}"
 
-    words1_response = call_gpt(prompt1, client, azure_deployment)
+    words1_response = call_gpt(prompt1, client, azure_deployment, cache_variant)
     words1 = words1_response.strip().split()
 
-    words2_response = call_gpt(prompt2, client, azure_deployment)
+    words2_response = call_gpt(prompt2, client, azure_deployment, cache_variant)
     words2 = words2_response.strip().split()
 
-    words3_response = call_gpt(prompt3, client, azure_deployment)
+    words3_response = call_gpt(prompt3, client, azure_deployment, cache_variant)
     words3 = words3_response.strip().split()
 
     print(f"\nPrompt1 Words: {words1}")
@@ -322,7 +710,7 @@ def get_sentence_translation_from_gpt(client, azure_deployment, predictions, seg
 
     final_prompt = build_prompt4_summarize(words1, words2, words3)
     print("\nCalling GPT for final Hebrew sentence...")
-    final_sentence = call_gpt(final_prompt, client, azure_deployment)
+    final_sentence = call_gpt(final_prompt, client, azure_deployment, cache_variant)
 
     print("\n=== Final Hebrew Sentence ===")
     print(final_sentence)
@@ -330,7 +718,7 @@ def get_sentence_translation_from_gpt(client, azure_deployment, predictions, seg
     return final_sentence
 
 
-def summarize_predictions_gpt(predictions, segments_list, video_duration):
+def create_gpt_client():
     endpoint = os.getenv("ENDPOINT_URL", "https://isl-translation.openai.azure.com/")
     deployment = os.getenv("DEPLOYMENT_NAME", "gpt-4o")
     subscription_key = os.getenv("AZURE_OPENAI_API_KEY", AZURE_OPENAI_API_KEY)
@@ -340,6 +728,53 @@ def summarize_predictions_gpt(predictions, segments_list, video_duration):
         api_key=subscription_key,
         api_version="2024-05-01-preview",
     )
+    return client, deployment
+
+
+def summarize_predictions_local(probabilities, segments_list, video_duration, label_mapping, refine_with_gpt=USE_GPT_REFINEMENT):
+    """
+    Builds the sentence from per-window probabilities with the offline decoder.
+
+    Args:
+        probabilities (np.ndarray): (num_windows, num_classes) window probabilities.
+        segments_list (list): (start_sec, end_sec) per window.
+        video_duration (float): Length of the video in seconds.
+        label_mapping (list): Class index → label.
+        refine_with_gpt (bool): Send the decoded glosses to GPT once to produce a fluent Hebrew sentence.
+
+    Returns:
+        str: The Hebrew sentence.
+    """
+    glosses = decode_gloss_sequence(segments_list, probabilities, label_mapping, video_duration)
+
+    print("\n=== Decoded Glosses ===")
+    for label, start, end, confidence in glosses:
+        print(f"{start}-{end}s → {label} ({confidence:.2f})")
+
+    if not glosses:
+        return ""
+
+    if refine_with_gpt:
+        try:
+            client, deployment = create_gpt_client()
+            final_sentence = call_gpt(build_prompt_refine_glosses([g[0] for g in glosses]), client, deployment)
+            print("\n=== Final Hebrew Sentence ===")
+            print(final_sentence)
+            return final_sentence
+        except Exception as e:
+            print(f"GPT refinement failed, using the decoded glosses: {e}")
+
+    final_sentence = glosses_to_hebrew(glosses)
+    print("\n=== Final Hebrew Sentence ===")
+    print(final_sentence)
+    return final_sentence
+
+
+def summarize_predictions_gpt(predictions, segments_list, video_duration):
+    if GPT_ORCHESTRATION == "async":
+        return asyncio.run(summarize_predictions_gpt_async(predictions, segments_list, video_duration))
+
+    client, deployment = create_gpt_client()
     # without threads:
     # answers = []
 
@@ -362,7 +797,7 @@ def summarize_predictions_gpt(predictions, segments_list, video_duration):
 
     with ThreadPoolExecutor(max_workers=AMOUNT_OF_GPT_CALLS) as executor:
         futures = {
-            executor.submit(get_sentence_translation_from_gpt, client, deployment, predictions, segments_list, video_duration): i
+            executor.submit(get_sentence_translation_from_gpt, client, deployment, predictions, segments_list, video_duration, i): i
             for i in range(AMOUNT_OF_GPT_CALLS)
         }
 
@@ -382,21 +817,166 @@ def summarize_predictions_gpt(predictions, segments_list, video_duration):
 
     print("\nFinal consolidated answer:")
     print(final_answer)
+    print_llm_cache_stats()
 
     return final_answer
 
 
+def print_llm_cache_stats():
+    cache = get_llm_cache()
+    if cache is not None:
+        print(f"LLM cache: {cache.stats()}")
+
+
+
+def create_async_gpt_client():
+    endpoint = os.getenv("ENDPOINT_URL", "https://isl-translation.openai.azure.com/")
+    deployment = os.getenv("DEPLOYMENT_NAME", "gpt-4o")
+    subscription_key = os.getenv("AZURE_OPENAI_API_KEY", AZURE_OPENAI_API_KEY)
+
+    client = AsyncAzureOpenAI(
+        azure_endpoint=endpoint,
+        api_key=subscription_key,
+        api_version="2024-05-01-preview",
+    )
+    return client, deployment
+
+
+async def call_gpt_async(message, client, deployment, cache_variant=""):
+    chat_prompt = [{"role": "user", "content": [{"type": "text", "text": message}]}]
+
+    async def request():
+        completion = await client.chat.completions.create(
+            model=deployment,
+            messages=chat_prompt,
+            temperature=0.7,
+            max_tokens=256
+        )
+        return completion.choices[0].message.content.strip()
+
+    return await cached_llm_call_async(PROMPT_TEMPLATE_VERSION, [deployment, message, cache_variant], request)
+
+
+async def get_sentence_translation_from_gpt_async(client, azure_deployment, predictions, segments_list, video_duration, chain_index=0):
+    prompts = build_chain_prompts(predictions, segments_list, video_duration)
+    cache_variant = f"chain-{chain_index}"
+
+    # prompts 1-3 are independent, so they run concurrently
+    responses = await asyncio.gather(*(call_gpt_async(prompt, client, azure_deployment, cache_variant) for prompt in prompts))
+    words1, words2, words3 = (response.strip().split() for response in responses)
+
+    print(f"\nPrompt1 Words: {words1}")
+    print(f"Prompt2 Words: {words2}")
+    print(f"Prompt3 Words: {words3}")
 
-from server_client.client import prepare_video_payload, send_video_payload, get_video_duration
-def translate_video_to_text(video_path, model_path, label_encoder_path):
+    final_prompt = build_prompt4_summarize(words1, words2, words3)
+    return await call_gpt_async(final_prompt, client, azure_deployment, cache_variant)
+
+
+async def summarize_predictions_gpt_async(predictions, segments_list, video_duration, agreement=EARLY_STOP_AGREEMENT):
+    """
+    Async version of summarize_predictions_gpt.
+
+    All chains share one async client and run concurrently. As soon as `agreement`
+    answers contain the same word sequence, that answer is returned and the remaining
+    chains are cancelled; otherwise all answers are consolidated as before.
+    """
+    client, deployment = create_async_gpt_client()
+
+    print(f"Sending {AMOUNT_OF_GPT_CALLS} async GPT chains (early stop at {agreement} agreeing answers)...")
+    tasks = [
+        asyncio.create_task(get_sentence_translation_from_gpt_async(client, deployment, predictions, segments_list, video_duration, i))
+        for i in range(AMOUNT_OF_GPT_CALLS)
+    ]
+
+    try:
+        answers = []
+        votes = Counter()
+        for next_answer in asyncio.as_completed(tasks):
+            try:
+                answer = await next_answer
+            except Exception as e:
+                print(f"Error in GPT chain: {e}")
+                answer = ""
+            answers.append(answer)
+            print(f"Answer {len(answers)}: {answer}")
+
+            normalized = " ".join(answer.split())
+            if normalized:
+                votes[normalized] += 1
+                if votes[normalized] >= agreement:
+                    print(f"\n{agreement} answers agree, skipping the remaining chains and the consolidation")
+                    return answer
+
+        print("\nConsolidating the answers into a final result...")
+        final_answer = await call_gpt_async(build_consolidation_prompt(answers), client, deployment)
+
+        print("\nFinal consolidated answer:")
+        print(final_answer)
+        await asyncio.to_thread(print_llm_cache_stats)
+        return final_answer
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await client.close()
+
+
+def report_progress(progress_callback, stage, **data):
+    """Sends a pipeline stage (and optional partial results) to the caller, if it asked for progress."""
+    if progress_callback is not None:
+        progress_callback(stage, **data)
+
+
+def translate_video_to_text(video_path, model_path, label_encoder_path, progress_callback=None):
     # predictions, video_duration = process_segments_with_threads(video_path, model_path, label_encoder_path)
     video_duration = get_video_duration(video_path)
-    segments_list = create_segments_list(video_duration)
-    payload = prepare_video_payload(video_path, segments_list)
-    predictions = send_video_payload(payload)
+    label_mapping = load_label_mapping(os.path.join(os.path.dirname(__file__), label_encoder_path))
+    if SEGMENT_PREDICTION_MODE == "server":
+        segments_list = create_segments_list(video_duration)
+        report_progress(progress_callback, "classifying", windows=len(segments_list))
+        reporter = WindowResultReporter(progress_callback, segments_list) if progress_callback else None
+        predictions = predict_segments_remote(video_path, segments_list, top_k=TOP_K, on_result=reporter) \
+            or [None] * len(segments_list)
+        probabilities = labels_to_probabilities(predictions, label_mapping)
+    elif SEGMENT_PREDICTION_MODE == "pipeline":
+        segments_list = create_segments_list(video_duration)
+        report_progress(progress_callback, "classifying", windows=len(segments_list))
+        reporter = WindowResultReporter(progress_callback, segments_list) if progress_callback else None
+        predictions, probabilities = classify_video_pipelined(video_path, segments_list, model_path, label_mapping,
+                                                              reporter)
+    else:
+        report_progress(progress_callback, "extracting_landmarks", video_duration=video_duration)
+        # (T, 75, 4) landmark array — no per-landmark dicts on the sentence path
+        if USE_PARALLEL_EXTRACTION:
+            frames_data, _, fps = extract_video_landmark_arrays_parallel(video_path)
+        else:
+            frames_data, _, fps = extract_video_landmark_arrays(video_path)
+        if USE_MOTION_SEGMENTATION:
+            segments_list = create_motion_segments_list(frames_data, fps, video_duration)
+        else:
+            segments_list = create_segments_list(video_duration)
+        report_progress(progress_callback, "classifying", windows=len(segments_list))
+        reporter = WindowResultReporter(progress_callback, segments_list) if progress_callback else None
+        predictions, probabilities = classify_segments_from_landmarks(
+            frames_data, fps, segments_list, model_path, label_mapping,
+            shared_encoder=SEGMENT_PREDICTION_MODE == "shared_encoder", on_result=reporter
+        )
+    if reporter is not None:
+        reporter.flush()
+    report_progress(progress_callback, "window_predictions", predictions=[
+        {"start": float(start), "end": float(end), "label": prediction_label(prediction)}
+        for (start, end), prediction in zip(segments_list, predictions)
+    ])
     # start_time = time.time()
-    translation_text = summarize_predictions_gpt(predictions, segments_list, video_duration)
+    report_progress(progress_callback, "decoding", decoder=SENTENCE_DECODER)
+    if SENTENCE_DECODER == "gpt":
+        translation_text = summarize_predictions_gpt(
+            predictions_with_confidence(predictions, probabilities, label_mapping), segments_list, video_duration
+        )
+    else:
+        translation_text = summarize_predictions_local(probabilities, segments_list, video_duration, label_mapping)
     # elapsed_time = time.time() - start_time
 
     # print(f"summarize_predictions_gpt took {elapsed_time} seconds")
-    return translation_text
\ No newline at end of file
+    return translation_text
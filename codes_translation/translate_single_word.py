@@ -5,6 +5,7 @@ import pickle
 from utils.conver_json_to_vector import create_feature_vector
 import json
 from utils.test_mediapipe import extract_motion_data, motion_data_to_json
+from models.local_models.classify_attn import top_k_predictions, classify_feature_batch
 
 def read_json_file(file_path):
     """
@@ -34,7 +35,7 @@ def load_label_mapping(file_path):
     print(f"Label encoder loaded from {file_path}")
     return list(label_encoder.classes_)
 
-def classify_json_file(model_filename ,json_content, label_mapping):
+def classify_json_file(model_filename ,json_content, label_mapping, top_k=None):
     """
     Classifies a dummy matrix using a pre-trained model.
 
@@ -42,9 +43,10 @@ def classify_json_file(model_filename ,json_content, label_mapping):
         model_filename (str): Path to the saved model.
         input_shape (tuple): Shape of the input data (e.g., (50, 75, 3)).
         label_mapping (dict): Mapping of class indices to labels.
+        top_k (int, optional): If given, return the top_k [label, probability] pairs instead.
 
     Returns:
-        str: Predicted class label.
+        str: Predicted class label (or a list of [label, probability] pairs when top_k is set).
     """
     # Load the saved model
     model = load_model(model_filename, compile=False)
@@ -55,6 +57,8 @@ def classify_json_file(model_filename ,json_content, label_mapping):
 
     # Pass reshaped_data to the model
     predictions = model.predict(reshaped_data)
+    if top_k:
+        return top_k_predictions(predictions[0], label_mapping, top_k)
     predicted_class = np.argmax(predictions, axis=-1)[0]  # Get the predicted class index
 
     # Map the predicted index to the corresponding label
@@ -77,21 +81,22 @@ def classify_single_word(input_video_folder_name, video_file_name, temp_folder_p
     if video_file_name.split('.')[-1] == "mp4":
         file_name = video_file_name.split('.')[0]
 
-        trim_data = extract_motion_data(file_name, folder_name=input_video_folder_name)
-        motion_data_to_json(trim_data, file_name, folder_name=temp_folder_path_of_jsons, log_folder_path=log_folder_path)
-
-        json_content = read_json_file(f"{temp_folder_path_of_jsons}/{file_name}.json")
+        # Landmarks go straight to the feature tensor; nothing is written to temp_folder_path_of_jsons
+        json_content = extract_motion_data(file_name, folder_name=input_video_folder_name)
 
         # Check if JSON content is empty
         if not json_content:
+            # motion_data_to_json only logs the defective video when the data is empty
+            motion_data_to_json(json_content, file_name, folder_name=temp_folder_path_of_jsons, log_folder_path=log_folder_path)
             print(f"Skipped {file_name}: JSON content is empty.")
             return None
 
         # Define a label mapping
         label_encoder = load_label_mapping(label_encoder_file_path)
 
-        # Get the classification result
-        predicted_label = classify_json_file(model_file_path, json_content, label_encoder)
+        # Get the classification result from the cached model
+        predicted_labels, _ = classify_feature_batch(model_file_path, [create_feature_vector(json_content)], label_encoder)
+        predicted_label = predicted_labels[0]
         print(f"Real label: {file_name}, Predicted Label: {predicted_label}")
 
         return predicted_label
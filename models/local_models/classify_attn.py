@@ -3,13 +3,24 @@ import json
 import pickle
 import numpy as np
 import tensorflow as tf
-from tensorflow.keras.models import load_model
-from tensorflow.keras.layers import Layer, InputSpec
-from utils.conver_json_to_vector import create_feature_vector
-from utils.test_mediapipe import extract_motion_data, motion_data_to_json
+from tensorflow.keras.models import load_model, clone_model
+from tensorflow.keras.layers import Layer, InputSpec, Input, Reshape
+from utils.conver_json_to_vector import create_feature_vector, LENGTH_BUCKETS
+from utils.test_mediapipe import extract_motion_data
 
-# Global model cache
-MODEL_CACHE = None
+# Global model cache: model_filename → loaded model
+MODEL_CACHE = {}
+# Same models with a variable-length time axis (see load_variable_length_model)
+VARIABLE_LENGTH_MODEL_CACHE = {}
+
+# Largest number of windows sent to the model in one predict call
+MAX_BATCH_SIZE = int(os.getenv("MAX_INFERENCE_BATCH_SIZE", "64"))
+
+# How many (label, probability) pairs are kept per window when top-k output is requested
+TOP_K = int(os.getenv("TOP_K_PREDICTIONS", "3"))
+
+# Pad each window only up to its length bucket instead of to MAX_FRAMES
+VARIABLE_LENGTH_INFERENCE = os.getenv("VARIABLE_LENGTH_INFERENCE", "false").lower() == "true"
 
 # ────────────────────────────────────────────────────────────────────────────────
 # 1) Re-declare your custom SelfAttention so load_model can deserialize it
@@ -74,21 +85,77 @@ def load_label_mapping(file_path):
 # ────────────────────────────────────────────────────────────────────────────────
 # 3) The core classify_json_file now loads with custom_objects
 # ────────────────────────────────────────────────────────────────────────────────
-def classify_json_file(model_filename, json_content, label_mapping):
+def load_cached_model(model_filename):
+    if model_filename not in MODEL_CACHE:
+        MODEL_CACHE[model_filename] = load_model(
+            model_filename,
+            compile=False,
+            custom_objects={'SelfAttention': SelfAttention}
+        )
+    return MODEL_CACHE[model_filename]
+
+def top_k_predictions(probabilities, label_mapping, k=TOP_K, decimals=3):
+    """
+    Keeps the k most likely classes of each probability row.
+
+    The result is the compact wire format used by /predict: one [[label, prob], ...]
+    list per window, most likely first, probabilities rounded to `decimals`.
+
+    Args:
+        probabilities (np.ndarray): (num_classes,) or (N, num_classes) softmax output.
+        label_mapping (list): Class index → label.
+        k (int): Number of classes to keep.
+        decimals (int): Rounding of the probabilities.
+
+    Returns:
+        list: [[label, prob], ...] for a single row, or one such list per row.
+    """
+    probabilities = np.asarray(probabilities)
+    rows = np.atleast_2d(probabilities)
+    k = min(k, rows.shape[-1])
+    top_indices = np.argsort(-rows, axis=-1)[:, :k]
+    top_k = [
+        [[label_mapping[int(idx)], round(float(row[idx]), decimals)] for idx in indices]
+        for row, indices in zip(rows, top_indices)
+    ]
+    return top_k[0] if probabilities.ndim == 1 else top_k
+
+def load_variable_length_model(model_filename):
+    """
+    Rebuilds the cached model with a (None, 75, 3) input so it can run on windows
+    padded only to their length bucket. Weights are shared with the fixed-length model;
+    Reshape layers that hard-code the time axis get -1 instead.
+    """
+    if model_filename not in VARIABLE_LENGTH_MODEL_CACHE:
+        model = load_cached_model(model_filename)
+
+        def clone_layer(layer):
+            config = layer.get_config()
+            if isinstance(layer, Reshape):
+                config["target_shape"] = (-1, *config["target_shape"][1:])
+            return layer.__class__.from_config(config)
+
+        variable_input = Input(shape=(None, *model.input_shape[2:]))
+        variable_model = clone_model(model, input_tensors=variable_input, clone_function=clone_layer)
+        variable_model.set_weights(model.get_weights())
+        VARIABLE_LENGTH_MODEL_CACHE[model_filename] = variable_model
+    return VARIABLE_LENGTH_MODEL_CACHE[model_filename]
+
+def predict_in_batches(model, x, max_batch_size=MAX_BATCH_SIZE):
+    # predict_on_batch skips the per-call dataset setup of predict(), which dominates for small inputs
+    return np.concatenate([
+        np.asarray(model.predict_on_batch(x[i:i + max_batch_size]))
+        for i in range(0, len(x), max_batch_size)
+    ])
+
+def classify_json_file(model_filename, json_content, label_mapping, top_k=None):
     # 1) load model once per call (or cache externally)
     # model = load_model(
     #     model_filename,
     #     compile=False,
     #     custom_objects={'SelfAttention': SelfAttention}
     # )
-    global MODEL_CACHE
-    if MODEL_CACHE is None:
-        MODEL_CACHE = load_model(
-            model_filename,
-            compile=False,
-            custom_objects={'SelfAttention': SelfAttention}
-        )
-    model = MODEL_CACHE
+    model = load_cached_model(model_filename)
 
     # 2) convert JSON → feature array
     mat = create_feature_vector(json_content)  # e.g. shape (T,H,W,C)
@@ -96,9 +163,105 @@ def classify_json_file(model_filename, json_content, label_mapping):
     x = np.expand_dims(mat, 0)                 # shape (1, T, H, W, C)
     # 3) inference
     preds = model.predict(x)
+    if top_k:
+        return top_k_predictions(preds[0], label_mapping, top_k)
     idx = int(np.argmax(preds, axis=-1)[0])
     return label_mapping[idx]
 
+def classify_feature_batch(model_filename, feature_matrices, label_mapping, max_batch_size=MAX_BATCH_SIZE,
+                           executor=None):
+    """
+    Classifies N feature matrices with as few model calls as possible.
+
+    Args:
+        model_filename (str): Path to the saved model.
+        feature_matrices (list | np.ndarray): N matrices from create_feature_vector, e.g. (N, 150, 75, 3).
+        label_mapping (list): Class index → label.
+        max_batch_size (int): Largest batch sent to the model in a single call.
+        executor (InferenceExecutor, optional): Run through this shared micro-batching
+            executor instead of calling the model from the current thread.
+
+    Returns:
+        tuple: (labels, probabilities) — N predicted labels and an (N, num_classes) array.
+    """
+    if len(feature_matrices) == 0:
+        return [], np.zeros((0, len(label_mapping)), dtype=np.float32)
+
+    x = np.asarray(feature_matrices, dtype=np.float32)
+    if executor is not None:
+        probabilities = executor.predict(x)
+    else:
+        probabilities = predict_in_batches(load_cached_model(model_filename), x, max_batch_size)
+    labels = [label_mapping[int(idx)] for idx in np.argmax(probabilities, axis=-1)]
+    return labels, probabilities
+
+def classify_json_batch(model_filename, json_contents, label_mapping, max_batch_size=MAX_BATCH_SIZE,
+                        source_fps=None, variable_length=VARIABLE_LENGTH_INFERENCE, executor=None):
+    """
+    Same as classify_feature_batch, starting from N motion-data JSON contents. Frames
+    without pose are zero-filled, so one such window does not fail the whole batch.
+
+    With variable_length, each sequence is resampled from source_fps to CANONICAL_FPS,
+    padded only up to its length bucket, and every bucket runs as its own batch through
+    the variable-length model, so cost follows the real window length. An executor
+    must then wrap the variable-length model (get_inference_executor(..., variable_length=True)).
+
+    The models were trained on windows zero-padded to MAX_FRAMES and cannot take a mask,
+    so a bucket's shorter padding changes what the BiLSTM and attention see; measure the
+    effect with compare_variable_length_inference before enabling it for a model.
+    """
+    if not variable_length:
+        feature_matrices = [create_feature_vector(json_content, fill_missing_pose=True) for json_content in json_contents]
+        return classify_feature_batch(model_filename, feature_matrices, label_mapping, max_batch_size, executor)
+
+    if len(json_contents) == 0:
+        return [], np.zeros((0, len(label_mapping)), dtype=np.float32)
+
+    model = load_variable_length_model(model_filename) if executor is None else None
+    feature_matrices = [
+        create_feature_vector(json_content, source_fps=source_fps, length_buckets=LENGTH_BUCKETS, fill_missing_pose=True)
+        for json_content in json_contents
+    ]
+
+    probabilities = np.zeros((len(feature_matrices), len(label_mapping)), dtype=np.float32)
+    if executor is not None:
+        # Submit every bucket first so they can share the executor's next batch cut
+        pending = []
+        for bucket in sorted({len(mat) for mat in feature_matrices}):
+            indices = [i for i, mat in enumerate(feature_matrices) if len(mat) == bucket]
+            pending.append((indices, executor.submit([feature_matrices[i] for i in indices])))
+        for indices, future in pending:
+            probabilities[indices] = future.result()
+    else:
+        for bucket in sorted({len(mat) for mat in feature_matrices}):
+            indices = [i for i, mat in enumerate(feature_matrices) if len(mat) == bucket]
+            x = np.asarray([feature_matrices[i] for i in indices], dtype=np.float32)
+            probabilities[indices] = predict_in_batches(model, x, max_batch_size)
+
+    labels = [label_mapping[int(idx)] for idx in np.argmax(probabilities, axis=-1)]
+    return labels, probabilities
+
+def compare_variable_length_inference(model_filename, json_contents, label_mapping, source_fps=None,
+                                      max_batch_size=MAX_BATCH_SIZE):
+    """
+    Classifies the same windows with bucketed padding and with the full MAX_FRAMES padding
+    the model was trained on (both resampled from source_fps), and reports how far apart they are.
+
+    Returns:
+        dict: {"windows", "top1_agreement", "max_abs_diff"} — share of windows whose top-1 label
+        matches, and the largest probability difference.
+    """
+    full_padding = [create_feature_vector(json_content, source_fps=source_fps, fill_missing_pose=True)
+                    for json_content in json_contents]
+    _, full_probabilities = classify_feature_batch(model_filename, full_padding, label_mapping, max_batch_size)
+    _, bucketed_probabilities = classify_json_batch(model_filename, json_contents, label_mapping, max_batch_size,
+                                                    source_fps=source_fps, variable_length=True)
+    return {
+        "windows": len(json_contents),
+        "top1_agreement": float(np.mean(np.argmax(full_probabilities, axis=-1) == np.argmax(bucketed_probabilities, axis=-1))),
+        "max_abs_diff": float(np.abs(full_probabilities - bucketed_probabilities).max()) if len(json_contents) else 0.0,
+    }
+
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -124,13 +287,9 @@ def classify_single_word(input_video_folder_name, video_file_name, temp_folder_p
     if video_file_name.lower().endswith(".mp4"):
         file_base = os.path.splitext(video_file_name)[0]
 
-        # your mediapipe steps:
-        trim_data = extract_motion_data(file_base, folder_name=input_video_folder_name)
-        motion_data_to_json(trim_data, file_base, folder_name=temp_folder_path_of_jsons)
-
-        json_path = f"{temp_folder_path_of_jsons}/{file_base}.json"
-        json_content = read_json_file(json_path)
-        if json_content is None:
+        # your mediapipe steps (kept in memory, no JSON round-trip):
+        json_content = extract_motion_data(file_base, folder_name=input_video_folder_name)
+        if not json_content:
             return None
 
         labels = load_label_mapping(label_encoder_file_path)
@@ -0,0 +1,150 @@
+import numpy as np
+from tensorflow.keras.models import Model
+from utils.conver_json_to_vector import create_feature_vector, resample_frames, CANONICAL_FPS
+from models.local_models.classify_attn import load_cached_model, MAX_BATCH_SIZE, VARIABLE_LENGTH_INFERENCE
+
+# Global cache: model_filename → (encoder, head, time_stride, padding_embedding)
+SPLIT_MODEL_CACHE = {}
+
+# The first layer of one of these types starts the per-window part of the model
+WINDOW_HEAD_LAYER_TYPES = ("Bidirectional", "LSTM", "GRU")
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1) Split a trained window classifier into a frame encoder and a window head
+# ────────────────────────────────────────────────────────────────────────────────
+def split_model(model):
+    """
+    Splits a trained model (model_5 / model_attention_improved style) in two:
+    - encoder: the local Conv/Pool front-end, whose output at a time step only
+      depends on a few neighbouring frames, so it can be computed once per video;
+    - head: the recurrent layer, attention pooling and dense classifier, which
+      must run once per window.
+
+    Args:
+        model (keras.Model): The loaded window classifier.
+
+    Returns:
+        tuple: (encoder, head, time_stride) — time_stride is how many input frames
+        map to one encoder output step (e.g. 2 after a MaxPooling2D).
+    """
+    split_layer = next(
+        (layer for layer in model.layers if type(layer).__name__ in WINDOW_HEAD_LAYER_TYPES),
+        None
+    )
+    if split_layer is None:
+        raise ValueError("Model has no recurrent layer to split the window head at")
+
+    encoder = Model(model.input, split_layer.input)
+    head = Model(split_layer.input, model.output)
+
+    window_frames = model.input_shape[1]
+    time_stride = window_frames // encoder.output_shape[1]
+    return encoder, head, time_stride
+
+
+def load_split_model(model_filename):
+    if model_filename not in SPLIT_MODEL_CACHE:
+        model = load_cached_model(model_filename)
+        encoder, head, time_stride = split_model(model)
+
+        # What the encoder produces for the zero frames create_feature_vector pads with;
+        # taken from the middle of the window so it is free of edge effects.
+        zeros = np.zeros((1, *model.input_shape[1:]), dtype=np.float32)
+        encoded_zeros = np.asarray(encoder.predict_on_batch(zeros))[0]
+        padding_embedding = encoded_zeros[len(encoded_zeros) // 2]
+
+        SPLIT_MODEL_CACHE[model_filename] = (encoder, head, time_stride, padding_embedding)
+    return SPLIT_MODEL_CACHE[model_filename]
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2) Encode a whole video once, then classify every window from the shared features
+# ────────────────────────────────────────────────────────────────────────────────
+def encode_video(encoder, frames_data, max_batch_size=MAX_BATCH_SIZE):
+    """
+    Runs the frame encoder over a whole video in model-sized chunks.
+
+    Args:
+        encoder (keras.Model): Encoder part from split_model.
+        frames_data (list): Frame-indexed motion data of the whole video.
+        max_batch_size (int): Largest number of chunks per encoder call.
+
+    Returns:
+        np.ndarray: (num_steps, features) encoder output covering the whole video.
+    """
+    window_frames = encoder.input_shape[1]
+    num_chunks = max(1, int(np.ceil(len(frames_data) / window_frames)))
+    video_matrix = create_feature_vector(frames_data, max_frames=num_chunks * window_frames, fill_missing_pose=True)
+    chunks = video_matrix.reshape((num_chunks, window_frames, *video_matrix.shape[1:]))
+
+    encoded = np.concatenate([
+        np.asarray(encoder.predict_on_batch(chunks[i:i + max_batch_size]))
+        for i in range(0, num_chunks, max_batch_size)
+    ])
+    return encoded.reshape((-1, encoded.shape[-1]))
+
+
+def classify_segments_shared(model_filename, frames_data, fps, segments_list, label_mapping,
+                             max_batch_size=MAX_BATCH_SIZE, on_result=None, resample=VARIABLE_LENGTH_INFERENCE):
+    """
+    Classifies every (start_sec, end_sec) window of a video from one shared encoder pass.
+
+    Encoder compute grows with the video length; only the cheap head runs per window.
+    The result is close to, not identical with, classifying each window on its own:
+    window edges see their real neighbouring frames instead of zero padding (and encoder
+    chunk borders see zero padding instead), window starts are rounded down to the
+    encoder's time stride, and a window's padding is one constant encoded step.
+
+    Args:
+        model_filename (str): Path to the saved model.
+        frames_data (list): Frame-indexed motion data of the whole video.
+        fps (float): Frame rate of frames_data.
+        segments_list (list): (start_sec, end_sec) windows.
+        label_mapping (list): Class index → label.
+        max_batch_size (int): Largest batch per model call.
+        on_result (callable, optional): Called as on_result(index, label) after each head batch.
+        resample (bool): Resample the video to CANONICAL_FPS first. Defaults to what
+            classify_json_batch does (only with VARIABLE_LENGTH_INFERENCE), so both modes
+            feed the model the same frames.
+
+    Returns:
+        tuple: (labels, probabilities) — one label (None for empty windows) per window
+        and a (num_windows, num_classes) array (uniform rows for empty windows).
+    """
+    encoder, head, time_stride, padding_embedding = load_split_model(model_filename)
+    if resample:
+        frames_data = resample_frames(frames_data, fps)
+        fps = CANONICAL_FPS
+    encoded_video = encode_video(encoder, frames_data, max_batch_size)
+    window_steps = head.input_shape[1]
+
+    window_indices, window_inputs = [], []
+    for i, (start_sec, end_sec) in enumerate(segments_list):
+        start_frame = int(start_sec * fps)
+        end_frame = min(int(end_sec * fps), len(frames_data))
+        if end_frame <= start_frame:
+            continue
+
+        first_step = start_frame // time_stride
+        num_steps = min(int(np.ceil((end_frame - start_frame) / time_stride)), window_steps)
+        window = np.tile(padding_embedding, (window_steps, 1))
+        steps = encoded_video[first_step:first_step + num_steps]
+        window[:len(steps)] = steps
+
+        window_indices.append(i)
+        window_inputs.append(window)
+
+    labels = [None] * len(segments_list)
+    probabilities = np.full((len(segments_list), len(label_mapping)), 1.0 / len(label_mapping), dtype=np.float32)
+    if not window_inputs:
+        return labels, probabilities
+
+    x = np.asarray(window_inputs, dtype=np.float32)
+    for b in range(0, len(x), max_batch_size):
+        batch_indices = window_indices[b:b + max_batch_size]
+        batch_probabilities = np.asarray(head.predict_on_batch(x[b:b + max_batch_size]))
+        probabilities[batch_indices] = batch_probabilities
+        for i, idx in zip(batch_indices, np.argmax(batch_probabilities, axis=-1)):
+            labels[i] = label_mapping[int(idx)]
+            if on_result is not None:
+                on_result(i, labels[i])
+    return labels, probabilities
@@ -0,0 +1,144 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+import numpy as np
+from models.local_models.classify_attn import (
+    load_cached_model, load_variable_length_model, predict_in_batches, MAX_BATCH_SIZE
+)
+
+# How long the worker waits for more requests before running a partial batch
+MAX_BATCH_WAIT_MS = float(os.getenv("MAX_BATCH_WAIT_MS", "5"))
+
+# Global {(model_filename, variable_length): InferenceExecutor} cache
+INFERENCE_EXECUTORS = {}
+INFERENCE_EXECUTORS_LOCK = threading.Lock()
+
+
+class InferenceExecutor:
+    """
+    Micro-batching front-end for one model.
+
+    Callers submit feature matrices from any thread and get a Future back. A single
+    worker thread owns the model: it drains the queue until max_batch_size windows are
+    waiting or max_wait_ms has passed since the first one arrived, runs one forward pass
+    per input shape and resolves every caller's Future with its own rows.
+    """
+    def __init__(self, model_filename, model_loader=load_cached_model,
+                 max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_BATCH_WAIT_MS):
+        self.model_filename = model_filename
+        self.model_loader = model_loader
+        self.max_batch_size = max_batch_size
+        self.max_wait_sec = max_wait_ms / 1000.0
+        self.batches = 0
+        self.requests = 0
+        self.windows = 0
+        self._queue = queue.Queue()
+        self._load_error = None
+        self._worker = threading.Thread(target=self._run, name="inference-executor", daemon=True)
+        self._worker.start()
+
+    def submit(self, feature_matrices):
+        """
+        Queues N feature matrices of one shape, e.g. (N, 150, 75, 3).
+
+        Returns:
+            Future: Resolves to the (N, num_classes) probabilities.
+        """
+        future = Future()
+        x = np.asarray(feature_matrices, dtype=np.float32)
+        if len(x) == 0:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        self._queue.put((x, future))
+        return future
+
+    def predict(self, feature_matrices, timeout=None):
+        """Blocking submit — returns the (N, num_classes) probabilities."""
+        return self.submit(feature_matrices).result(timeout)
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "windows": self.windows,
+            "mean_batch_windows": round(self.windows / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _collect_batch(self):
+        """Blocks for the first request, then gathers more until the batch is full or the wait expires."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        num_windows = len(first[0])
+        deadline = time.monotonic() + self.max_wait_sec
+
+        while num_windows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # finish this batch, stop on the next loop
+                break
+            batch.append(item)
+            num_windows += len(item[0])
+
+        return batch
+
+    def _run(self):
+        try:
+            model = self.model_loader(self.model_filename)
+        except Exception as e:
+            model, self._load_error = None, e
+
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                return
+            if model is None:
+                for _, future in batch:
+                    future.set_exception(self._load_error)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.windows += sum(len(x) for x, _ in batch)
+
+            # Windows of different lengths (variable-length buckets) cannot share a forward pass
+            by_shape = {}
+            for item in batch:
+                by_shape.setdefault(item[0].shape[1:], []).append(item)
+
+            for items in by_shape.values():
+                try:
+                    x = np.concatenate([x for x, _ in items])
+                    probabilities = predict_in_batches(model, x, self.max_batch_size)
+                except Exception as e:
+                    for _, future in items:
+                        future.set_exception(e)
+                    continue
+
+                offset = 0
+                for x, future in items:
+                    future.set_result(probabilities[offset:offset + len(x)])
+                    offset += len(x)
+
+
+def get_inference_executor(model_filename, variable_length=False):
+    """The process-wide InferenceExecutor of a model (the variable-length variant if requested)."""
+    key = (model_filename, variable_length)
+    with INFERENCE_EXECUTORS_LOCK:
+        if key not in INFERENCE_EXECUTORS:
+            model_loader = load_variable_length_model if variable_length else load_cached_model
+            INFERENCE_EXECUTORS[key] = InferenceExecutor(model_filename, model_loader)
+        return INFERENCE_EXECUTORS[key]
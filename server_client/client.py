@@ -1,31 +1,57 @@
 
 import os
 import socket
-import struct
-import json
 import base64
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+from server_client.protocol import (
+    PROTOCOL_MAGIC, ProtocolError, send_legacy_message, recv_legacy_message,
+    send_video_request, receive_window_results
+)
 
 SERVER_HOST = 'localhost'
 SERVER_PORT = 5002
 CONNECT_TIMEOUT = 5  # seconds
+RESPONSE_TIMEOUT = 120  # seconds
+# "json": legacy base64 JSON request per call; "binary": v2 framing on a kept-alive connection (see protocol.py)
+WIRE_PROTOCOL = os.getenv("SEGMENT_SERVER_PROTOCOL", "json")
+
+# Comma-separated host:port list; with more than one server the window list is split across them
+PREDICTION_SERVERS = os.getenv("PREDICTION_SERVERS", f"{SERVER_HOST}:{SERVER_PORT}")
+# Deadline for one shard on one server (the whole request, not one read) before it is retried on another
+SHARD_TIMEOUT = int(os.getenv("SHARD_TIMEOUT_SEC", "60"))
+# How many servers a shard is tried on before its windows are given up
+MAX_SHARD_ATTEMPTS = 3
+# How long a server that failed a shard is avoided
+FAILED_SERVER_COOLDOWN_SEC = 30
+
+# Process-wide kept-alive connections used in binary mode, one per (host, port)
+SEGMENT_SERVER_CONNECTIONS = {}
+SEGMENT_SERVER_CONNECTIONS_LOCK = threading.Lock()
+# Process-wide PredictionServerPool, created on first use
+PREDICTION_SERVER_POOL = None
 
 def encode_video_to_base64(path):
     with open(path, "rb") as video_file:
         return base64.b64encode(video_file.read()).decode("utf-8")
 
-def prepare_video_payload(video_path, seg):
-    return {
+def prepare_video_payload(video_path, seg, top_k=None):
+    payload = {
         "filename": os.path.basename(video_path),
         "content": encode_video_to_base64(video_path),
         "tuples": seg  # ✅ use 'tuples' to match Java-side field
     }
+    if top_k:
+        # ask for [[label, prob], ...] per segment instead of a bare label
+        payload["top_k"] = top_k
+    return payload
 
-def send_video_payload(payload):
+def send_video_payload(payload, host=SERVER_HOST, port=SERVER_PORT, timeout=RESPONSE_TIMEOUT):
     try:
-        s = socket.create_connection((SERVER_HOST, SERVER_PORT), timeout=CONNECT_TIMEOUT)
-        s.settimeout(120)
+        s = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT)
+        s.settimeout(timeout)
         print("✅ Connected successfully!")
     except socket.timeout:
         print(f"❌ Connection timed out after {CONNECT_TIMEOUT} seconds")
@@ -34,42 +60,245 @@ def send_video_payload(payload):
         print(f"❌ Connection failed: [Errno {e.errno}] {e.strerror}")
         return
 
+    predictions = None
+    deadline = time.monotonic() + timeout
     try:
-        # Encode the single payload
-        raw_str = json.dumps(payload)
-        encoded = raw_str.encode('utf-8')
-        s.sendall(struct.pack('!I', len(encoded)))  # Send 4-byte length
-        s.sendall(encoded)  # Then JSON payload
-
-        # Receive 4-byte response length
-        header = s.recv(4)
-        if len(header) < 4:
-            print("❌ Incomplete response header")
-            return
-        total = struct.unpack('!I', header)[0]
-
-        # Read full response
-        data = b''
-        while len(data) < total:
-            chunk = s.recv(min(4096, total - len(data)))
-            if not chunk:
-                break
-            data += chunk
+        # Send the single length-prefixed JSON payload, then read the full response into one buffer
+        send_legacy_message(s, payload)
+        results = recv_legacy_message(s, deadline=deadline)
 
-        if len(data) < total:
-            print("❌ Incomplete response body")
-            return
-
-        results = json.loads(data.decode('utf-8'))
+        predictions = results.get("predictions")
         print("✅ Server Response:")
-        for i, r in enumerate(results.get("predictions")):
+        for i, r in enumerate(predictions or []):
             print(f"{i+1}. {r}")
 
     except Exception as e:
         print(f"❌ Communication error: {e}")
     finally:
         s.close()
-        return results.get("predictions")
+    return predictions
+
+
+class SegmentServerConnection:
+    """
+    Kept-alive v2 (binary) connection to the segment server.
+
+    The video is streamed from disk in chunks and window results come back as they
+    finish. A request that fails on a stale connection before any window arrived is
+    retried once on a new one. Each request has its own deadline; self.timeout is only
+    the default.
+    """
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT, timeout=RESPONSE_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sock = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+        self.sock.settimeout(self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.sendall(PROTOCOL_MAGIC)
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+
+    def predict(self, video_path, segments, top_k=None, on_result=None, timeout=None):
+        """
+        Classifies every (start_sec, end_sec) segment of a video on the server.
+
+        Args:
+            video_path (str): Path to the video file.
+            segments (list): (start_sec, end_sec) windows.
+            top_k (int, optional): Ask for [[label, prob], ...] per window instead of a bare label.
+            on_result (callable, optional): Called as on_result(index, prediction) as windows finish.
+            timeout (float, optional): Seconds the whole request may take (default self.timeout).
+
+        Returns:
+            list: One prediction per segment.
+
+        Raises:
+            socket.timeout: The request did not finish within timeout.
+        """
+        timeout = timeout or self.timeout
+        delivered = []
+
+        def deliver(index, prediction):
+            delivered.append(index)
+            if on_result is not None:
+                on_result(index, prediction)
+
+        with self.lock:
+            deadline = time.monotonic() + timeout
+            for attempt in range(2):
+                reused = self.sock is not None
+                try:
+                    if self.sock is None:
+                        self.connect()
+                    # The previous request may have left a shorter per-read timeout behind
+                    self.sock.settimeout(timeout)
+                    send_video_request(self.sock, video_path, segments, top_k)
+                    return receive_window_results(self.sock, len(segments), deliver, deadline)
+                except ProtocolError:
+                    self.close()
+                    raise
+                except socket.timeout:
+                    # A slow server is not retried here; the caller decides where to go next
+                    self.close()
+                    raise
+                except OSError:
+                    self.close()
+                    # Only a connection that sat idle may have been dropped by the server; retry that once,
+                    # unless windows already reached on_result (a retry would deliver them twice)
+                    if not reused or attempt == 1 or delivered:
+                        raise
+
+
+def get_segment_server_connection(host=SERVER_HOST, port=SERVER_PORT):
+    """The shared connection to (host, port); the timeout is given per predict() call."""
+    with SEGMENT_SERVER_CONNECTIONS_LOCK:
+        if (host, port) not in SEGMENT_SERVER_CONNECTIONS:
+            SEGMENT_SERVER_CONNECTIONS[(host, port)] = SegmentServerConnection(host, port)
+        return SEGMENT_SERVER_CONNECTIONS[(host, port)]
+
+
+def parse_server_list(servers):
+    """'host:port,host:port' → [(host, port), ...]."""
+    parsed = []
+    for server in servers.split(","):
+        server = server.strip()
+        if server:
+            host, _, port = server.rpartition(":")
+            parsed.append((host or SERVER_HOST, int(port)))
+    return parsed
+
+
+class PredictionServerPool:
+    """
+    Least-loaded selection over the configured prediction servers.
+
+    Each server's in-flight shard count is tracked; a server that failed a shard is
+    skipped for FAILED_SERVER_COOLDOWN_SEC unless every other server is excluded too.
+    """
+    def __init__(self, servers):
+        self.servers = list(servers)
+        self.in_flight = {server: 0 for server in self.servers}
+        self.failed_until = {server: 0.0 for server in self.servers}
+        self.lock = threading.Lock()
+
+    def acquire(self, exclude=()):
+        with self.lock:
+            candidates = [server for server in self.servers if server not in exclude] or self.servers
+            now = time.time()
+            healthy = [server for server in candidates if self.failed_until[server] <= now] or candidates
+            server = min(healthy, key=lambda candidate: self.in_flight[candidate])
+            self.in_flight[server] += 1
+            return server
+
+    def release(self, server, failed=False):
+        with self.lock:
+            self.in_flight[server] -= 1
+            if failed:
+                self.failed_until[server] = time.time() + FAILED_SERVER_COOLDOWN_SEC
+
+
+def get_prediction_server_pool():
+    global PREDICTION_SERVER_POOL
+    with SEGMENT_SERVER_CONNECTIONS_LOCK:
+        if PREDICTION_SERVER_POOL is None:
+            PREDICTION_SERVER_POOL = PredictionServerPool(parse_server_list(PREDICTION_SERVERS))
+        return PREDICTION_SERVER_POOL
+
+
+def predict_on_server(server, video_path, segments, top_k=None, on_result=None, timeout=RESPONSE_TIMEOUT):
+    """One request to one server with the configured WIRE_PROTOCOL; raises when it fails."""
+    host, port = server
+    if WIRE_PROTOCOL == "binary":
+        return get_segment_server_connection(host, port).predict(video_path, segments, top_k, on_result, timeout)
+
+    predictions = send_video_payload(prepare_video_payload(video_path, segments, top_k=top_k), host, port, timeout)
+    if predictions is None:
+        raise ConnectionError(f"No predictions from {host}:{port}")
+    return predictions
+
+
+def predict_segments_sharded(video_path, segments_list, top_k=None, on_result=None,
+                             server_pool=None, timeout=SHARD_TIMEOUT):
+    """
+    Splits the windows into one contiguous (in time) shard per server and runs the shards in parallel.
+
+    A shard that fails or times out is retried on another server, up to MAX_SHARD_ATTEMPTS
+    times, with only the windows that have not arrived yet; windows no attempt delivered
+    stay None.
+
+    Returns:
+        list: One prediction per segment, in window order.
+    """
+    server_pool = server_pool or get_prediction_server_pool()
+    num_shards = min(len(server_pool.servers), len(segments_list))
+    if num_shards == 0:
+        return []
+
+    order = sorted(range(len(segments_list)), key=lambda i: tuple(segments_list[i]))
+    shards = [list(indices) for indices in np.array_split(order, num_shards)]
+    predictions = [None] * len(segments_list)
+
+    def run_shard(indices):
+        received = {}
+        tried = set()
+        for attempt in range(MAX_SHARD_ATTEMPTS):
+            # Windows that streamed in before a failure are kept and not asked for again
+            pending = [i for i in indices if i not in received]
+
+            def shard_on_result(j, prediction, pending=pending):
+                received[pending[j]] = prediction
+                if on_result:
+                    on_result(pending[j], prediction)
+
+            server = server_pool.acquire(exclude=tried)
+            tried.add(server)
+            try:
+                shard_predictions = predict_on_server(server, video_path, [segments_list[i] for i in pending], top_k,
+                                                      shard_on_result, timeout)
+                server_pool.release(server)
+                received.update(zip(pending, shard_predictions))
+                break
+            except (OSError, ProtocolError) as e:
+                server_pool.release(server, failed=True)
+                print(f"⚠️ Shard of {len(pending)} windows failed on {server[0]}:{server[1]} "
+                      f"(attempt {attempt + 1}/{MAX_SHARD_ATTEMPTS}): {e}")
+        return indices, [received.get(i) for i in indices]
+
+    with ThreadPoolExecutor(max_workers=num_shards) as executor:
+        for indices, shard_predictions in executor.map(run_shard, shards):
+            for i, prediction in zip(indices, shard_predictions):
+                predictions[i] = prediction
+
+    return predictions
+
+
+def predict_segments_remote(video_path, segments_list, top_k=None, on_result=None):
+    """
+    Classifies the segments of a video on the prediction server(s) with the configured WIRE_PROTOCOL.
+
+    Returns:
+        list | None: One prediction per segment, or None when no server could be reached.
+    """
+    server_pool = get_prediction_server_pool()
+    if len(server_pool.servers) > 1:
+        predictions = predict_segments_sharded(video_path, segments_list, top_k, on_result, server_pool)
+        return predictions if any(prediction is not None for prediction in predictions) else None
+
+    try:
+        return predict_on_server(server_pool.servers[0], video_path, segments_list, top_k, on_result)
+    except (OSError, ProtocolError) as e:
+        print(f"❌ Communication error: {e}")
+        return None
 
 ##########
 
@@ -0,0 +1,188 @@
+import json
+import time
+import socket
+import struct
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Wire protocols between the web backend (client.py) and the segment server (port 5002)
+#
+# v1 (legacy JSON): one 4-byte big-endian length + a JSON request with the base64
+#    video, answered by one 4-byte length + a JSON {"predictions": [...]} response.
+#    The connection is closed after each request.
+#
+# v2 (binary): the client opens with PROTOCOL_MAGIC, then exchanges frames of
+#    FRAME_HEADER (type, payload length) + payload on a kept-alive connection:
+#      client → REQUEST_HEADER  JSON {"filename", "tuples", "top_k", "video_size"}
+#      client → VIDEO_CHUNK*    raw video bytes
+#      client → VIDEO_END
+#      server → WINDOW_RESULTS* JSON {"windows": [[index, prediction], ...]} as windows finish
+#      server → DONE            JSON {"count": n}   (or ERROR JSON {"error": ...})
+#    after which the next request may follow on the same connection.
+#    The magic read as a v1 length would be > 1 GB, so a server can tell them apart.
+# ────────────────────────────────────────────────────────────────────────────────
+PROTOCOL_VERSION = 2
+PROTOCOL_MAGIC = b"SLT" + bytes([PROTOCOL_VERSION])
+
+LENGTH_HEADER = struct.Struct("!I")
+FRAME_HEADER = struct.Struct("!BI")
+
+REQUEST_HEADER = 1
+VIDEO_CHUNK = 2
+VIDEO_END = 3
+WINDOW_RESULTS = 4
+DONE = 5
+ERROR = 6
+
+# Size of the video chunks streamed by the client
+VIDEO_CHUNK_SIZE = 256 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def recv_exact(sock, size, deadline=None):
+    """
+    Reads exactly size bytes into one preallocated buffer (no repeated concatenation).
+
+    With a deadline (a time.monotonic() value), each read waits at most until then, so a
+    server that keeps trickling bytes cannot stretch a request past it.
+    """
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout(f"Deadline passed after {received} of {size} bytes")
+            sock.settimeout(remaining)
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise ConnectionError(f"Connection closed after {received} of {size} bytes")
+        received += n
+    return buffer
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# v1: length-prefixed JSON
+# ────────────────────────────────────────────────────────────────────────────────
+def send_legacy_message(sock, message):
+    encoded = json.dumps(message).encode("utf-8")
+    sock.sendall(LENGTH_HEADER.pack(len(encoded)))
+    sock.sendall(encoded)
+
+
+def recv_legacy_message(sock, length=None, deadline=None):
+    """Reads one length-prefixed JSON message; length is given when the prefix was already read."""
+    if length is None:
+        length = LENGTH_HEADER.unpack(recv_exact(sock, LENGTH_HEADER.size, deadline))[0]
+    return json.loads(recv_exact(sock, length, deadline).decode("utf-8"))
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# v2: typed binary frames
+# ────────────────────────────────────────────────────────────────────────────────
+def send_frame(sock, frame_type, payload=b""):
+    sock.sendall(FRAME_HEADER.pack(frame_type, len(payload)))
+    if payload:
+        sock.sendall(payload)
+
+
+def send_json_frame(sock, frame_type, message):
+    send_frame(sock, frame_type, json.dumps(message).encode("utf-8"))
+
+
+def recv_frame(sock, deadline=None):
+    """Returns (frame_type, payload)."""
+    frame_type, length = FRAME_HEADER.unpack(recv_exact(sock, FRAME_HEADER.size, deadline))
+    payload = recv_exact(sock, length, deadline) if length else bytearray()
+    return frame_type, payload
+
+
+def decode_json_payload(payload):
+    return json.loads(bytes(payload).decode("utf-8"))
+
+
+def send_video_request(sock, video_path, segments, top_k=None, chunk_size=VIDEO_CHUNK_SIZE):
+    """
+    Sends a v2 request, streaming the video file in chunk_size pieces through one reused
+    buffer, so the video is never held in memory as a whole.
+    """
+    header = {
+        "filename": video_path.replace("\\", "/").rsplit("/", 1)[-1],
+        "tuples": [list(segment) for segment in segments],
+        "top_k": top_k,
+    }
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(video_path, "rb") as video_file:
+        video_file.seek(0, 2)
+        header["video_size"] = video_file.tell()
+        video_file.seek(0)
+
+        send_json_frame(sock, REQUEST_HEADER, header)
+        while True:
+            n = video_file.readinto(buffer)
+            if not n:
+                break
+            send_frame(sock, VIDEO_CHUNK, view[:n])
+    send_frame(sock, VIDEO_END)
+
+
+def receive_video_request(sock, video_sink):
+    """
+    Server side of send_video_request: returns the request header and writes the
+    streamed video chunks to video_sink (a writable file object).
+
+    Returns:
+        dict | None: The request header, or None when the client closed the connection
+        between requests.
+    """
+    try:
+        frame_type, payload = recv_frame(sock)
+    except ConnectionError:
+        return None
+    if frame_type != REQUEST_HEADER:
+        raise ProtocolError(f"Expected a request header, got frame type {frame_type}")
+    header = decode_json_payload(payload)
+
+    while True:
+        frame_type, payload = recv_frame(sock)
+        if frame_type == VIDEO_END:
+            return header
+        if frame_type != VIDEO_CHUNK:
+            raise ProtocolError(f"Expected video data, got frame type {frame_type}")
+        video_sink.write(payload)
+
+
+def receive_window_results(sock, num_windows, on_result=None, deadline=None):
+    """
+    Client side: collects the streamed window results of one request until DONE.
+
+    Args:
+        sock (socket.socket): The connection.
+        num_windows (int): Number of windows in the request.
+        on_result (callable, optional): Called as on_result(index, prediction) as each window arrives.
+        deadline (float, optional): time.monotonic() value by which DONE must have arrived.
+
+    Returns:
+        list: One prediction per window (None for windows the server did not classify).
+
+    Raises:
+        socket.timeout: The deadline passed first.
+    """
+    predictions = [None] * num_windows
+    while True:
+        frame_type, payload = recv_frame(sock, deadline)
+        if frame_type == WINDOW_RESULTS:
+            for index, prediction in decode_json_payload(payload)["windows"]:
+                predictions[index] = prediction
+                if on_result is not None:
+                    on_result(index, prediction)
+        elif frame_type == DONE:
+            return predictions
+        elif frame_type == ERROR:
+            raise ProtocolError(decode_json_payload(payload).get("error", "Unknown server error"))
+        else:
+            raise ProtocolError(f"Unexpected frame type {frame_type}")
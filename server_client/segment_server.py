@@ -0,0 +1,227 @@
+import os
+os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
+os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
+
+import uuid
+import queue
+import base64
+import tempfile
+import threading
+import traceback
+import socketserver
+import multiprocessing
+import numpy as np
+
+from utils.test_mediapipe import extract_video_landmark_arrays, MEMORY_TEMP_DIR
+from utils.landmark_extractor import warm_extractor_pool
+from models.local_models.classify_attn import (
+    load_label_mapping, load_cached_model, classify_json_batch, top_k_predictions
+)
+from server_client.protocol import (
+    PROTOCOL_MAGIC, LENGTH_HEADER, WINDOW_RESULTS, DONE, ERROR, ProtocolError,
+    recv_exact, recv_legacy_message, send_legacy_message, send_json_frame, receive_video_request
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, "../models/model-5_14000_vpw.keras")
+ENCODER_PATH = os.path.join(BASE_DIR, "../models/label_encoder_model-5_14000_vpw.pkl")
+
+SEGMENT_SERVER_HOST = os.getenv("SEGMENT_SERVER_HOST", "0.0.0.0")
+SEGMENT_SERVER_PORT = int(os.getenv("SEGMENT_SERVER_PORT", "5002"))
+# Worker processes, each with its own warm model and MediaPipe graphs; videos beyond this wait in the pool queue
+SEGMENT_SERVER_WORKERS = int(os.getenv("SEGMENT_SERVER_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Windows classified (and streamed back to v2 clients) per model call
+STREAM_BATCH_WINDOWS = int(os.getenv("STREAM_BATCH_WINDOWS", "16"))
+# Longest time a request waits for its next batch of windows before it is failed
+TASK_TIMEOUT_SEC = 300
+
+# Per-worker state, set up once by init_worker
+WORKER_LABELS = None
+WORKER_RESULTS = None
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1) Worker processes
+# ────────────────────────────────────────────────────────────────────────────────
+def init_worker(result_queue):
+    """
+    Loads the label mapping and the model, runs one dummy prediction and builds the
+    worker's MediaPipe graphs, so the first request is not cold.
+    """
+    global WORKER_LABELS, WORKER_RESULTS
+    WORKER_RESULTS = result_queue
+    WORKER_LABELS = load_label_mapping(ENCODER_PATH)
+    model = load_cached_model(MODEL_PATH)
+    model.predict_on_batch(np.zeros((1, *model.input_shape[1:]), dtype=np.float32))
+    # One video at a time per worker process, so one extractor is enough
+    warm_extractor_pool(1)
+    print(f"🔥 Worker {os.getpid()} ready")
+
+
+def classify_video_task(request_id, video_path, segments, top_k=None):
+    """
+    Extracts the landmarks of the video span covered by the segments once and classifies
+    its windows in STREAM_BATCH_WINDOWS batches, earliest-ending first. Every batch is put on the result queue as soon as it is
+    done, followed by a final (request_id, None) marker (or an error dict).
+    """
+    try:
+        if not segments:
+            return
+        # A shard (see client.predict_segments_sharded) only covers part of the video; decode just that span
+        span_start = min(start_sec for start_sec, _ in segments)
+        span_end = max(end_sec for _, end_sec in segments)
+        frames_data, _, fps = extract_video_landmark_arrays(video_path, span_start, span_end)
+        first_frame = int(span_start * fps)
+
+        windows = []
+        for i, (start_sec, end_sec) in enumerate(segments):
+            segment_frames = frames_data[int(start_sec * fps) - first_frame:int(end_sec * fps) - first_frame]
+            if len(segment_frames):
+                windows.append((end_sec, i, segment_frames))
+        windows.sort(key=lambda window: window[:2])
+
+        for batch_start in range(0, len(windows), STREAM_BATCH_WINDOWS):
+            batch = windows[batch_start:batch_start + STREAM_BATCH_WINDOWS]
+            labels, probabilities = classify_json_batch(
+                MODEL_PATH, [frames for _, _, frames in batch], WORKER_LABELS, source_fps=fps
+            )
+            predictions = top_k_predictions(probabilities, WORKER_LABELS, top_k) if top_k else labels
+            WORKER_RESULTS.put((request_id, [[i, prediction] for (_, i, _), prediction in zip(batch, predictions)]))
+    except Exception as e:
+        traceback.print_exc()
+        WORKER_RESULTS.put((request_id, {"error": str(e)}))
+    finally:
+        WORKER_RESULTS.put((request_id, None))
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2) Pool front-end used by the connection threads
+# ────────────────────────────────────────────────────────────────────────────────
+class SegmentPredictionService:
+    """
+    Runs classify_video_task on a process pool and routes the streamed window batches
+    back to the connection thread that asked for them.
+    """
+    def __init__(self, workers=SEGMENT_SERVER_WORKERS):
+        # TensorFlow is not fork-safe, so workers are spawned
+        context = multiprocessing.get_context("spawn")
+        self.results = context.Queue()
+        self.pool = context.Pool(workers, initializer=init_worker, initargs=(self.results,))
+        self.pending = {}
+        self.lock = threading.Lock()
+        threading.Thread(target=self._dispatch, name="segment-results", daemon=True).start()
+
+    def _dispatch(self):
+        while True:
+            request_id, message = self.results.get()
+            with self.lock:
+                request_queue = self.pending.get(request_id)
+            if request_queue is not None:
+                request_queue.put(message)
+
+    def predict(self, video_path, segments, top_k=None):
+        """
+        Yields lists of [window_index, prediction] as the worker finishes them.
+
+        Raises:
+            RuntimeError: When the worker failed or stopped answering.
+        """
+        request_id = uuid.uuid4().hex
+        request_queue = queue.Queue()
+        with self.lock:
+            self.pending[request_id] = request_queue
+        try:
+            self.pool.apply_async(classify_video_task, (request_id, video_path, segments, top_k))
+            while True:
+                try:
+                    message = request_queue.get(timeout=TASK_TIMEOUT_SEC)
+                except queue.Empty:
+                    raise RuntimeError(f"No result from the worker pool in {TASK_TIMEOUT_SEC} seconds")
+                if message is None:
+                    return
+                if isinstance(message, dict):
+                    raise RuntimeError(message["error"])
+                yield message
+        finally:
+            with self.lock:
+                self.pending.pop(request_id, None)
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 3) TCP server: legacy length-prefixed JSON and v2 binary framing on the same port
+# ────────────────────────────────────────────────────────────────────────────────
+class SegmentRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        try:
+            first_bytes = recv_exact(sock, LENGTH_HEADER.size)
+            if bytes(first_bytes) == PROTOCOL_MAGIC:
+                self.handle_binary(sock)
+            else:
+                self.handle_legacy(sock, LENGTH_HEADER.unpack(first_bytes)[0])
+        except (ConnectionError, ProtocolError) as e:
+            print(f"⚠️ {self.client_address}: {e}")
+
+    def handle_legacy(self, sock, length):
+        """One base64 JSON request ({"filename", "content", "tuples", "top_k"}), one JSON response."""
+        payload = recv_legacy_message(sock, length)
+        segments = payload["tuples"]
+        predictions = [None] * len(segments)
+
+        try:
+            with tempfile.NamedTemporaryFile(suffix=".mp4", dir=MEMORY_TEMP_DIR) as video_file:
+                video_file.write(base64.b64decode(payload["content"]))
+                video_file.flush()
+                for windows in self.server.service.predict(video_file.name, segments, payload.get("top_k")):
+                    for index, prediction in windows:
+                        predictions[index] = prediction
+            response = {"predictions": predictions}
+        except Exception as e:
+            traceback.print_exc()
+            response = {"predictions": predictions, "error": str(e)}
+
+        print(f"🎬 {payload.get('filename')} → {len(segments)} segments")
+        send_legacy_message(sock, response)
+
+    def handle_binary(self, sock):
+        """v2: any number of streamed requests on one connection, results streamed back per batch."""
+        while True:
+            with tempfile.NamedTemporaryFile(suffix=".mp4", dir=MEMORY_TEMP_DIR) as video_file:
+                header = receive_video_request(sock, video_file)
+                if header is None:
+                    return
+                video_file.flush()
+
+                try:
+                    for windows in self.server.service.predict(video_file.name, header["tuples"], header.get("top_k")):
+                        send_json_frame(sock, WINDOW_RESULTS, {"windows": windows})
+                    send_json_frame(sock, DONE, {"count": len(header["tuples"])})
+                except Exception as e:
+                    traceback.print_exc()
+                    send_json_frame(sock, ERROR, {"error": str(e)})
+
+            print(f"🎬 {header.get('filename')} → {len(header['tuples'])} segments")
+
+
+class SegmentServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, SegmentRequestHandler)
+        self.service = service
+
+
+def serve(host=SEGMENT_SERVER_HOST, port=SEGMENT_SERVER_PORT, workers=SEGMENT_SERVER_WORKERS):
+    service = SegmentPredictionService(workers)
+    with SegmentServer((host, port), service) as server:
+        print(f"✅ Segment server listening on {host}:{port} with {workers} workers")
+        try:
+            server.serve_forever()
+        finally:
+            service.close()
+
+
+if __name__ == "__main__":
+    serve()
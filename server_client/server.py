@@ -42,9 +42,7 @@
 #     app.run(host='0.0.0.0', port=6000, threaded=True)
 
 
-import json
 import tempfile
-import shutil
 import base64
 import traceback
 import pickle
@@ -55,8 +53,9 @@ os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
 from flask import Flask, request, jsonify
 import cv2
 
-from utils.test_mediapipe import extract_motion_data, motion_data_to_json
-from models.local_models.classify_attn import classify_json_file
+from utils.test_mediapipe import extract_landmark_arrays_from_bytes, slice_motion_data
+from models.local_models.classify_attn import classify_json_batch, top_k_predictions, VARIABLE_LENGTH_INFERENCE
+from models.local_models.inference_executor import get_inference_executor, INFERENCE_EXECUTORS
 
 app = Flask(__name__)
 
@@ -65,6 +64,8 @@ app = Flask(__name__)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "../models/model-5_14000_vpw.keras")
 ENCODER_PATH = os.path.join(BASE_DIR, "../models/label_encoder_model-5_14000_vpw.pkl")
+# Label mapping, read once instead of unpickling the encoder on every request
+LABEL_MAPPING = None
 
 
 # @app.route('/predict', methods=['POST'])
@@ -113,42 +114,68 @@ def predict():
     try:
         data = request.get_json()
         filename = data.get("filename", "video.mp4")
-        file_base = os.path.splitext(filename)[0]
         video_b64 = data["content"]
-        seg = data["tuple"]  # should be [start, end] pair
+        # Optional: return the top_k [label, probability] pairs per segment instead of a bare label
+        top_k = data.get("top_k")
 
-        print(f"🛠️ Segment: {seg}")
+        # Step 1: Decode the base64 video once; it stays in memory (tmpfs) for the whole request
+        video_bytes = base64.b64decode(video_b64.encode("utf-8"))
+        suffix = os.path.splitext(filename)[1] or ".mp4"
 
-        # Step 1: Save base64 video to temp dir
-        temp_dir = tempfile.mkdtemp()
-        video_path = os.path.join(temp_dir, filename)
-        with open(video_path, "wb") as f:
-            f.write(base64.b64decode(video_b64.encode("utf-8")))
+        # A list of segments ("tuples") is classified from one landmark extraction
+        if "tuples" in data:
+            predictions = predict_segments_from_landmarks(video_bytes, data["tuples"], top_k, suffix)
+            print(f"🎬 {filename} → {len(predictions)} segments")
+            return jsonify({"predictions": predictions})
 
-        # Step 2: Cut segment from video and extract motion
-        segment_path, _, _ = cut_segments(video_path, seg[0], seg[1])
-        trim_data = extract_motion_data(os.path.splitext(os.path.basename(segment_path))[0], folder_name=os.path.dirname(segment_path))
-        motion_data_to_json(trim_data, os.path.splitext(os.path.basename(segment_path))[0], folder_name=os.path.dirname(segment_path))
+        seg = data["tuple"]  # should be [start, end] pair
+        print(f"🛠️ Segment: {seg}")
 
-        json_path = os.path.join(os.path.dirname(segment_path), f"{os.path.splitext(os.path.basename(segment_path))[0]}.json")
-        with open(json_path, "r", encoding="utf-8") as jf:
-            motion_json = json.load(jf)
+        # Step 2: Extract motion of the segment's frames only — no cut, re-encode or JSON round-trip
+        motion_json, _, _ = extract_landmark_arrays_from_bytes(video_bytes, suffix, seg[0], seg[1])
 
-        # Step 3: Run classification
-        labels = load_label_mapping(ENCODER_PATH)
-        prediction = classify_json_file(MODEL_PATH, motion_json, labels)
+        # Step 3: Run classification (batched with the other in-flight requests)
+        labels = get_label_mapping()
+        window_labels, window_probabilities = classify_json_batch(
+            MODEL_PATH, [motion_json], labels, variable_length=False, executor=get_inference_executor(MODEL_PATH)
+        )
+        prediction = top_k_predictions(window_probabilities[0], labels, top_k) if top_k else window_labels[0]
 
         print(f"🎬 {filename} → {prediction}")
 
+        if top_k:
+            return jsonify({"prediction": prediction})
         return prediction
 
     except Exception as e:
         print("❌ Exception during prediction:")
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
-    finally:
-        if 'temp_dir' in locals() and os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
+
+
+def predict_segments_from_landmarks(video_bytes, segments, top_k=None, suffix=".mp4"):
+    """Extract landmarks of the whole video once and classify each [start, end] segment from a slice."""
+    frames_data, _, fps = extract_landmark_arrays_from_bytes(video_bytes, suffix)
+    labels = get_label_mapping()
+
+    predictions = [None] * len(segments)
+    window_indices, window_frames = [], []
+    for i, (start_sec, end_sec) in enumerate(segments):
+        segment_frames = slice_motion_data(frames_data, fps, start_sec, end_sec)
+        if len(segment_frames):
+            window_indices.append(i)
+            window_frames.append(segment_frames)
+
+    # One batched forward pass for all segments, shared with concurrent requests by the executor
+    executor = get_inference_executor(MODEL_PATH, VARIABLE_LENGTH_INFERENCE)
+    window_labels, window_probabilities = classify_json_batch(MODEL_PATH, window_frames, labels,
+                                                              source_fps=fps, executor=executor)
+    if top_k:
+        window_labels = top_k_predictions(window_probabilities, labels, top_k) if window_indices else []
+    for i, label in zip(window_indices, window_labels):
+        predictions[i] = label
+
+    return predictions
 
 
 def cut_segments(video_path,start_sec,end_sec):
@@ -183,11 +210,27 @@ def cut_segments(video_path,start_sec,end_sec):
 
 
 
+@app.route('/executor_stats', methods=['GET'])
+def executor_stats():
+    """Requests, batches and mean windows per forward pass of the micro-batching executor."""
+    return jsonify({
+        ("variable_length" if variable_length else "fixed_length"): executor.stats()
+        for (_, variable_length), executor in INFERENCE_EXECUTORS.items()
+    })
+
+
 def load_label_mapping(file_path):
     with open(file_path, 'rb') as f:
         le = pickle.load(f)
     print(f"Label encoder loaded from {file_path}")
     return list(le.classes_)
 
+
+def get_label_mapping():
+    global LABEL_MAPPING
+    if LABEL_MAPPING is None:
+        LABEL_MAPPING = load_label_mapping(ENCODER_PATH)
+    return LABEL_MAPPING
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=6000, threaded=True)
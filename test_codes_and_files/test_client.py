@@ -0,0 +1,152 @@
+import io
+import socket
+import threading
+import time
+import pytest
+from server_client import client
+from server_client.client import SegmentServerConnection, PredictionServerPool, predict_segments_sharded
+from server_client.protocol import receive_video_request, send_json_frame, WINDOW_RESULTS, DONE
+
+SERVERS = [("server-a", 5002), ("server-b", 5002)]
+# Deliberately not in time order; predictions must still come back in this order
+SEGMENTS = [(0.3, 1.3), (0.0, 1.0), (0.45, 1.45), (0.15, 1.15)]
+
+
+def label(segment):
+    return f"sign@{segment[0]}"
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"video bytes" * 100)
+    return str(path)
+
+
+class FakeServers:
+    """Stands in for predict_on_server; fail[server] is how many requests that server fails."""
+    def __init__(self, fail=None, delivered_before_failure=0):
+        self.fail = dict(fail or {})
+        self.delivered_before_failure = delivered_before_failure
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, server, video_path, segments, top_k=None, on_result=None, timeout=None):
+        with self.lock:
+            self.requests.append((server, list(segments)))
+            failing = self.fail.get(server, 0) > 0
+            if failing:
+                self.fail[server] -= 1
+        if failing:
+            for j in range(self.delivered_before_failure):
+                on_result(j, label(segments[j]))
+            raise ConnectionError(f"{server[0]} went away")
+        predictions = [label(segment) for segment in segments]
+        for j, prediction in enumerate(predictions):
+            if on_result:
+                on_result(j, prediction)
+        return predictions
+
+
+def test_sharded_predictions_come_back_in_window_order(video, monkeypatch):
+    servers = FakeServers()
+    monkeypatch.setattr(client, "predict_on_server", servers)
+
+    predictions = predict_segments_sharded(video, SEGMENTS, server_pool=PredictionServerPool(SERVERS))
+
+    assert predictions == [label(segment) for segment in SEGMENTS]
+    # One contiguous (in time) shard per server
+    assert sorted(segments for _, segments in servers.requests) == [[(0.0, 1.0), (0.15, 1.15)], [(0.3, 1.3), (0.45, 1.45)]]
+
+
+def test_a_failed_shard_is_retried_on_another_server(video, monkeypatch):
+    servers = FakeServers(fail={SERVERS[0]: 1})
+    monkeypatch.setattr(client, "predict_on_server", servers)
+    pool = PredictionServerPool(SERVERS)
+
+    predictions = predict_segments_sharded(video, SEGMENTS, server_pool=pool)
+
+    assert predictions == [label(segment) for segment in SEGMENTS]
+    assert [server for server, _ in servers.requests].count(SERVERS[1]) == 2
+    assert pool.failed_until[SERVERS[0]] > time.time() and pool.failed_until[SERVERS[1]] == 0
+    assert pool.in_flight == {server: 0 for server in SERVERS}
+
+
+def test_windows_stay_none_when_every_attempt_fails(video, monkeypatch):
+    servers = FakeServers(fail={server: 10 for server in SERVERS})
+    monkeypatch.setattr(client, "predict_on_server", servers)
+
+    predictions = predict_segments_sharded(video, SEGMENTS, server_pool=PredictionServerPool(SERVERS))
+
+    assert predictions == [None] * len(SEGMENTS)
+    assert len(servers.requests) == 2 * client.MAX_SHARD_ATTEMPTS
+
+
+def test_a_retried_shard_only_asks_for_the_windows_that_did_not_arrive(video, monkeypatch):
+    servers = FakeServers(fail={SERVERS[0]: 1}, delivered_before_failure=1)
+    monkeypatch.setattr(client, "predict_on_server", servers)
+    streamed = []
+
+    predictions = predict_segments_sharded(video, SEGMENTS, on_result=lambda i, p: streamed.append(i),
+                                           server_pool=PredictionServerPool(SERVERS))
+
+    assert predictions == [label(segment) for segment in SEGMENTS]
+    assert sorted(streamed) == [0, 1, 2, 3]
+    assert sum(len(segments) for _, segments in servers.requests) == len(SEGMENTS) + 1
+
+
+def serve_one_request(sock, windows, close_after=False):
+    """Fake segment server: reads one v2 request, streams `windows`, then DONE (or hangs up)."""
+    receive_video_request(sock, io.BytesIO())
+    for index, prediction in windows:
+        send_json_frame(sock, WINDOW_RESULTS, {"windows": [[index, prediction]]})
+    if close_after:
+        sock.close()
+    else:
+        send_json_frame(sock, DONE, {"count": len(windows)})
+
+
+def stale_connection(windows=(), close_immediately=False):
+    """A kept-alive connection whose server side goes away, after answering `windows` of the next request."""
+    client_sock, server_sock = socket.socketpair()
+    if close_immediately:
+        server_sock.close()
+        return client_sock, None
+    thread = threading.Thread(target=serve_one_request, args=(server_sock, list(windows), True), daemon=True)
+    thread.start()
+    return client_sock, thread
+
+
+def test_stale_connection_is_retried_when_nothing_was_delivered(video, monkeypatch):
+    connection = SegmentServerConnection(timeout=5)
+    connection.sock, _ = stale_connection(close_immediately=True)
+    threads = []
+
+    def connect():
+        connection.sock, server_sock = socket.socketpair()
+        threads.append(threading.Thread(target=serve_one_request, args=(server_sock, [(0, "hello"), (1, "world")])))
+        threads[-1].start()
+
+    monkeypatch.setattr(connection, "connect", connect)
+    streamed = []
+
+    predictions = connection.predict(video, SEGMENTS[:2], on_result=lambda i, p: streamed.append(i))
+
+    threads[0].join()
+    assert predictions == ["hello", "world"]
+    assert streamed == [0, 1]
+    connection.close()
+
+
+def test_stale_connection_is_not_retried_after_windows_were_delivered(video, monkeypatch):
+    connection = SegmentServerConnection(timeout=5)
+    connection.sock, server_thread = stale_connection(windows=[(0, "hello")])
+    monkeypatch.setattr(connection, "connect", lambda: pytest.fail("reconnected after windows were delivered"))
+    streamed = []
+
+    with pytest.raises(ConnectionError):
+        connection.predict(video, SEGMENTS[:2], on_result=lambda i, p: streamed.append((i, p)))
+
+    server_thread.join()
+    assert streamed == [(0, "hello")]
+    assert connection.sock is None
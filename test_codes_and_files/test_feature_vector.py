@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from utils.benchmark_feature_vector import make_synthetic_sequences
+from utils.conver_json_to_vector import (
+    create_feature_vector, create_feature_vectors, create_feature_vector_legacy, resample_frames, bucket_length,
+    MAX_FRAMES
+)
+from utils.landmark_arrays import frames_to_arrays
+
+
+@pytest.mark.parametrize("num_frames, factor", [(120, 1), (MAX_FRAMES, 1), (200, 1), (101, 2), (120, 3)])
+def test_vectorized_feature_vector_matches_the_legacy_loop(num_frames, factor):
+    sequence = make_synthetic_sequences(num_sequences=1, num_frames=num_frames)[0]
+
+    np.testing.assert_allclose(create_feature_vector(sequence, factor=factor),
+                               create_feature_vector_legacy(sequence, factor=factor), atol=1e-6)
+
+
+def test_batch_and_landmark_array_inputs_match_single_sequences():
+    sequences = make_synthetic_sequences(num_sequences=4, num_frames=90)
+    expected = np.asarray([create_feature_vector(sequence, factor=2) for sequence in sequences])
+    landmark_arrays = [frames_to_arrays(sequence)[0] for sequence in sequences]
+
+    np.testing.assert_allclose(create_feature_vectors(sequences, factor=2), expected, atol=1e-6)
+    np.testing.assert_allclose(create_feature_vectors(landmark_arrays, factor=2), expected, atol=1e-6)
+    np.testing.assert_allclose(create_feature_vector(landmark_arrays[0], factor=2), expected[0], atol=1e-6)
+
+
+def test_frames_without_pose_raise_like_the_legacy_loop_unless_filled():
+    sequence = make_synthetic_sequences(num_sequences=1, num_frames=3)[0]
+    expected = create_feature_vector(sequence)
+    sequence[1] = {"pose": [], "hands": sequence[1]["hands"]}
+
+    with pytest.raises(ValueError):
+        create_feature_vector_legacy(sequence)
+    with pytest.raises(ValueError):
+        create_feature_vector(sequence)
+    with pytest.raises(ValueError):
+        create_feature_vectors([sequence])
+    features = create_feature_vector(sequence, fill_missing_pose=True)
+
+    assert not features[1, :33].any()
+    np.testing.assert_allclose(features[1, 33:], expected[1, 33:])
+    np.testing.assert_allclose(features[[0, 2]], expected[[0, 2]])
+    np.testing.assert_allclose(create_feature_vectors([sequence], fill_missing_pose=True)[0], features)
+
+
+def test_resampling_to_canonical_fps_keeps_the_duration():
+    frames = np.arange(60)
+
+    assert len(resample_frames(frames, 60)) == 30
+    assert resample_frames(frames, 60)[:3].tolist() == [0, 2, 4]
+    assert len(resample_frames(frames[:25], 25)) == 30
+    assert resample_frames(frames, 30) is frames
+
+
+def test_length_buckets_pad_to_the_smallest_fitting_bucket():
+    sequence = make_synthetic_sequences(num_sequences=1, num_frames=40)[0]
+
+    assert bucket_length(30) == 30 and bucket_length(31) == 45 and bucket_length(500) == MAX_FRAMES
+    assert create_feature_vector(sequence, length_buckets=(30, 45, 60)).shape == (45, 75, 3)
+    np.testing.assert_allclose(create_feature_vector(sequence, length_buckets=(30, 45, 60)),
+                               create_feature_vector(sequence)[:45], atol=1e-6)
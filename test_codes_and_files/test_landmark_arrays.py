@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from utils.benchmark_feature_vector import make_synthetic_sequences
+from utils.conver_json_to_vector import create_feature_vector, LENGTH_BUCKETS
+from utils.landmark_arrays import frames_to_arrays, frames_to_points, arrays_to_frames, hand_slice
+
+
+def sequence_with_gaps(num_frames=60):
+    """Synthetic motion data with frames that lack the pose, one hand or both hands."""
+    sequence = make_synthetic_sequences(num_sequences=1, num_frames=num_frames, seed=1)[0]
+    sequence[3]["pose"] = []
+    sequence[5]["hands"] = []
+    sequence[7]["hands"] = [[{"x": 0.01 * i, "y": 0.5, "z": -0.1} for i in range(21)]]
+    return sequence
+
+
+def assert_frames_close(actual, expected):
+    assert len(actual) == len(expected)
+    for actual_frame, expected_frame in zip(actual, expected):
+        assert len(actual_frame["pose"]) == len(expected_frame["pose"])
+        assert [len(hand) for hand in actual_frame["hands"]] == [len(hand) for hand in expected_frame["hands"]]
+        for actual_points, expected_points in zip([actual_frame["pose"]] + actual_frame["hands"],
+                                                  [expected_frame["pose"]] + expected_frame["hands"]):
+            for actual_lm, expected_lm in zip(actual_points, expected_points):
+                assert actual_lm.keys() == expected_lm.keys()
+                for key in actual_lm:
+                    assert actual_lm[key] == pytest.approx(expected_lm[key], abs=1e-6)
+
+
+def test_frames_round_trip_through_arrays():
+    sequence = sequence_with_gaps()
+
+    landmarks, present = frames_to_arrays(sequence)
+
+    assert landmarks.shape == (60, 75, 4) and landmarks.dtype == np.float32
+    assert not present[3, :33].any() and not present[5, 33:].any()
+    assert present[7, hand_slice(0)].all() and not present[7, hand_slice(1)].any()
+    assert_frames_close(arrays_to_frames(landmarks, present), sequence)
+
+
+def test_arrays_round_trip_through_frames_exactly():
+    landmarks, present = frames_to_arrays(sequence_with_gaps())
+
+    round_tripped_landmarks, round_tripped_present = frames_to_arrays(arrays_to_frames(landmarks, present))
+
+    np.testing.assert_array_equal(round_tripped_landmarks, landmarks)
+    np.testing.assert_array_equal(round_tripped_present, present)
+
+
+def test_missing_landmarks_are_zeros_like_the_feature_placeholders():
+    sequence = sequence_with_gaps()
+    landmarks, present = frames_to_arrays(sequence)
+
+    assert not landmarks[~present].any()
+    np.testing.assert_array_equal(frames_to_points(sequence), landmarks[:, :, :3])
+
+
+@pytest.mark.parametrize("num_frames, factor, source_fps, length_buckets", [
+    (60, 1, None, None), (200, 1, None, None), (101, 2, None, None), (120, 3, None, None),
+    (50, 1, 25, None), (90, 1, 60, None), (40, 1, None, LENGTH_BUCKETS), (100, 2, 60, LENGTH_BUCKETS),
+])
+def test_feature_vector_of_arrays_matches_json(num_frames, factor, source_fps, length_buckets):
+    sequence = sequence_with_gaps(num_frames)
+    landmarks, _ = frames_to_arrays(sequence)
+    kwargs = dict(factor=factor, source_fps=source_fps, length_buckets=length_buckets)
+
+    np.testing.assert_allclose(create_feature_vector(landmarks, **kwargs),
+                               create_feature_vector(sequence, fill_missing_pose=True, **kwargs), atol=1e-6)
@@ -0,0 +1,120 @@
+import os
+import numpy as np
+import pytest
+from utils import landmark_cache
+from utils.landmark_cache import LandmarkCache, hash_video_file, cached_landmark_arrays
+
+CONFIG = {"model_complexity": 1}
+
+
+def landmark_arrays(num_frames, value=0.5):
+    return np.full((num_frames, 75, 4), value, dtype=np.float32), np.ones((num_frames, 75), dtype=bool), 30.0
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"not really a video")
+    return str(path)
+
+
+def test_get_or_extract_extracts_once_and_round_trips_the_arrays(tmp_path, video):
+    cache = LandmarkCache(str(tmp_path / "cache"))
+    calls = []
+
+    def extract():
+        calls.append(1)
+        return landmark_arrays(10)
+
+    first = cache.get_or_extract(video, CONFIG, extract)
+    landmarks, present, fps = cache.get_or_extract(video, CONFIG, extract)
+
+    assert len(calls) == 1
+    np.testing.assert_array_equal(landmarks, first[0])
+    np.testing.assert_array_equal(present, first[1])
+    assert landmarks.dtype == np.float32 and present.dtype == bool and fps == 30.0
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_key_depends_on_content_config_and_window(tmp_path, video):
+    copy = tmp_path / "renamed.mp4"
+    copy.write_bytes(open(video, "rb").read())
+    video_hash = hash_video_file(video)
+    key = LandmarkCache.make_key(video_hash, CONFIG)
+
+    assert hash_video_file(str(copy)) == video_hash
+    assert key != LandmarkCache.make_key(video_hash, {"model_complexity": 2})
+    assert key != LandmarkCache.make_key(video_hash, CONFIG, 0.0, 1.0)
+
+
+def test_least_recently_used_entries_are_evicted_beyond_max_bytes(tmp_path):
+    cache = LandmarkCache(str(tmp_path / "cache"), max_bytes=10 ** 9)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, *landmark_arrays(50))
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    entry_size = os.path.getsize(cache._path("a"))
+
+    # Reading "a" marks it as recently used, so "b" is the oldest
+    assert cache.get("a") is not None
+    cache.max_bytes = 2 * entry_size
+    cache.evict()
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size_bytes"] <= cache.max_bytes
+
+
+def test_put_writes_atomically_and_leaves_no_temporary_files(tmp_path, monkeypatch):
+    cache = LandmarkCache(str(tmp_path / "cache"))
+    cache.put("key", *landmark_arrays(5, value=1.0))
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(landmark_cache.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        cache.put("key", *landmark_arrays(5, value=2.0))
+
+    # The old entry is untouched and the half-written file is gone
+    assert cache.get("key")[0].max() == 1.0
+    assert os.listdir(cache.cache_dir) == ["key.npz"]
+
+
+def test_corrupt_entries_count_as_misses(tmp_path):
+    cache = LandmarkCache(str(tmp_path / "cache"))
+    with open(cache._path("key"), "wb") as f:
+        f.write(b"garbage")
+
+    assert cache.get("key") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_cached_landmark_arrays_is_a_plain_call_when_disabled(video, monkeypatch):
+    monkeypatch.setattr(landmark_cache, "LANDMARK_CACHE_ENABLED", False)
+    calls = []
+
+    cached_landmark_arrays(video, CONFIG, lambda: calls.append(1) or landmark_arrays(3))
+    cached_landmark_arrays(video, CONFIG, lambda: calls.append(1) or landmark_arrays(3))
+
+    assert len(calls) == 2
+
+
+def test_extract_motion_data_reads_through_the_cache_when_enabled(tmp_path, monkeypatch):
+    pytest.importorskip("mediapipe")
+    from utils import test_mediapipe
+    from utils.landmark_arrays import arrays_to_frames
+
+    monkeypatch.setattr(landmark_cache, "LANDMARK_CACHE_ENABLED", True)
+    monkeypatch.setattr(landmark_cache, "LANDMARK_CACHE", LandmarkCache(str(tmp_path / "cache")))
+    calls = []
+
+    def extract_video_landmark_arrays(video_path):
+        calls.append(video_path)
+        return landmark_arrays(4)
+
+    monkeypatch.setattr(test_mediapipe, "extract_video_landmark_arrays", extract_video_landmark_arrays)
+
+    frames_data = test_mediapipe.extract_motion_data("clip", folder_name=str(tmp_path))
+
+    assert calls == [str(tmp_path) + "/clip.mp4"]
+    assert frames_data == arrays_to_frames(*landmark_arrays(4)[:2])
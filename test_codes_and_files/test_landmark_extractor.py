@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")
+
+from utils.landmark_extractor import LandmarkExtractor
+
+
+def fake_results():
+    def landmarks(count):
+        return SimpleNamespace(landmark=[SimpleNamespace(x=0.5, y=0.5, z=0.0, visibility=1.0) for _ in range(count)])
+    return SimpleNamespace(pose_landmarks=landmarks(33)), SimpleNamespace(multi_hand_landmarks=[landmarks(21)])
+
+
+def test_static_frames_get_their_own_copy_of_the_previous_landmarks(monkeypatch):
+    extractor = LandmarkExtractor(skip_static_frames=True, hand_roi=False, signer_crop=False)
+    monkeypatch.setattr(extractor, "detect", lambda frame: fake_results())
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+
+    try:
+        first = extractor.process_frame(frame)
+        skipped = extractor.process_frame(frame)
+    finally:
+        extractor.close()
+
+    assert extractor.frames_skipped == 1
+    assert skipped == first
+    skipped["pose"][0]["x"] = 0.9
+    skipped["hands"][0].pop()
+    assert first["pose"][0]["x"] == 0.5 and len(first["hands"][0]) == 21
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import pytest
+from utils import llm_cache
+from utils.llm_cache import LLMCache, cached_llm_call, cached_llm_call_async
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+def test_make_key_ignores_whitespace_but_not_template_version():
+    key = LLMCache.make_key("v1", "hello   world\n", "I need")
+
+    assert key == LLMCache.make_key("v1", "hello world", "  I need ")
+    assert key != LLMCache.make_key("v2", "hello world", "I need")
+
+
+def test_get_or_compute_calls_compute_only_on_a_miss(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "answer"
+
+    assert cache.get_or_compute("v1", ["prompt"], compute) == "answer"
+    assert cache.get_or_compute("v1", ["prompt"], compute) == "answer"
+    assert len(calls) == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_empty_responses_are_not_cached(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+
+    assert cache.get_or_compute("v1", ["prompt"], lambda: None) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"), ttl_sec=60)
+    cache.put("key", "value")
+
+    clock.now += 59
+    assert cache.get("key") == "value"
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put("a", "1")
+    clock.now += 1
+    cache.put("b", "2")
+    clock.now += 1
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") == "1"
+    clock.now += 1
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_entries_persist_across_instances(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    LLMCache(path).put("key", "value")
+
+    assert LLMCache(path).get("key") == "value"
+
+
+def test_cached_calls_use_the_shared_cache(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE", LLMCache(str(tmp_path / "cache.sqlite3")))
+    calls = []
+
+    async def compute_async():
+        calls.append("async")
+        return "answer"
+
+    assert cached_llm_call("v1", ["prompt"], lambda: calls.append("sync") or "answer") == "answer"
+    assert asyncio.run(cached_llm_call_async("v1", ["prompt"], compute_async)) == "answer"
+    assert calls == ["sync"]
+
+
+def test_cached_calls_compute_directly_when_disabled(monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", False)
+    calls = []
+
+    cached_llm_call("v1", ["prompt"], lambda: calls.append(1) or "answer")
+    cached_llm_call("v1", ["prompt"], lambda: calls.append(1) or "answer")
+    assert len(calls) == 2
+
+
+def test_async_calls_keep_sqlite_off_the_event_loop_thread(tmp_path, clock, monkeypatch):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE", cache)
+    cache_threads = []
+    for name in ("get", "put"):
+        method = getattr(cache, name)
+        monkeypatch.setattr(cache, name, lambda *args, method=method: cache_threads.append(threading.get_ident()) or method(*args))
+
+    async def call_twice():
+        async def compute():
+            return "answer"
+        first = await cached_llm_call_async("v1", ["prompt"], compute)
+        second = await cached_llm_call_async("v1", ["prompt"], compute)
+        return first, second, threading.get_ident()
+
+    first, second, loop_thread = asyncio.run(call_twice())
+
+    assert first == second == "answer"
+    assert len(cache_threads) == 3 and loop_thread not in cache_threads
@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+from utils.trim_sign_language_dead_time import (
+    compute_motion_energy, detect_active_frames, detect_sign_intervals, detect_motion_and_trim
+)
+
+FPS = 30
+# The 6 s two-sign clip: rest, a 1.3 s sign, rest, a 1.7 s sign, rest
+TWO_SIGNS = [(1.0, 2.3), (3.3, 5.0)]
+
+
+def make_clip(duration_sec, moving_intervals, fps=FPS, amplitude=0.05, hz=2.0):
+    """Still signer whose body and hands sway sideways during the given (start_sec, end_sec) intervals."""
+    frames_data = []
+    for t in range(int(round(duration_sec * fps))):
+        seconds = t / fps
+        moving = any(start <= seconds < end for start, end in moving_intervals)
+        dx = amplitude * np.sin(2 * np.pi * hz * seconds) if moving else 0.0
+        pose = [{"x": 0.5 + 0.01 * i + dx, "y": 0.3 + 0.01 * i, "z": 0.0, "visibility": 1.0} for i in range(33)]
+        hands = [[{"x": 0.3 + 0.4 * h + 0.005 * i + dx, "y": 0.6 + 0.005 * i, "z": 0.0} for i in range(21)]
+                 for h in range(2)]
+        frames_data.append({"pose": pose, "hands": hands})
+    return frames_data
+
+
+def legacy_detect_motion_and_trim(output_data, motion_threshold=0.2, min_active_frames=5):
+    """The original per-frame loop, kept as the reference for the vectorized version."""
+    frame_motion = []
+    for i in range(1, len(output_data)):
+        prev_frame = output_data[i - 1]['pose']
+        curr_frame = output_data[i]['pose']
+        motion = np.sqrt(sum(
+            (curr['x'] - prev['x']) ** 2 +
+            (curr['y'] - prev['y']) ** 2 +
+            (curr['z'] - prev['z']) ** 2
+            for curr, prev in zip(curr_frame, prev_frame)
+        )) if prev_frame and curr_frame else 0
+        frame_motion.append(motion)
+
+    active_frames = 0
+    start_frame = None
+    for i, motion in enumerate(frame_motion):
+        if motion > motion_threshold:
+            active_frames += 1
+            if active_frames >= min_active_frames:
+                start_frame = i - min_active_frames + 2
+                break
+        else:
+            active_frames = 0
+
+    return output_data[start_frame:] if start_frame is not None else []
+
+
+def test_motion_energy_is_zero_when_still_and_per_second_with_fps():
+    still = compute_motion_energy(make_clip(1, []), FPS)
+    moving = compute_motion_energy(make_clip(1, [(0, 1)]))
+
+    assert still.shape == (FPS,) and not still.any()
+    assert moving[0] == 0 and moving[1:].max() > 0
+    np.testing.assert_allclose(compute_motion_energy(make_clip(1, [(0, 1)]), FPS), moving * FPS, rtol=1e-5)
+
+
+def test_motion_energy_ignores_landmarks_missing_in_either_frame():
+    frames_data = make_clip(1, [(0, 1)])
+    for frame in frames_data[10:20]:
+        frame["hands"] = []
+
+    energy = compute_motion_energy(frames_data, FPS)
+
+    # Only the wrists are left in those frames, and they move like the hands did
+    assert np.all(np.isfinite(energy)) and energy[11:20].min() > 0
+
+
+def test_two_signs_separated_by_rest_give_two_intervals():
+    signs, rests = detect_sign_intervals(make_clip(6, TWO_SIGNS), FPS)
+
+    assert len(signs) == 2
+    for (start, end), (expected_start, expected_end) in zip(signs, TWO_SIGNS):
+        assert start == pytest.approx(expected_start, abs=0.15)
+        assert end == pytest.approx(expected_end, abs=0.15)
+    assert len(rests) == 3 and rests[0][0] == 0.0 and rests[-1][1] == 6.0
+
+
+def test_short_pause_inside_a_sign_is_closed():
+    frames_data = make_clip(4, [(1.0, 1.6), (1.8, 2.5)])
+
+    signs, _ = detect_sign_intervals(frames_data, FPS)
+    split_signs, _ = detect_sign_intervals(frames_data, FPS, min_rest_sec=0.0)
+
+    assert len(signs) == 1
+    assert len(split_signs) == 2
+
+
+def test_short_twitch_is_dropped():
+    frames_data = make_clip(4, [(0.5, 0.6), (2.0, 3.0)])
+
+    signs, _ = detect_sign_intervals(frames_data, FPS)
+
+    assert len(signs) == 1 and signs[0][0] > 1.5
+
+
+def test_still_clip_has_no_active_frames():
+    assert not detect_active_frames(make_clip(3, []), FPS).any()
+    assert detect_sign_intervals(make_clip(3, []), FPS) == ([], [(0.0, 3.0)])
+    assert len(detect_active_frames([], FPS)) == 0
+
+
+@pytest.mark.parametrize("moving_intervals", [[], [(0.0, 3.0)], [(1.0, 2.0)], [(0.5, 0.6), (1.5, 2.5)]])
+def test_detect_motion_and_trim_start_frame_matches_the_legacy_loop(moving_intervals):
+    frames_data = make_clip(3, moving_intervals, amplitude=0.5)
+    frames_data[40]["pose"] = []
+
+    trimmed = detect_motion_and_trim(frames_data)
+
+    assert trimmed == legacy_detect_motion_and_trim(frames_data)
+
+
+def test_detect_motion_and_trim_can_also_trim_the_end():
+    frames_data = make_clip(3, [(1.0, 2.0)], amplitude=0.5)
+
+    trimmed = detect_motion_and_trim(frames_data, trim_end=True)
+
+    assert trimmed[0] is detect_motion_and_trim(frames_data)[0]
+    assert len(trimmed) < len(detect_motion_and_trim(frames_data))
+
+
+def test_windows_only_cover_the_detected_signs():
+    translate_sentence = pytest.importorskip("codes_translation.translate_sentence")
+    frames_data = make_clip(6, TWO_SIGNS)
+
+    full_grid = translate_sentence.create_segments_list(6.0)
+    segments_list = translate_sentence.create_motion_segments_list(frames_data, FPS, 6.0)
+
+    assert len(full_grid) == 68
+    assert len(segments_list) == 23
+    assert all(start < 5.0 and end > 1.0 for start, end in segments_list)
+
+
+def test_still_clip_falls_back_to_the_full_grid():
+    translate_sentence = pytest.importorskip("codes_translation.translate_sentence")
+
+    segments_list = translate_sentence.create_motion_segments_list(make_clip(6, []), FPS, 6.0)
+
+    assert segments_list == translate_sentence.create_segments_list(6.0)
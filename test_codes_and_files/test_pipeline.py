@@ -0,0 +1,63 @@
+import threading
+import time
+import pytest
+from utils.pipeline import Pipeline, Stage
+
+
+def test_single_worker_stages_keep_order_and_fan_out():
+    pipeline = Pipeline([
+        Stage("double", lambda x: x * 2),
+        Stage("split", lambda x: [x, x + 1] if x % 4 == 0 else [], fan_out=True),
+    ])
+
+    assert list(pipeline.run(range(6))) == [0, 1, 4, 5, 8, 9]
+    stats = pipeline.stats()
+    assert stats["stages"]["source"]["items"] == 6
+    assert stats["stages"]["double"]["items"] == 6 and stats["stages"]["split"]["items"] == 6
+
+
+def test_multi_worker_stage_processes_every_item():
+    pipeline = Pipeline([Stage("square", lambda x: x * x, workers=4, queue_size=2)])
+
+    assert sorted(pipeline.run(range(100))) == [x * x for x in range(100)]
+
+
+def test_bottleneck_is_the_busiest_stage():
+    pipeline = Pipeline([Stage("fast", lambda x: x), Stage("slow", lambda x: time.sleep(0.02) or x)])
+
+    list(pipeline.run(range(10)))
+
+    assert pipeline.stats()["bottleneck"] == "slow"
+
+
+def test_stage_error_stops_the_pipeline_and_is_raised_to_the_consumer():
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    pipeline = Pipeline([Stage("check", fail_on_three, workers=2, queue_size=1)])
+
+    with pytest.raises(ValueError, match="bad item"):
+        list(pipeline.run(range(1000)))
+    assert not any(t.name.startswith("pipeline-") for t in threading.enumerate())
+
+
+def test_source_error_is_raised_to_the_consumer():
+    def source():
+        yield 1
+        raise RuntimeError("decoder failed")
+
+    with pytest.raises(RuntimeError, match="decoder failed"):
+        list(Pipeline([Stage("identity", lambda x: x)]).run(source()))
+
+
+def test_closing_early_stops_blocked_workers():
+    pipeline = Pipeline([Stage("identity", lambda x: x, workers=2, queue_size=1)], source_queue_size=1)
+    outputs = pipeline.run(iter(range(10 ** 6)))
+
+    assert next(outputs) is not None
+    outputs.close()
+
+    assert not any(t.name.startswith("pipeline-") for t in threading.enumerate())
+    assert pipeline.stats()["stages"]["source"]["items"] < 100
@@ -0,0 +1,96 @@
+import io
+import socket
+import threading
+import time
+import pytest
+from server_client.protocol import (
+    send_legacy_message, recv_legacy_message, send_video_request, receive_video_request, receive_window_results,
+    send_json_frame, recv_exact, WINDOW_RESULTS, DONE, ERROR, ProtocolError
+)
+
+
+@pytest.fixture
+def connection():
+    client, server = socket.socketpair()
+    client.settimeout(5)
+    server.settimeout(5)
+    yield client, server
+    client.close()
+    server.close()
+
+
+def in_thread(fn, *args):
+    thread = threading.Thread(target=fn, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_v1_legacy_message_round_trip(connection):
+    client, server = connection
+    message = {"filename": "a.mp4", "content": "x" * 500_000, "tuples": [[0.0, 1.0]], "text": "שלום"}
+
+    sender = in_thread(send_legacy_message, client, message)
+    assert recv_legacy_message(server) == message
+    sender.join()
+
+
+def test_v2_video_request_and_streamed_results_round_trip(connection, tmp_path):
+    client, server = connection
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(bytes(range(256)) * 4000)
+    segments = [(0.0, 1.0), (0.15, 1.15), (0.3, 1.3)]
+
+    sender = in_thread(send_video_request, client, str(video), segments, 3, 1000)
+    sink = io.BytesIO()
+    header = receive_video_request(server, sink)
+    sender.join()
+
+    assert header == {"filename": "clip.mp4", "tuples": [list(segment) for segment in segments], "top_k": 3,
+                      "video_size": video.stat().st_size}
+    assert sink.getvalue() == video.read_bytes()
+
+    send_json_frame(server, WINDOW_RESULTS, {"windows": [[2, "hello"]]})
+    send_json_frame(server, WINDOW_RESULTS, {"windows": [[0, [["thanks", 0.9]]]]})
+    send_json_frame(server, DONE, {"count": 2})
+    streamed = []
+
+    predictions = receive_window_results(client, len(segments), lambda i, p: streamed.append((i, p)))
+
+    assert predictions == [[["thanks", 0.9]], None, "hello"]
+    assert streamed == [(2, "hello"), (0, [["thanks", 0.9]])]
+
+
+def test_server_error_frame_raises_protocol_error(connection):
+    client, server = connection
+    send_json_frame(server, ERROR, {"error": "model not loaded"})
+
+    with pytest.raises(ProtocolError, match="model not loaded"):
+        receive_window_results(client, 1)
+
+
+def test_receive_video_request_returns_none_when_the_client_hangs_up(connection):
+    client, server = connection
+    client.close()
+
+    assert receive_video_request(server, io.BytesIO()) is None
+
+
+def test_deadline_bounds_a_trickling_response(connection):
+    client, server = connection
+    stop = threading.Event()
+
+    def trickle():
+        for byte in b"\x00\x00\x00\x10":
+            if stop.wait(0.1):
+                return
+            server.sendall(bytes([byte]))
+
+    sender = in_thread(trickle)
+    start = time.monotonic()
+    try:
+        with pytest.raises(socket.timeout):
+            recv_exact(client, 100, deadline=time.monotonic() + 0.25)
+        assert time.monotonic() - start < 1.0
+    finally:
+        stop.set()
+        sender.join()
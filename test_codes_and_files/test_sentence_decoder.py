@@ -0,0 +1,67 @@
+import numpy as np
+from codes_translation.sentence_decoder import (
+    labels_to_probabilities, windows_to_timeline, viterbi_with_min_duration, decode_gloss_sequence, glosses_to_hebrew
+)
+
+LABELS = ["hello", "thanks", "doctor"]
+
+
+def one_hot_emissions(class_per_step, num_classes=len(LABELS), confidence=0.9):
+    emissions = np.full((len(class_per_step), num_classes), (1.0 - confidence) / (num_classes - 1), dtype=np.float32)
+    emissions[np.arange(len(class_per_step)), class_per_step] = confidence
+    return emissions
+
+
+def test_labels_to_probabilities_handles_labels_top_k_and_missing_windows():
+    probabilities = labels_to_probabilities(["thanks", [["hello", 0.6], ["doctor", 0.3]], None], LABELS)
+
+    np.testing.assert_allclose(probabilities[0], [0.0, 1.0, 0.0])
+    np.testing.assert_allclose(probabilities[1], [0.6, 0.1, 0.3], atol=1e-6)
+    np.testing.assert_allclose(probabilities[2], [1 / 3] * 3, atol=1e-6)
+
+
+def test_windows_to_timeline_averages_covering_windows():
+    step_centers, emissions = windows_to_timeline([(0.0, 0.3), (0.15, 0.3)], np.eye(2, 3), 0.45, step_sec=0.15)
+
+    np.testing.assert_allclose(step_centers, [0.075, 0.225, 0.375])
+    np.testing.assert_allclose(emissions[0], [1.0, 0.0, 0.0])
+    np.testing.assert_allclose(emissions[1], [0.5, 0.5, 0.0])
+    # No window covers the last step
+    np.testing.assert_allclose(emissions[2], [1 / 3] * 3, atol=1e-6)
+
+
+def test_viterbi_follows_argmax_without_minimum_duration():
+    classes = [0, 0, 1, 0, 0, 2, 2]
+    path = viterbi_with_min_duration(one_hot_emissions(classes, confidence=0.99), 1, switch_probability=0.5)
+
+    assert path.tolist() == classes
+
+
+def test_viterbi_suppresses_runs_shorter_than_minimum_duration():
+    classes = [0, 0, 0, 0, 1, 0, 0, 0, 2, 2, 2, 2]
+    path = viterbi_with_min_duration(one_hot_emissions(classes), 3)
+
+    assert path.tolist() == [0] * 8 + [2] * 4
+    run_lengths = np.diff(np.flatnonzero(np.r_[True, path[1:] != path[:-1], True]))
+    assert run_lengths.min() >= 3
+
+
+def test_decode_gloss_sequence_orders_signs_and_limits_repeats():
+    # hello for the first second, thanks for the second, then hello again
+    segments = [(start, start + 0.3) for start in np.arange(0.0, 3.0, 0.15)]
+    labels = ["hello" if start < 1.0 else "thanks" if start < 2.0 else "hello" for start, _ in segments]
+    probabilities = labels_to_probabilities(labels, LABELS)
+
+    glosses = decode_gloss_sequence(segments, probabilities, LABELS, video_duration=3.0)
+
+    assert [gloss[0] for gloss in glosses] == ["hello", "thanks"]
+    assert glosses[0][1] == 0.0 and glosses[0][2] <= glosses[1][1] + 0.15
+    assert all(confidence >= 0.3 for *_, confidence in glosses)
+
+
+def test_decode_gloss_sequence_of_no_windows_is_empty():
+    assert decode_gloss_sequence([], np.zeros((0, len(LABELS))), LABELS, video_duration=1.0) == []
+
+
+def test_glosses_to_hebrew_keeps_unknown_glosses():
+    assert glosses_to_hebrew([("hello", 0.0, 1.0, 0.9), ("unknown", 1.0, 2.0, 0.8)]) == "שלום unknown"
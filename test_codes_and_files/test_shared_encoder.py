@@ -0,0 +1,38 @@
+import os
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from models.local_models.classify_attn import load_cached_model
+from models.local_models.classify_shared_encoder import load_split_model
+from utils.benchmark_feature_vector import make_synthetic_sequences
+from utils.conver_json_to_vector import create_feature_vector, MAX_FRAMES
+
+MODELS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models", "local_models")
+MODEL_FILE_PATH = os.path.join(MODELS_FOLDER, "attn-imp3_666_vpw.keras")
+OTHER_MODEL_FILE_PATH = os.path.join(MODELS_FOLDER, "attn-imp2_666_vpw.keras")
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL_FILE_PATH), reason="model file not available")
+def test_head_of_encoder_matches_full_model_on_full_window():
+    model = load_cached_model(MODEL_FILE_PATH)
+    encoder, head, _, _ = load_split_model(MODEL_FILE_PATH)
+    x = np.asarray([create_feature_vector(sequence) for sequence in make_synthetic_sequences(3, MAX_FRAMES)])
+
+    split_probabilities = np.asarray(head.predict_on_batch(encoder.predict_on_batch(x)))
+    model_probabilities = model.predict(x, verbose=0)
+
+    np.testing.assert_allclose(split_probabilities, model_probabilities, atol=1e-5)
+
+
+@pytest.mark.skipif(not (os.path.exists(MODEL_FILE_PATH) and os.path.exists(OTHER_MODEL_FILE_PATH)),
+                    reason="model files not available")
+def test_each_model_file_gets_its_own_split_model():
+    first_model, second_model = load_cached_model(MODEL_FILE_PATH), load_cached_model(OTHER_MODEL_FILE_PATH)
+    first_split, second_split = load_split_model(MODEL_FILE_PATH), load_split_model(OTHER_MODEL_FILE_PATH)
+
+    assert first_model is not second_model
+    assert first_split[1] is not second_split[1]
+    assert first_split[1].get_weights()[-1].tolist() == first_model.get_weights()[-1].tolist()
+    assert second_split[1].get_weights()[-1].tolist() == second_model.get_weights()[-1].tolist()
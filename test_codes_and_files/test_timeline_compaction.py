@@ -0,0 +1,69 @@
+from codes_translation.timeline_compaction import (
+    merge_windows, compact_timeline, format_timeline, format_interval, estimate_tokens
+)
+
+
+def sliding_windows(label_per_start, step=0.15, size=1.0):
+    return [(round(i * step, 2), round(i * step + size, 2)) for i in range(len(label_per_start))], label_per_start
+
+
+def test_overlapping_windows_of_one_label_merge_into_one_interval():
+    segments, predictions = sliding_windows(["hello"] * 4)
+
+    intervals = merge_windows(segments, predictions)
+
+    assert intervals == [{"label": "hello", "start": 0.0, "end": 1.45, "count": 4, "confidence": None}]
+
+
+def test_windows_of_different_sizes_do_not_break_a_run():
+    segments = [(0.0, 1.0), (0.0, 2.0), (0.15, 1.15), (0.15, 2.15)]
+
+    intervals = merge_windows(segments, ["hello", "hello", "hello", "hello"])
+
+    assert len(intervals) == 1 and intervals[0]["end"] == 2.15
+
+
+def test_a_gap_starts_a_new_interval_and_none_windows_are_skipped():
+    segments = [(0.0, 1.0), (0.5, 1.5), (2.0, 3.0), (2.5, 3.5)]
+
+    intervals = merge_windows(segments, ["hello", None, "hello", "hello"])
+
+    assert [(interval["start"], interval["end"], interval["count"]) for interval in intervals] == [
+        (0.0, 1.0, 1), (2.0, 3.5, 2)
+    ]
+
+
+def test_top_k_predictions_carry_the_mean_top_1_confidence():
+    segments, _ = sliding_windows([None] * 2)
+
+    intervals = merge_windows(segments, [[["hello", 0.8], ["thanks", 0.1]], [["hello", 0.6]]])
+
+    assert intervals[0]["confidence"] == 0.7
+    assert format_interval(intervals[0]) == "0.0-1.1s → hello (x2, p=0.70)"
+
+
+def test_isolated_windows_are_dropped_unless_nothing_else_is_left():
+    segments, predictions = sliding_windows(["hello", "hello", "hello", "doctor", "thanks", "thanks", "thanks"])
+
+    assert [interval["label"] for interval in compact_timeline(segments, predictions)] == ["hello", "thanks"]
+    assert [interval["label"] for interval in compact_timeline(segments[3:4], predictions[3:4])] == ["doctor"]
+
+
+def test_weakest_intervals_are_dropped_to_fit_the_token_budget():
+    labels = ["hello"] * 6 + ["thanks"] * 2 + ["doctor"] * 4 + ["name"] * 3
+    segments = [(i * 0.3, i * 0.3 + 1.0) for i in range(len(labels))]
+    full = compact_timeline(segments, labels, token_budget=10_000)
+    # One token short of the full timeline
+    budget = sum(estimate_tokens(format_interval(interval)) + 1 for interval in full) - 1
+
+    compacted = compact_timeline(segments, labels, token_budget=budget)
+
+    assert [interval["label"] for interval in full] == ["hello", "thanks", "doctor", "name"]
+    assert [interval["label"] for interval in compacted] == ["hello", "doctor", "name"]
+    assert estimate_tokens(format_timeline(compacted)) <= budget
+
+
+def test_at_least_one_interval_is_kept_under_any_budget():
+    segments, predictions = sliding_windows(["hello"] * 3 + ["thanks"] * 2)
+
+    assert [interval["label"] for interval in compact_timeline(segments, predictions, token_budget=0)] == ["hello"]
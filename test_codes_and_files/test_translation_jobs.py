@@ -0,0 +1,120 @@
+import json
+import threading
+import pytest
+from backend import translation_jobs
+from backend.translation_jobs import TranslationJobManager, JobQueueFullError
+
+
+def wait_until_finished(job, timeout=5):
+    with job.condition:
+        assert job.condition.wait_for(lambda: job.status in translation_jobs.TERMINAL_STATUSES, timeout)
+
+
+def parse_events(stream):
+    """SSE chunks → list of event dicts (keep-alive comments skipped)."""
+    events = []
+    for chunk in stream:
+        if chunk.startswith(":"):
+            continue
+        name_line, data_line = chunk.strip().split("\n")
+        event = json.loads(data_line[len("data: "):])
+        assert name_line == f"event: {event['event']}"
+        events.append(event)
+    return events
+
+
+def translate(video, progress_callback=None):
+    progress_callback("classifying", windows=3)
+    progress_callback("window_results", windows=[{"index": 0, "label": "hello"}])
+    return f"translated {video}"
+
+
+@pytest.fixture
+def manager():
+    manager = TranslationJobManager(max_workers=1, max_pending=2, ttl_sec=60)
+    yield manager
+    manager.executor.shutdown(wait=True)
+
+
+def test_job_result_and_replayed_events_end_with_the_terminal_event(manager):
+    job = manager.get(manager.submit(translate, "clip.mp4"))
+    wait_until_finished(job)
+
+    snapshot = job.snapshot()
+    assert snapshot["status"] == "done" and snapshot["result"] == "translated clip.mp4"
+    events = parse_events(manager.stream_events(job))
+    assert [event["event"] for event in events] == ["started", "classifying", "window_results", "done"]
+    assert events[1]["windows"] == 3
+    assert events[-1]["result"] == "translated clip.mp4"
+
+
+def test_stream_events_follows_a_running_job_until_it_finishes(manager):
+    release = threading.Event()
+
+    def slow_translate(progress_callback=None):
+        progress_callback("classifying")
+        release.wait(5)
+        progress_callback("decoding")
+        return "done"
+
+    job = manager.get(manager.submit(slow_translate))
+    stream = manager.stream_events(job, heartbeat_sec=0.05)
+    received = []
+    for chunk in stream:
+        received.append(chunk)
+        if chunk.startswith("event: classifying"):
+            release.set()
+
+    events = parse_events(received)
+    assert [event["event"] for event in events] == ["started", "classifying", "decoding", "done"]
+
+
+def test_exception_in_the_job_ends_as_failed(manager):
+    def broken_translate(progress_callback=None):
+        raise ValueError("Unknown mode: poem")
+
+    job = manager.get(manager.submit(broken_translate))
+    wait_until_finished(job)
+
+    assert job.status == "failed"
+    assert job.error == "Unknown mode: poem" and job.result is None
+    events = parse_events(manager.stream_events(job))
+    assert events[-1]["event"] == "failed" and events[-1]["error"] == "Unknown mode: poem"
+
+
+def test_submit_rejects_jobs_beyond_max_pending(manager):
+    release = threading.Event()
+    running = manager.get(manager.submit(lambda progress_callback=None: release.wait(5)))
+    with running.condition:
+        assert running.condition.wait_for(lambda: running.status == "running", 5)
+
+    queued = [manager.submit(translate, "clip.mp4") for _ in range(manager.max_pending)]
+    with pytest.raises(JobQueueFullError):
+        manager.submit(translate, "clip.mp4")
+
+    release.set()
+    for job_id in queued:
+        wait_until_finished(manager.get(job_id))
+    # Once the queue drained there is room again
+    manager.submit(translate, "clip.mp4")
+
+
+def test_finished_jobs_expire_after_the_ttl(manager, monkeypatch):
+    job_id = manager.submit(translate, "clip.mp4")
+    job = manager.get(job_id)
+    wait_until_finished(job)
+
+    now = job.finished
+    monkeypatch.setattr(translation_jobs.time, "time", lambda: now + 59)
+    assert manager.get(job_id) is job
+    monkeypatch.setattr(translation_jobs.time, "time", lambda: now + 61)
+    assert manager.get(job_id) is None
+
+
+def test_unfinished_jobs_never_expire(manager, monkeypatch):
+    release = threading.Event()
+    job_id = manager.submit(lambda progress_callback=None: release.wait(5))
+
+    monkeypatch.setattr(translation_jobs.time, "time", lambda: 10 ** 12)
+    assert manager.get(job_id) is not None
+    release.set()
@@ -0,0 +1,25 @@
+import os
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from models.local_models.classify_attn import compare_variable_length_inference, load_label_mapping
+from utils.benchmark_feature_vector import make_synthetic_sequences
+
+MODELS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models", "local_models")
+MODEL_FILE_PATH = os.path.join(MODELS_FOLDER, "attn-imp3_666_vpw.keras")
+LABEL_ENCODER_FILE_PATH = os.path.join(MODELS_FOLDER, "label_encoder_attn-imp3_666_vpw.pkl")
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL_FILE_PATH), reason="model file not available")
+def test_bucketed_windows_match_full_padding():
+    label_mapping = load_label_mapping(LABEL_ENCODER_FILE_PATH)
+    # One window per length bucket, plus lengths that fall between buckets
+    windows = [make_synthetic_sequences(num_sequences=1, num_frames=num_frames, seed=num_frames)[0]
+               for num_frames in (20, 30, 40, 60, 75, 100, 150)]
+
+    result = compare_variable_length_inference(MODEL_FILE_PATH, windows, label_mapping, source_fps=30)
+
+    print(f"📏 Bucketed vs full padding: {result}")
+    assert result["windows"] == len(windows)
+    assert result["top1_agreement"] == 1.0
@@ -0,0 +1,66 @@
+import time
+import numpy as np
+from utils.conver_json_to_vector import (
+    create_feature_vector, create_feature_vectors, create_feature_vector_legacy, MAX_FRAMES
+)
+from utils.landmark_arrays import frames_to_arrays
+
+
+def make_synthetic_sequences(num_sequences=200, num_frames=120, seed=0):
+    """Random motion data in the extraction format; every frame has a pose and 0-2 hands."""
+    rng = np.random.default_rng(seed)
+
+    def landmark(with_visibility):
+        lm = {"x": float(rng.random()), "y": float(rng.random()), "z": float(rng.random())}
+        if with_visibility:
+            lm["visibility"] = float(rng.random())
+        return lm
+
+    return [
+        [
+            {
+                "pose": [landmark(True) for _ in range(33)],
+                "hands": [[landmark(False) for _ in range(21)] for _ in range(rng.integers(0, 3))],
+            }
+            for _ in range(num_frames)
+        ]
+        for _ in range(num_sequences)
+    ]
+
+
+def time_call(fn, repeats=3):
+    """Best wall time of fn() over `repeats` runs, and its result."""
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_benchmark(num_sequences=200, num_frames=120, factor=1):
+    sequences = make_synthetic_sequences(num_sequences, num_frames)
+    landmark_arrays = [frames_to_arrays(frames_data)[0] for frames_data in sequences]
+
+    legacy_time, legacy = time_call(lambda: np.array([
+        create_feature_vector_legacy(frames_data, factor=factor) for frames_data in sequences
+    ]))
+    single_time, single = time_call(lambda: np.array([
+        create_feature_vector(frames_data, factor=factor) for frames_data in sequences
+    ]))
+    batch_time, batch = time_call(lambda: create_feature_vectors(sequences, factor=factor))
+    arrays_time, from_arrays = time_call(lambda: create_feature_vectors(landmark_arrays, factor=factor))
+
+    for name, result in (("single", single), ("batch", batch), ("arrays", from_arrays)):
+        if not np.allclose(result, legacy, atol=1e-6):
+            raise AssertionError(f"{name} result differs from the legacy implementation")
+
+    print(f"📊 {num_sequences} sequences × {num_frames} frames → {legacy.shape} (MAX_FRAMES={MAX_FRAMES}, factor={factor})")
+    for name, elapsed in (("legacy loop", legacy_time), ("vectorized, per sequence", single_time),
+                          ("vectorized, batch", batch_time), ("batch from landmark arrays", arrays_time)):
+        print(f"  {name:<28} {elapsed * 1000:9.1f} ms   ×{legacy_time / elapsed:6.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark(factor=1)
+    run_benchmark(factor=3)
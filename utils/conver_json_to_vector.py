@@ -1,13 +1,136 @@
 import os
 import json
 import numpy as np
+from utils.landmark_arrays import frames_to_points, POSE_LANDMARKS
 
 # Constants
 MAX_FRAMES = 150
 FACTOR = 1
+# Frame rate every sequence is resampled to before variable-length inference
+CANONICAL_FPS = 30
+# Padded lengths (in frames at CANONICAL_FPS) used for variable-length inference
+LENGTH_BUCKETS = (30, 45, 60, 90, 120, 150)
 
 # Functions (as provided in your code)
-def create_feature_vector(frames_data, max_frames=MAX_FRAMES, factor=FACTOR):
+def create_feature_vector(frames_data, max_frames=MAX_FRAMES, factor=FACTOR, source_fps=None, length_buckets=None,
+                          fill_missing_pose=False):
+    """
+    Builds the (max_frames // factor, 75, 3) feature matrix of a motion-data sequence.
+
+    Only the frames that end up in the matrix are converted, straight into an array;
+    padding and FACTOR averaging are done with NumPy on the whole sequence.
+
+    Args:
+        frames_data (list | np.ndarray): Motion data, one {"pose", "hands"} dict per frame, or a
+            (T, 75, 4) / (T, 75, 3) landmark array (utils/landmark_arrays.py).
+        max_frames (int): Frames kept; shorter sequences are zero-padded.
+        factor (int): Number of consecutive frames averaged into one time step.
+        source_fps (float, optional): Frame rate of frames_data; if given, the sequence is
+            resampled to CANONICAL_FPS first.
+        length_buckets (tuple, optional): If given, pad only up to the smallest bucket that
+            fits the sequence (never above max_frames) instead of always to max_frames.
+        fill_missing_pose (bool): Give frames without pose zeros for their 33 pose points
+            instead of raising, as the original loop did (training loaders skip such samples).
+
+    Returns:
+        np.ndarray: The feature matrix.
+
+    Raises:
+        ValueError: A kept frame has no pose and fill_missing_pose is False.
+    """
+    if source_fps:
+        frames_data = resample_frames(frames_data, source_fps)
+    if length_buckets:
+        max_frames = bucket_length(len(frames_data), length_buckets, max_frames)
+
+    kept = (max_frames // factor) * factor
+    if not isinstance(frames_data, np.ndarray):
+        frames_data = frames_data[:kept]
+        if not fill_missing_pose:
+            check_pose(frames_data)
+        frames_data = frames_to_points(frames_data)
+    return landmarks_to_feature_matrix(frames_data, max_frames, factor)
+
+def create_feature_vectors(sequences, max_frames=MAX_FRAMES, factor=FACTOR, source_fps=None, fill_missing_pose=False):
+    """
+    Batch version of create_feature_vector.
+
+    Args:
+        sequences (list): N motion-data sequences (lists of frame dicts or landmark arrays).
+        max_frames (int): Frames kept per sequence; shorter sequences are zero-padded.
+        factor (int): Number of consecutive frames averaged into one time step.
+        source_fps (float, optional): Frame rate of all sequences, resampled to CANONICAL_FPS if given.
+        fill_missing_pose (bool): See create_feature_vector.
+
+    Returns:
+        np.ndarray: (N, max_frames // factor, 75, 3) feature matrices.
+    """
+    avg_frames = max_frames // factor
+    kept = avg_frames * factor
+    points = np.zeros((len(sequences), kept, 75, 3), dtype=np.float32)
+    lengths = np.zeros(len(sequences), dtype=np.int64)
+
+    for n, frames_data in enumerate(sequences):
+        if source_fps:
+            frames_data = resample_frames(frames_data, source_fps)
+        frames_data = frames_data[:kept]
+        if isinstance(frames_data, np.ndarray):
+            points[n, :len(frames_data)] = frames_data[:, :, :3]
+        else:
+            if not fill_missing_pose:
+                check_pose(frames_data)
+            frames_to_points(frames_data, out=points[n])
+        lengths[n] = len(frames_data)
+
+    # Average every `factor` frames over the frames that exist (padding does not count)
+    counts = np.clip(lengths[:, None] - np.arange(avg_frames)[None, :] * factor, 0, factor).astype(np.float32)
+    sums = points.reshape(len(sequences), avg_frames, factor, 75, 3).sum(axis=2)
+    return sums / np.maximum(counts, 1)[:, :, None, None]
+
+def check_pose(frames_data):
+    """Raises ValueError at the first frame without its 33 pose points (the original loop failed there)."""
+    for t, frame in enumerate(frames_data):
+        if len(frame.get("pose", [])) != POSE_LANDMARKS:
+            raise ValueError(f"Frame {t} has no pose")
+
+def landmarks_to_feature_matrix(landmarks, max_frames=MAX_FRAMES, factor=FACTOR):
+    """
+    create_feature_vector for a landmark array: x, y, z of the first max_frames frames,
+    zero-padded, with every `factor` frames averaged over the frames that exist.
+    """
+    avg_frames = max_frames // factor
+    kept = avg_frames * factor
+    points = np.asarray(landmarks, dtype=np.float32)[:kept, :, :3]
+
+    padded = np.zeros((kept, *points.shape[1:]), dtype=np.float32)
+    padded[:len(points)] = points
+    counts = np.clip(len(points) - np.arange(avg_frames) * factor, 0, factor).astype(np.float32)
+    sums = padded.reshape(avg_frames, factor, *points.shape[1:]).sum(axis=1)
+    return sums / np.maximum(counts, 1)[:, None, None]
+
+def resample_frames(frames_data, source_fps, target_fps=CANONICAL_FPS):
+    """Nearest-frame resampling of a motion-data sequence (or landmark array) from source_fps to target_fps."""
+    if len(frames_data) == 0 or abs(source_fps - target_fps) < 1e-3:
+        return frames_data
+
+    num_frames = max(1, int(round(len(frames_data) * target_fps / source_fps)))
+    indices = np.minimum((np.arange(num_frames) * source_fps / target_fps).astype(int), len(frames_data) - 1)
+    if isinstance(frames_data, np.ndarray):
+        return frames_data[indices]
+    return [frames_data[i] for i in indices]
+
+def bucket_length(num_frames, length_buckets=LENGTH_BUCKETS, max_frames=MAX_FRAMES):
+    """Smallest bucket that holds num_frames, capped at max_frames."""
+    for bucket in length_buckets:
+        if num_frames <= bucket:
+            return min(bucket, max_frames)
+    return max_frames
+
+def create_feature_vector_legacy(frames_data, max_frames=MAX_FRAMES, factor=FACTOR):
+    """
+    The original per-frame, per-landmark loop (no resampling or buckets), kept as the
+    reference for utils/benchmark_feature_vector.py. Fails on frames without pose.
+    """
     avg_frames = max_frames // factor
     feature_matrix = np.zeros((avg_frames, 75, 3), dtype=np.float32)
 
@@ -0,0 +1,96 @@
+import numpy as np
+
+# Landmark layout shared with create_feature_vector: 33 pose points, then 21 points per hand (2 hands)
+POSE_LANDMARKS = 33
+HAND_LANDMARKS = 21
+NUM_HANDS = 2
+NUM_LANDMARKS = POSE_LANDMARKS + NUM_HANDS * HAND_LANDMARKS  # 75
+# x, y, z, visibility (visibility is only set for pose points)
+NUM_CHANNELS = 4
+
+
+def allocate_landmark_arrays(num_frames):
+    """
+    Zeroed (num_frames, 75, 4) float32 landmarks and a (num_frames, 75) boolean presence mask.
+
+    A landmark that was not detected stays all-zero, exactly like the placeholders of the
+    JSON → feature conversion, and is False in the mask.
+    """
+    landmarks = np.zeros((num_frames, NUM_LANDMARKS, NUM_CHANNELS), dtype=np.float32)
+    present = np.zeros((num_frames, NUM_LANDMARKS), dtype=bool)
+    return landmarks, present
+
+
+def hand_slice(hand_index):
+    start = POSE_LANDMARKS + hand_index * HAND_LANDMARKS
+    return slice(start, start + HAND_LANDMARKS)
+
+
+def frames_to_arrays(frames_data):
+    """
+    Converts JSON motion data (one {"pose", "hands"} dict per frame) to landmark arrays.
+
+    Returns:
+        tuple: (landmarks, present) — (T, 75, 4) float32 and (T, 75) bool.
+    """
+    landmarks, present = allocate_landmark_arrays(len(frames_data))
+    for t, frame in enumerate(frames_data):
+        pose = frame.get("pose", [])
+        if len(pose) == POSE_LANDMARKS:
+            landmarks[t, :POSE_LANDMARKS] = [
+                (lm.get("x", 0.0), lm.get("y", 0.0), lm.get("z", 0.0), lm.get("visibility", 0.0)) for lm in pose
+            ]
+            present[t, :POSE_LANDMARKS] = True
+        for hand_index, hand in enumerate(frame.get("hands", [])[:NUM_HANDS]):
+            if len(hand) == HAND_LANDMARKS:
+                landmarks[t, hand_slice(hand_index), :3] = [
+                    (lm.get("x", 0.0), lm.get("y", 0.0), lm.get("z", 0.0)) for lm in hand
+                ]
+                present[t, hand_slice(hand_index)] = True
+    return landmarks, present
+
+
+def frames_to_points(frames_data, out=None):
+    """
+    x, y, z of every landmark of JSON motion data — the (T, 75, 3) input of the feature matrix.
+
+    Args:
+        frames_data (list): One {"pose", "hands"} dict per frame.
+        out (np.ndarray, optional): Zeroed (>= T, 75, 3) float32 buffer to fill instead of allocating.
+
+    Returns:
+        np.ndarray: (T, 75, 3) float32; missing pose points and hands are zeros.
+    """
+    points = np.zeros((len(frames_data), NUM_LANDMARKS, 3), dtype=np.float32) if out is None else out
+    for t, frame in enumerate(frames_data):
+        pose = frame.get("pose", [])
+        if len(pose) == POSE_LANDMARKS:
+            points[t, :POSE_LANDMARKS] = [(lm.get("x", 0.0), lm.get("y", 0.0), lm.get("z", 0.0)) for lm in pose]
+        for hand_index, hand in enumerate(frame.get("hands", [])[:NUM_HANDS]):
+            if len(hand) == HAND_LANDMARKS:
+                points[t, hand_slice(hand_index)] = [(lm.get("x", 0.0), lm.get("y", 0.0), lm.get("z", 0.0)) for lm in hand]
+    return points[:len(frames_data)]
+
+
+def arrays_to_frames(landmarks, present):
+    """
+    Converts landmark arrays back to the JSON motion-data format (for files and wire formats).
+
+    Returns:
+        list: One {"pose": [...], "hands": [...]} dict per frame.
+    """
+    frames_data = []
+    for frame_landmarks, frame_present in zip(landmarks.tolist(), present):
+        frame = {"pose": [], "hands": []}
+        if frame_present[:POSE_LANDMARKS].all():
+            frame["pose"] = [
+                {"x": x, "y": y, "z": z, "visibility": visibility}
+                for x, y, z, visibility in frame_landmarks[:POSE_LANDMARKS]
+            ]
+        for hand_index in range(NUM_HANDS):
+            if frame_present[hand_slice(hand_index)].all():
+                frame["hands"].append([
+                    {"x": x, "y": y, "z": z} for x, y, z, _ in frame_landmarks[hand_slice(hand_index)]
+                ])
+        frames_data.append(frame)
+    return frames_data
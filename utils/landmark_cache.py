@@ -0,0 +1,163 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import numpy as np
+
+# Opt-in: the cache writes up to LANDMARK_CACHE_MAX_BYTES under resources/
+LANDMARK_CACHE_ENABLED = os.getenv("LANDMARK_CACHE_ENABLED", "false").lower() == "true"
+LANDMARK_CACHE_DIR = os.getenv(
+    "LANDMARK_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resources", "landmark_cache")
+)
+# Total size of the stored .npz files; the least recently used ones are deleted beyond it
+LANDMARK_CACHE_MAX_BYTES = int(os.getenv("LANDMARK_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+# Bytes read at a time while hashing a video
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Module-level instance shared by every caller in the process
+LANDMARK_CACHE = None
+LANDMARK_CACHE_LOCK = threading.Lock()
+
+
+def hash_video_file(video_path):
+    """sha256 of the video bytes, so renamed or re-uploaded copies of a clip share an entry."""
+    digest = hashlib.sha256()
+    with open(video_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LandmarkCache:
+    """
+    Content-addressed on-disk cache of extracted landmark arrays (one .npz per entry).
+
+    Entries are written to a temporary file and renamed into place, so concurrent
+    processes never read a half-written file. The modification time records the last
+    use; once the directory grows past max_bytes the least recently used entries are
+    deleted. Hits and misses are counted per process.
+    """
+    def __init__(self, cache_dir=LANDMARK_CACHE_DIR, max_bytes=LANDMARK_CACHE_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(video_hash, config, start_sec=None, end_sec=None):
+        """Key from the video content, the extractor configuration and the extracted time window."""
+        payload = json.dumps([video_hash, config, start_sec, end_sec], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def get(self, key):
+        """
+        Returns:
+            tuple | None: (landmarks, present, fps), or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as entry:
+                result = entry["landmarks"], entry["present"], float(entry["fps"])
+            # Mark as recently used for the LRU eviction
+            os.utime(path)
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key, landmarks, present, fps):
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, landmarks=landmarks, present=present, fps=np.float64(fps))
+            os.replace(temp_path, self._path(key))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def _entries(self):
+        """[(last_used, size, path), ...] of the stored entries."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # Evicted by another process meanwhile
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def get_or_extract(self, video_path, config, extract, start_sec=None, end_sec=None):
+        """
+        Returns the cached (landmarks, present, fps) of a video window, calling extract() on a miss.
+        """
+        key = self.make_key(hash_video_file(video_path), config, start_sec, end_sec)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        landmarks, present, fps = extract()
+        self.put(key, landmarks, present, fps)
+        return landmarks, present, fps
+
+    def stats(self):
+        with self._lock:
+            entries = self._entries()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries),
+        }
+
+
+def get_landmark_cache():
+    """The process-wide LandmarkCache, or None when LANDMARK_CACHE_ENABLED is false."""
+    global LANDMARK_CACHE
+    if not LANDMARK_CACHE_ENABLED:
+        return None
+    with LANDMARK_CACHE_LOCK:
+        if LANDMARK_CACHE is None:
+            LANDMARK_CACHE = LandmarkCache()
+    return LANDMARK_CACHE
+
+
+def cached_landmark_arrays(video_path, config, extract, start_sec=None, end_sec=None):
+    """get_or_extract on the process-wide cache; calls extract() directly when caching is disabled."""
+    cache = get_landmark_cache()
+    if cache is None:
+        return extract()
+    return cache.get_or_extract(video_path, config, extract, start_sec, end_sec)
@@ -0,0 +1,440 @@
+import os
+import queue
+import math
+import threading
+from types import SimpleNamespace
+from contextlib import contextmanager
+import cv2
+import numpy as np
+import mediapipe as mp
+from mediapipe.framework.formats import landmark_pb2
+from utils.signer_crop import SignerCrop, SIGNER_CROP_MODE, SIGNER_CROP_TARGET_HEIGHT, SIGNER_PROBE_DETECTIONS, SIGNER_PROBE_FRAMES
+from utils.landmark_arrays import allocate_landmark_arrays, hand_slice, POSE_LANDMARKS, NUM_HANDS, NUM_LANDMARKS, NUM_CHANNELS
+
+# Extractors kept warm per process (each holds one Pose graph and its Hands graph(s))
+LANDMARK_EXTRACTOR_POOL_SIZE = int(os.getenv("LANDMARK_EXTRACTOR_POOL_SIZE", "2"))
+# MediaPipe settings of the pooled extractors (all part of the landmark cache key)
+MIN_DETECTION_CONFIDENCE = 0.5
+MAX_NUM_HANDS = 2
+POSE_MODEL_COMPLEXITY = 1
+# Reuse the previous frame's landmarks instead of running MediaPipe when a frame barely differs from it
+SKIP_STATIC_FRAMES = os.getenv("SKIP_STATIC_FRAMES", "false").lower() == "true"
+# Mean absolute grayscale difference (0-255) on the downscaled frames below which a frame counts as static
+STATIC_FRAME_THRESHOLD = float(os.getenv("STATIC_FRAME_THRESHOLD", "1.5"))
+# Size of the grayscale thumbnails compared by the static-frame check
+STATIC_THUMBNAIL_SIZE = (64, 64)
+# Run MediaPipe at least every this many frames, so slow drifts are still followed
+MAX_CONSECUTIVE_SKIPPED = 5
+# Let the pose wrists decide whether Hands runs at all, and run it on crops around each wrist
+HAND_ROI_MODE = os.getenv("HAND_ROI_MODE", "false").lower() == "true"
+# (wrist, elbow) pose landmark indices of the left and right arm
+WRIST_ELBOW_LANDMARKS = ((15, 13), (16, 14))
+# A wrist below this pose visibility (or outside the frame) has no hand worth looking for
+WRIST_VISIBILITY_THRESHOLD = 0.5
+# Crop side as a multiple of the forearm length, centred this far past the wrist (in forearm lengths)
+HAND_ROI_SCALE = 1.6
+HAND_ROI_OFFSET = 0.4
+# Crop side when the elbow is not visible, as a fraction of the shorter frame side
+HAND_ROI_FALLBACK_FRACTION = 0.35
+HAND_ROI_MIN_PX = 96
+# Two wrist crops that found hands whose wrists are closer than this (normalized) found the same hand
+DUPLICATE_HAND_DISTANCE = 0.03
+
+# Idle extractors of this process; acquire_extractor creates more on demand up to the pool size
+EXTRACTOR_POOL = queue.LifoQueue()
+EXTRACTOR_POOL_LOCK = threading.Lock()
+EXTRACTORS_CREATED = 0
+
+
+class LandmarkExtractor:
+    """
+    Reusable MediaPipe pose + hands extractor.
+
+    The graphs are built once; reset() clears their tracking state between videos, so
+    an instance can serve any number of videos without paying graph setup again.
+    With headless=False every processed frame is drawn and shown (debugging only).
+
+    With skip_static_frames, a frame whose downscaled grayscale version differs from the
+    last processed one by less than STATIC_FRAME_THRESHOLD gets that frame's landmarks
+    instead of a MediaPipe run (frames_skipped counts them).
+
+    With hand_roi, Hands only runs near wrists the pose result shows in the frame (frames
+    with none count in hands_gated), each wrist on its own crop and single-hand tracking
+    graph; the hand landmarks are mapped back to full-frame normalized coordinates.
+
+    With signer_crop, the first pose detections of a video define the signer's box
+    (utils/signer_crop.py); from then on MediaPipe runs on that box downscaled to
+    SIGNER_CROP_TARGET_HEIGHT and the landmarks are renormalized to the full frame.
+    """
+    def __init__(self, min_detection_confidence=MIN_DETECTION_CONFIDENCE, max_num_hands=MAX_NUM_HANDS,
+                 model_complexity=POSE_MODEL_COMPLEXITY, skip_static_frames=SKIP_STATIC_FRAMES,
+                 hand_roi=HAND_ROI_MODE, signer_crop=SIGNER_CROP_MODE, headless=True):
+        self.headless = headless
+        self.skip_static_frames = skip_static_frames
+        self.hand_roi = hand_roi
+        self.signer_crop = signer_crop
+        self._crop = None
+        self._crop_probe_done = False
+        self._crop_probe_frames = 0
+        self._crop_detections = []
+        self.frames_seen = 0
+        self.frames_skipped = 0
+        self.hands_gated = 0
+        self._reference_thumbnail = None
+        self._consecutive_skipped = 0
+        self._previous_frame_data = None
+        self._previous_landmarks = None
+        self._previous_present = None
+        self.pose = mp.solutions.pose.Pose(static_image_mode=False, model_complexity=model_complexity,
+                                           min_detection_confidence=min_detection_confidence)
+        self.hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=max_num_hands,
+                                              min_detection_confidence=min_detection_confidence)
+        # One tracking graph per wrist, so each keeps following its own hand from crop to crop
+        self.roi_hands = [
+            mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=1,
+                                     min_detection_confidence=min_detection_confidence)
+            for _ in WRIST_ELBOW_LANDMARKS
+        ] if hand_roi else []
+
+    def reset(self):
+        """Forgets the landmarks tracked from the previous video."""
+        self.pose.reset()
+        self.hands.reset()
+        for roi_hands in self.roi_hands:
+            roi_hands.reset()
+        self._crop = None
+        self._crop_probe_done = False
+        self._crop_probe_frames = 0
+        self._crop_detections = []
+        self.frames_seen = 0
+        self.frames_skipped = 0
+        self.hands_gated = 0
+        self._reference_thumbnail = None
+        self._consecutive_skipped = 0
+        self._previous_frame_data = None
+        self._previous_landmarks = None
+        self._previous_present = None
+
+    def close(self):
+        self.pose.close()
+        self.hands.close()
+        for roi_hands in self.roi_hands:
+            roi_hands.close()
+
+    def is_static(self, frame):
+        """
+        Counts the frame and tells whether it can reuse the previous landmarks.
+
+        Frames are compared with the last frame MediaPipe actually ran on (not the previous
+        frame), so a slow movement cannot slip through as a series of small differences.
+        """
+        self.frames_seen += 1
+        if not self.skip_static_frames:
+            return False
+
+        thumbnail = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), STATIC_THUMBNAIL_SIZE,
+                               interpolation=cv2.INTER_AREA)
+        if (self._reference_thumbnail is not None and self._consecutive_skipped < MAX_CONSECUTIVE_SKIPPED
+                and cv2.absdiff(thumbnail, self._reference_thumbnail).mean() < STATIC_FRAME_THRESHOLD):
+            self._consecutive_skipped += 1
+            self.frames_skipped += 1
+            return True
+
+        self._reference_thumbnail = thumbnail
+        self._consecutive_skipped = 0
+        return False
+
+    def skip_stats(self):
+        """Frames seen and skipped since the last reset."""
+        return {
+            "frames": self.frames_seen,
+            "skipped": self.frames_skipped,
+            "skipped_ratio": round(self.frames_skipped / self.frames_seen, 3) if self.frames_seen else 0.0,
+            "hands_gated": self.hands_gated,
+        }
+
+    @staticmethod
+    def wrist_rois(pose_landmarks, width, height):
+        """
+        Square pixel boxes (x0, y0, x1, y1) around the left and right hand, extended past the
+        wrist along the forearm; None for a wrist that is not visible or outside the frame.
+        """
+        rois = []
+        for wrist_index, elbow_index in WRIST_ELBOW_LANDMARKS:
+            wrist, elbow = pose_landmarks[wrist_index], pose_landmarks[elbow_index]
+            if wrist.visibility < WRIST_VISIBILITY_THRESHOLD or not (0.0 <= wrist.x <= 1.0 and 0.0 <= wrist.y <= 1.0):
+                rois.append(None)
+                continue
+
+            wrist_x, wrist_y = wrist.x * width, wrist.y * height
+            forearm_x, forearm_y = wrist_x - elbow.x * width, wrist_y - elbow.y * height
+            forearm = math.hypot(forearm_x, forearm_y)
+            if elbow.visibility >= WRIST_VISIBILITY_THRESHOLD and forearm > 1:
+                center_x, center_y = wrist_x + HAND_ROI_OFFSET * forearm_x, wrist_y + HAND_ROI_OFFSET * forearm_y
+                side = HAND_ROI_SCALE * forearm
+            else:
+                center_x, center_y = wrist_x, wrist_y
+                side = HAND_ROI_FALLBACK_FRACTION * min(width, height)
+            half = max(side, HAND_ROI_MIN_PX) / 2
+
+            x0, y0 = max(0, int(center_x - half)), max(0, int(center_y - half))
+            x1, y1 = min(width, int(center_x + half)), min(height, int(center_y + half))
+            rois.append((x0, y0, x1, y1) if x1 - x0 > 1 and y1 - y0 > 1 else None)
+        return rois
+
+    @staticmethod
+    def roi_to_frame(hand_landmarks, roi, width, height):
+        """Maps hand landmarks normalized to a crop back to normalized full-frame coordinates."""
+        x0, y0, x1, y1 = roi
+        crop_width, crop_height = x1 - x0, y1 - y0
+        return landmark_pb2.NormalizedLandmarkList(landmark=[
+            # z is scaled like x, as MediaPipe does for its own normalized depth
+            landmark_pb2.NormalizedLandmark(x=(x0 + lm.x * crop_width) / width, y=(y0 + lm.y * crop_height) / height,
+                                            z=lm.z * crop_width / width)
+            for lm in hand_landmarks.landmark
+        ])
+
+    def detect_hands_in_wrist_rois(self, frame_rgb, pose_results):
+        """Hands results (multi_hand_landmarks only) from crops around the pose wrists."""
+        if not pose_results.pose_landmarks:
+            # No wrists to go by; fall back to the full frame
+            return self.hands.process(frame_rgb)
+
+        height, width = frame_rgb.shape[:2]
+        rois = self.wrist_rois(pose_results.pose_landmarks.landmark, width, height)
+        if not any(rois):
+            self.hands_gated += 1
+            return SimpleNamespace(multi_hand_landmarks=None)
+
+        hands = []
+        for roi_hands, roi in zip(self.roi_hands, rois):
+            if roi is None:
+                continue
+            x0, y0, x1, y1 = roi
+            results = roi_hands.process(np.ascontiguousarray(frame_rgb[y0:y1, x0:x1]))
+            if not results.multi_hand_landmarks:
+                continue
+            hand = self.roi_to_frame(results.multi_hand_landmarks[0], roi, width, height)
+            # Overlapping crops (crossed or touching hands) can both find the same hand
+            if hands and math.hypot(hand.landmark[0].x - hands[0].landmark[0].x,
+                                    hand.landmark[0].y - hands[0].landmark[0].y) < DUPLICATE_HAND_DISTANCE:
+                continue
+            hands.append(hand)
+        return SimpleNamespace(multi_hand_landmarks=hands or None)
+
+    def probe_signer_crop(self, frame, pose_results):
+        """Collects the first pose detections of a video and sets the signer crop once there are enough."""
+        self._crop_probe_frames += 1
+        if pose_results.pose_landmarks:
+            self._crop_detections.append([(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_results.pose_landmarks.landmark])
+        if len(self._crop_detections) < SIGNER_PROBE_DETECTIONS and self._crop_probe_frames < SIGNER_PROBE_FRAMES:
+            return
+
+        height, width = frame.shape[:2]
+        self._crop = SignerCrop.from_pose_detections(self._crop_detections, width, height)
+        self._crop_probe_done = True
+        if self._crop is not None:
+            # The trackers' regions were found on full frames; let them start over on the crops
+            self.pose.reset()
+            self.hands.reset()
+            for roi_hands in self.roi_hands:
+                roi_hands.reset()
+
+    def detect(self, frame):
+        """Runs both graphs on one BGR frame; returns (pose_results, hands_results)."""
+        crop = self._crop
+        # Convert frame to RGB (required by MediaPipe)
+        frame_rgb = cv2.cvtColor(crop.apply(frame) if crop is not None else frame, cv2.COLOR_BGR2RGB)
+        pose_results = self.pose.process(frame_rgb)
+        if self.hand_roi:
+            hands_results = self.detect_hands_in_wrist_rois(frame_rgb, pose_results)
+        else:
+            hands_results = self.hands.process(frame_rgb)
+
+        if crop is not None:
+            if pose_results.pose_landmarks:
+                crop.map_landmarks(pose_results.pose_landmarks)
+            for hand_landmarks in hands_results.multi_hand_landmarks or []:
+                crop.map_landmarks(hand_landmarks)
+        elif self.signer_crop and not self._crop_probe_done:
+            self.probe_signer_crop(frame, pose_results)
+
+        if not self.headless:
+            self.draw(frame, pose_results, hands_results)
+        return pose_results, hands_results
+
+    def process_frame(self, frame):
+        """
+        Landmarks of one BGR frame.
+
+        Returns:
+            dict: {"pose": [33 × {x, y, z, visibility}] or [], "hands": [[21 × {x, y, z}], ...]}.
+        """
+        if self.is_static(frame) and self._previous_frame_data is not None:
+            # A copy, so a caller that edits one frame's landmarks does not change the frames that reused them
+            previous = self._previous_frame_data
+            return {"pose": [dict(lm) for lm in previous["pose"]],
+                    "hands": [[dict(lm) for lm in hand] for hand in previous["hands"]]}
+        pose_results, hands_results = self.detect(frame)
+
+        frame_data = {"pose": [], "hands": []}
+        if pose_results.pose_landmarks:
+            frame_data["pose"] = [
+                {"x": lm.x, "y": lm.y, "z": lm.z, "visibility": lm.visibility}
+                for lm in pose_results.pose_landmarks.landmark
+            ]
+        if hands_results.multi_hand_landmarks:
+            for hand_landmarks in hands_results.multi_hand_landmarks:
+                frame_data["hands"].append([
+                    {"x": lm.x, "y": lm.y, "z": lm.z} for lm in hand_landmarks.landmark
+                ])
+        self._previous_frame_data = frame_data
+        return frame_data
+
+    def process_frame_into(self, frame, landmarks, present):
+        """
+        Writes the landmarks of one BGR frame straight into a (75, 4) row and its (75,) presence row.
+        """
+        if self.is_static(frame) and self._previous_landmarks is not None:
+            landmarks[:] = self._previous_landmarks
+            present[:] = self._previous_present
+            return
+        pose_results, hands_results = self.detect(frame)
+
+        if pose_results.pose_landmarks:
+            landmarks[:POSE_LANDMARKS] = [
+                (lm.x, lm.y, lm.z, lm.visibility) for lm in pose_results.pose_landmarks.landmark
+            ]
+            present[:POSE_LANDMARKS] = True
+        if hands_results.multi_hand_landmarks:
+            for hand_index, hand_landmarks in enumerate(hands_results.multi_hand_landmarks[:NUM_HANDS]):
+                landmarks[hand_slice(hand_index), :3] = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+                present[hand_slice(hand_index)] = True
+        if self.skip_static_frames:
+            self._previous_landmarks = landmarks.copy()
+            self._previous_present = present.copy()
+
+    def draw(self, frame, pose_results, hands_results):
+        mp_drawing = mp.solutions.drawing_utils
+        if pose_results.pose_landmarks:
+            mp_drawing.draw_landmarks(frame, pose_results.pose_landmarks, mp.solutions.pose.POSE_CONNECTIONS)
+        if hands_results.multi_hand_landmarks:
+            for hand_landmarks in hands_results.multi_hand_landmarks:
+                mp_drawing.draw_landmarks(frame, hand_landmarks, mp.solutions.hands.HAND_CONNECTIONS)
+        cv2.imshow('Sign Language Video', frame)
+        cv2.waitKey(1)
+
+    def extract(self, cap, max_frames=None):
+        """
+        Runs over the frames of an opened capture, starting from a clean tracking state.
+
+        Args:
+            cap (cv2.VideoCapture): An opened video capture (not released here).
+            max_frames (int, optional): Stop after this many frames.
+
+        Returns:
+            list: One {"pose": [...], "hands": [...]} dict per decoded frame.
+        """
+        self.reset()
+        output_data = []
+        while cap.isOpened() and (max_frames is None or len(output_data) < max_frames):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            output_data.append(self.process_frame(frame))
+        self.report_extraction_stats()
+        return output_data
+
+    def extract_arrays(self, cap, max_frames=None):
+        """
+        Same as extract, but fills preallocated arrays instead of building a dict per landmark.
+
+        Returns:
+            tuple: (landmarks, present) — (T, 75, 4) float32 and (T, 75) bool (see utils/landmark_arrays.py).
+        """
+        self.reset()
+        expected = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) - cap.get(cv2.CAP_PROP_POS_FRAMES))
+        if max_frames is not None:
+            expected = min(expected, max_frames)
+        landmarks, present = allocate_landmark_arrays(max(expected, 1))
+
+        num_frames = 0
+        while cap.isOpened() and (max_frames is None or num_frames < max_frames):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if num_frames == len(landmarks):
+                # The container's frame count was an underestimate; grow the buffers
+                more_landmarks, more_present = allocate_landmark_arrays(len(landmarks))
+                landmarks = np.concatenate([landmarks, more_landmarks])
+                present = np.concatenate([present, more_present])
+            self.process_frame_into(frame, landmarks[num_frames], present[num_frames])
+            num_frames += 1
+
+        self.report_extraction_stats()
+        return landmarks[:num_frames], present[:num_frames]
+
+    def report_extraction_stats(self):
+        if self._crop is not None:
+            print(f"✂️ MediaPipe ran on {self._crop}")
+        if self.skip_static_frames:
+            stats = self.skip_stats()
+            print(f"⏭️ Skipped MediaPipe on {stats['skipped']}/{stats['frames']} near-static frames")
+        if self.hand_roi:
+            print(f"✋ Hands skipped on {self.hands_gated}/{self.frames_seen} frames with no wrist in view")
+
+
+def extractor_config():
+    """Everything that changes the landmarks the pooled extractors produce for a given video."""
+    return {
+        "mediapipe": mp.__version__,
+        "min_detection_confidence": MIN_DETECTION_CONFIDENCE,
+        "max_num_hands": MAX_NUM_HANDS,
+        "pose_model_complexity": POSE_MODEL_COMPLEXITY,
+        "static_frame_threshold": STATIC_FRAME_THRESHOLD if SKIP_STATIC_FRAMES else None,
+        "hand_roi": [HAND_ROI_SCALE, HAND_ROI_OFFSET, WRIST_VISIBILITY_THRESHOLD] if HAND_ROI_MODE else None,
+        "signer_crop": SIGNER_CROP_TARGET_HEIGHT if SIGNER_CROP_MODE else None,
+        "layout": [NUM_LANDMARKS, NUM_CHANNELS],
+    }
+
+
+@contextmanager
+def acquire_extractor():
+    """
+    Borrows a warm LandmarkExtractor from the process pool.
+
+    A new one is built only while fewer than LANDMARK_EXTRACTOR_POOL_SIZE exist; after
+    that callers wait for one to be returned.
+    """
+    global EXTRACTORS_CREATED
+    try:
+        extractor = EXTRACTOR_POOL.get_nowait()
+    except queue.Empty:
+        with EXTRACTOR_POOL_LOCK:
+            create = EXTRACTORS_CREATED < LANDMARK_EXTRACTOR_POOL_SIZE
+            if create:
+                EXTRACTORS_CREATED += 1
+        if not create:
+            extractor = EXTRACTOR_POOL.get()
+        else:
+            try:
+                extractor = LandmarkExtractor()
+            except Exception:
+                with EXTRACTOR_POOL_LOCK:
+                    EXTRACTORS_CREATED -= 1
+                raise
+
+    try:
+        yield extractor
+    finally:
+        EXTRACTOR_POOL.put(extractor)
+
+
+def warm_extractor_pool(size=LANDMARK_EXTRACTOR_POOL_SIZE):
+    """Builds the pool's extractors up front, e.g. when a server worker starts."""
+    global EXTRACTORS_CREATED
+    with EXTRACTOR_POOL_LOCK:
+        to_create = max(0, min(size, LANDMARK_EXTRACTOR_POOL_SIZE) - EXTRACTORS_CREATED)
+        EXTRACTORS_CREATED += to_create
+    for _ in range(to_create):
+        EXTRACTOR_POOL.put(LandmarkExtractor())
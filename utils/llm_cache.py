@@ -0,0 +1,148 @@
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Opt-in, like the landmark cache: the cache writes an SQLite file under resources/
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resources", "llm_cache.sqlite3")
+)
+LLM_CACHE_TTL_SEC = int(os.getenv("LLM_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# Module-level instance shared by every caller in the process
+LLM_CACHE = None
+LLM_CACHE_LOCK = threading.Lock()
+
+
+def normalize_text(text):
+    """Collapses whitespace so prompts that only differ in indentation share a cache entry."""
+    return " ".join(str(text).split())
+
+
+class LLMCache:
+    """
+    Disk-backed LRU cache for LLM responses (SQLite, safe to share between threads).
+
+    Entries expire after ttl_sec and the least recently used ones are evicted once
+    more than max_entries are stored. Hits and misses are counted per process.
+    """
+    def __init__(self, path=LLM_CACHE_PATH, ttl_sec=LLM_CACHE_TTL_SEC, max_entries=LLM_CACHE_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(template_version, *parts):
+        """Key from the prompt template version plus the normalized inputs."""
+        payload = json.dumps([str(template_version)] + [normalize_text(part) for part in parts], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_sec:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            # Evict expired entries, then the least recently used ones above the size cap
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_sec,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def get_or_compute(self, template_version, parts, compute):
+        """Returns the cached response for (template_version, parts), calling compute() on a miss."""
+        key = self.make_key(template_version, *parts)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        value = compute()
+        if value:
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": entries,
+        }
+
+
+def get_llm_cache():
+    """The process-wide LLMCache, or None when LLM_CACHE_ENABLED is false."""
+    global LLM_CACHE
+    if not LLM_CACHE_ENABLED:
+        return None
+    with LLM_CACHE_LOCK:
+        if LLM_CACHE is None:
+            LLM_CACHE = LLMCache()
+    return LLM_CACHE
+
+
+def cached_llm_call(template_version, parts, compute):
+    """get_or_compute through the shared cache, or a plain compute() when caching is disabled."""
+    cache = get_llm_cache()
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(template_version, parts, compute)
+
+
+async def cached_llm_call_async(template_version, parts, compute):
+    """
+    Same as cached_llm_call for a coroutine function compute.
+
+    The SQLite reads and writes run in a worker thread, so they never block the event loop.
+    """
+    cache = await asyncio.to_thread(get_llm_cache)
+    if cache is None:
+        return await compute()
+
+    key = cache.make_key(template_version, *parts)
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached is not None:
+        return cached
+
+    value = await compute()
+    if value:
+        await asyncio.to_thread(cache.put, key, value)
+    return value
@@ -0,0 +1,137 @@
+import os
+import threading
+import multiprocessing
+import cv2
+import numpy as np
+from utils.landmark_extractor import acquire_extractor, warm_extractor_pool, extractor_config
+from utils.landmark_cache import cached_landmark_arrays
+from utils.landmark_arrays import allocate_landmark_arrays
+
+# Processes used to extract one long video in parallel
+PARALLEL_EXTRACTION_WORKERS = int(os.getenv("PARALLEL_EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+# Shorter chunks cost more in warm-up and seeking than they save
+MIN_CHUNK_SEC = 5.0
+# Frames before each chunk that are run through MediaPipe only to warm up its tracking, then dropped
+CHUNK_WARMUP_SEC = 0.5
+
+# Global extraction process pools (worker count → pool), created on first use
+EXTRACTION_POOLS = {}
+EXTRACTION_POOL_LOCK = threading.Lock()
+
+
+def init_extraction_worker():
+    # Each worker handles one chunk at a time, so one warm extractor is enough
+    warm_extractor_pool(1)
+
+
+def get_extraction_pool(workers=PARALLEL_EXTRACTION_WORKERS):
+    with EXTRACTION_POOL_LOCK:
+        if workers not in EXTRACTION_POOLS:
+            context = multiprocessing.get_context("spawn")
+            EXTRACTION_POOLS[workers] = context.Pool(workers, initializer=init_extraction_worker)
+        return EXTRACTION_POOLS[workers]
+
+
+def extract_chunk(video_path, start_frame, end_frame, warmup_frames):
+    """
+    Landmark arrays of frames [start_frame, end_frame) (end_frame None → to the end of the video).
+
+    Extraction starts warmup_frames earlier so the pose/hand trackers have locked on by
+    start_frame, as they would have in a sequential pass; those frames are discarded.
+    """
+    first_frame = max(0, start_frame - warmup_frames)
+    cap = cv2.VideoCapture(video_path)
+    try:
+        position = 0
+        if first_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, first_frame)
+            # Seeking may land on another frame than asked for; count from where the decoder really is
+            position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        max_frames = max(0, end_frame - position) if end_frame is not None else None
+        with acquire_extractor() as extractor:
+            landmarks, present = extractor.extract_arrays(cap, max_frames)
+    finally:
+        cap.release()
+
+    skip = start_frame - position
+    if skip < 0:
+        # Landed past start_frame: the frames in between count as undetected
+        missing_landmarks, missing_present = allocate_landmark_arrays(-skip)
+        return np.concatenate([missing_landmarks, landmarks]), np.concatenate([missing_present, present])
+    return landmarks[skip:], present[skip:]
+
+
+def fit_chunk(landmarks, present, num_frames):
+    """Trims a chunk's arrays to num_frames, or pads them with undetected frames, so later chunks stay aligned."""
+    if len(landmarks) >= num_frames:
+        return landmarks[:num_frames], present[:num_frames]
+    missing_landmarks, missing_present = allocate_landmark_arrays(num_frames - len(landmarks))
+    return np.concatenate([landmarks, missing_landmarks]), np.concatenate([present, missing_present])
+
+
+def chunk_boundaries(num_frames, fps, workers, min_chunk_sec=MIN_CHUNK_SEC):
+    """[(start_frame, end_frame), ...] splitting a video into at most `workers` chunks of >= min_chunk_sec."""
+    num_chunks = int(max(1, min(workers, num_frames // max(1, int(min_chunk_sec * fps)))))
+    edges = np.linspace(0, num_frames, num_chunks + 1).astype(int)
+    chunks = [(int(start), int(end)) for start, end in zip(edges[:-1], edges[1:])]
+    # The container's frame count may be off; the last chunk reads until the video really ends
+    chunks[-1] = (chunks[-1][0], None)
+    return chunks
+
+
+def extract_video_landmark_arrays_parallel(video_path, workers=PARALLEL_EXTRACTION_WORKERS,
+                                           warmup_sec=CHUNK_WARMUP_SEC):
+    """
+    extract_video_landmark_arrays for long videos: the video is split into time chunks,
+    each extracted by a warm MediaPipe instance in its own process, and the per-frame
+    arrays are concatenated back in order. Videos too short to split are extracted sequentially.
+
+    Chunk boundaries re-warm the trackers and rely on seeking, so the result can differ
+    slightly from a sequential pass; it is cached under its own key (the extractor config
+    plus the chunking parameters), never under the one extract_video_landmark_arrays reads.
+
+    Args:
+        video_path (str): Path to the video file.
+        workers (int): Largest number of chunks (and processes) used.
+        warmup_sec (float): Tracking warm-up before each chunk boundary.
+
+    Returns:
+        tuple: (landmarks, present, fps) — (T, 75, 4) float32, (T, 75) bool and the frame rate.
+    """
+    config = dict(extractor_config(), parallel_chunks={
+        "workers": workers, "warmup_sec": warmup_sec, "min_chunk_sec": MIN_CHUNK_SEC
+    })
+    return cached_landmark_arrays(
+        video_path, config, lambda: extract_chunks_in_parallel(video_path, workers, warmup_sec)
+    )
+
+
+def extract_chunks_in_parallel(video_path, workers, warmup_sec):
+    """Uncached body of extract_video_landmark_arrays_parallel."""
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    num_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if not fps or fps <= 0:
+        raise ValueError(f"Invalid FPS value for {video_path}")
+
+    chunks = chunk_boundaries(num_frames, fps, workers)
+    if len(chunks) == 1:
+        landmarks, present = extract_chunk(video_path, 0, None, 0)
+        return landmarks, present, fps
+
+    warmup_frames = int(warmup_sec * fps)
+    results = get_extraction_pool(workers).starmap(
+        extract_chunk, [(video_path, start, end, warmup_frames) for start, end in chunks]
+    )
+    # A chunk off by even one frame would shift every later window, so each one is fitted to its span
+    fitted = []
+    for (start, end), (chunk_landmarks, chunk_present) in zip(chunks, results):
+        if end is not None and len(chunk_landmarks) != end - start:
+            print(f"⚠️ Chunk [{start}, {end}) returned {len(chunk_landmarks)} frames instead of {end - start}")
+            chunk_landmarks, chunk_present = fit_chunk(chunk_landmarks, chunk_present, end - start)
+        fitted.append((chunk_landmarks, chunk_present))
+    landmarks = np.concatenate([chunk_landmarks for chunk_landmarks, _ in fitted])
+    present = np.concatenate([chunk_present for _, chunk_present in fitted])
+    print(f"⚡ Extracted {len(landmarks)} frames in {len(chunks)} parallel chunks")
+    return landmarks, present, fps
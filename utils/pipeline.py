@@ -0,0 +1,194 @@
+import os
+import time
+import queue
+import threading
+
+# Items buffered between two stages; a full queue blocks the stage upstream of it
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "64"))
+# How often a blocked worker checks whether the pipeline was stopped
+POLL_INTERVAL_SEC = 0.1
+
+# End-of-stream marker passed down the queues
+END = object()
+
+
+class Stage:
+    """
+    One step of a Pipeline: `workers` threads apply fn to the items of the stage's input queue.
+
+    With fan_out, fn returns a list and each of its elements (possibly none) is passed on
+    separately. Only a single-worker stage keeps the order of its items, so stateful
+    steps (e.g. MediaPipe tracking) must run with workers=1.
+    """
+    def __init__(self, name, fn, workers=1, queue_size=PIPELINE_QUEUE_SIZE, fan_out=False):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size
+        self.fan_out = fan_out
+        self.items = 0
+        self.busy_sec = 0.0
+        self.wait_input_sec = 0.0
+        self.wait_output_sec = 0.0
+        self.finished_workers = 0
+        self.lock = threading.Lock()
+
+    def record(self, busy_sec=0.0, wait_input_sec=0.0, wait_output_sec=0.0, items=0):
+        with self.lock:
+            self.items += items
+            self.busy_sec += busy_sec
+            self.wait_input_sec += wait_input_sec
+            self.wait_output_sec += wait_output_sec
+
+    def stats(self, wall_sec):
+        """Busy share of the stage's worker time — the stage closest to 1.0 limits throughput."""
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "items": self.items,
+                "busy_sec": round(self.busy_sec, 3),
+                "wait_input_sec": round(self.wait_input_sec, 3),
+                "wait_output_sec": round(self.wait_output_sec, 3),
+                "occupancy": round(self.busy_sec / (wall_sec * self.workers), 3) if wall_sec else 0.0,
+            }
+
+
+class Pipeline:
+    """
+    Runs a source iterator and a chain of Stages concurrently, connected by bounded queues.
+
+    The source (e.g. frame decoding) is pulled on its own thread and every stage has its
+    own worker threads, so all of them overlap and throughput follows the slowest stage
+    instead of the sum of all of them. The first exception raised anywhere stops every
+    thread and is re-raised to the consumer of run().
+    """
+    def __init__(self, stages, source_name="source", source_queue_size=PIPELINE_QUEUE_SIZE):
+        self.source_stage = Stage(source_name, None, queue_size=source_queue_size)
+        self.stages = list(stages)
+        self.started = None
+        self.finished = None
+        self._stop = threading.Event()
+        self._error = None
+
+    def _get(self, inbox, stage):
+        start = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                item = inbox.get(timeout=POLL_INTERVAL_SEC)
+            except queue.Empty:
+                continue
+            stage.record(wait_input_sec=time.monotonic() - start)
+            return item
+        return END
+
+    def _put(self, outbox, item, stage):
+        start = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                outbox.put(item, timeout=POLL_INTERVAL_SEC)
+            except queue.Full:
+                continue
+            stage.record(wait_output_sec=time.monotonic() - start)
+            return True
+        return False
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _pull_source(self, source, outbox):
+        stage = self.source_stage
+        try:
+            iterator = iter(source)
+            while not self._stop.is_set():
+                start = time.monotonic()
+                item = next(iterator, END)
+                stage.record(busy_sec=time.monotonic() - start, items=int(item is not END))
+                if item is END or not self._put(outbox, item, stage):
+                    break
+        except Exception as e:
+            self._fail(e)
+        self._put(outbox, END, stage)
+
+    def _work(self, stage, inbox, outbox):
+        while True:
+            item = self._get(inbox, stage)
+            if item is END:
+                # Let the stage's other workers see the end marker; the last one passes it on
+                try:
+                    inbox.put_nowait(END)
+                except queue.Full:
+                    # Only when the pipeline was stopped; the other workers see the stop event instead
+                    pass
+                with stage.lock:
+                    stage.finished_workers += 1
+                    last = stage.finished_workers == stage.workers
+                if last:
+                    self._put(outbox, END, stage)
+                return
+
+            try:
+                start = time.monotonic()
+                outputs = stage.fn(item) if stage.fan_out else [stage.fn(item)]
+                stage.record(busy_sec=time.monotonic() - start, items=1)
+            except Exception as e:
+                self._fail(e)
+                return
+            for output in outputs:
+                if not self._put(outbox, output, stage):
+                    return
+
+    def run(self, source):
+        """
+        Yields the outputs of the last stage as they are produced (in order only if every stage has one worker).
+
+        Raises:
+            Exception: The first error raised by the source or a stage.
+        """
+        self._stop.clear()
+        self._error = None
+        queues = [queue.Queue(self.source_stage.queue_size)] + [queue.Queue(stage.queue_size) for stage in self.stages]
+        threads = [threading.Thread(target=self._pull_source, args=(source, queues[0]),
+                                    name=f"pipeline-{self.source_stage.name}", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            stage.finished_workers = 0
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(target=self._work, args=(stage, queues[i], queues[i + 1]),
+                                                name=f"pipeline-{stage.name}-{worker}", daemon=True))
+
+        self.started, self.finished = time.monotonic(), None
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                try:
+                    item = queues[-1].get(timeout=POLL_INTERVAL_SEC)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        break
+                    continue
+                if item is END:
+                    break
+                yield item
+        finally:
+            # Also reached when the consumer stops iterating early
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.finished = time.monotonic()
+
+        if self._error is not None:
+            raise self._error
+
+    def stats(self):
+        """Per-stage items, busy/wait times and occupancy, plus the bottleneck stage."""
+        if self.started is None:
+            return {}
+        wall_sec = (self.finished or time.monotonic()) - self.started
+        stages = {stage.name: stage.stats(wall_sec) for stage in [self.source_stage] + self.stages}
+        return {
+            "wall_sec": round(wall_sec, 3),
+            "bottleneck": max(stages, key=lambda name: stages[name]["occupancy"]),
+            "stages": stages,
+        }
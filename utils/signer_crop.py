@@ -0,0 +1,101 @@
+import os
+import cv2
+import numpy as np
+
+# Crop every frame to the signer and downscale it before MediaPipe (see LandmarkExtractor)
+SIGNER_CROP_MODE = os.getenv("SIGNER_CROP_MODE", "false").lower() == "true"
+# Height (pixels) the signer crop is downscaled to; smaller crops are left as they are
+SIGNER_CROP_TARGET_HEIGHT = int(os.getenv("SIGNER_CROP_TARGET_HEIGHT", "480"))
+# Pose detections the signer box is built from, looked for in at most SIGNER_PROBE_FRAMES frames
+SIGNER_PROBE_DETECTIONS = 5
+SIGNER_PROBE_FRAMES = 30
+# Pose landmarks below this visibility do not extend the signer box
+SIGNER_VISIBILITY_THRESHOLD = 0.5
+# Signing space on each side of the shoulders' centre, in shoulder widths (arms reach well past the body)
+SIGNING_SPACE_HALF_WIDTH = 1.5
+# Margin added around the box, as a fraction of its size (hands above the head, elbows out)
+SIGNER_CROP_MARGIN = 0.2
+# Pose landmark indices of the left and right shoulder
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+
+
+class SignerCrop:
+    """
+    Pixel box (x0, y0, x1, y1) of the signer in a width × height frame, and the scale its
+    crop is resized by.
+
+    apply() turns a full frame into the small frame MediaPipe runs on; map_landmarks()
+    moves landmarks found on that frame back into full-frame normalized coordinates.
+    """
+    def __init__(self, box, width, height, scale=1.0):
+        self.box = box
+        self.width = width
+        self.height = height
+        self.scale = scale
+
+    @classmethod
+    def from_pose_detections(cls, pose_detections, width, height, target_height=SIGNER_CROP_TARGET_HEIGHT):
+        """
+        Signer box covering the visible pose landmarks of a few frames plus the signing space.
+
+        Args:
+            pose_detections (list): (33, 4) arrays of normalized x, y, z, visibility, one per frame.
+            width (int): Frame width in pixels.
+            height (int): Frame height in pixels.
+            target_height (int): Height the crop is downscaled to.
+
+        Returns:
+            SignerCrop | None: None when cropping and resizing would not make the frame smaller.
+        """
+        if not pose_detections:
+            return None
+        pose = np.asarray(pose_detections, dtype=np.float32)
+        visible = pose[:, :, 3] >= SIGNER_VISIBILITY_THRESHOLD
+        if not visible.any():
+            return None
+        xs, ys = pose[:, :, 0][visible], pose[:, :, 1][visible]
+        x0, x1, y0, y1 = xs.min(), xs.max(), ys.min(), ys.max()
+
+        shoulders = pose[:, [LEFT_SHOULDER, RIGHT_SHOULDER]]
+        center_x = shoulders[:, :, 0].mean()
+        shoulder_width = np.abs(shoulders[:, 0, 0] - shoulders[:, 1, 0]).mean()
+        x0 = min(x0, center_x - SIGNING_SPACE_HALF_WIDTH * shoulder_width)
+        x1 = max(x1, center_x + SIGNING_SPACE_HALF_WIDTH * shoulder_width)
+
+        margin_x, margin_y = SIGNER_CROP_MARGIN * (x1 - x0), SIGNER_CROP_MARGIN * (y1 - y0)
+        box = (
+            max(0, int((x0 - margin_x) * width)), max(0, int((y0 - margin_y) * height)),
+            min(width, int(np.ceil((x1 + margin_x) * width))), min(height, int(np.ceil((y1 + margin_y) * height))),
+        )
+        if box[2] - box[0] < 2 or box[3] - box[1] < 2:
+            return None
+
+        scale = min(1.0, target_height / (box[3] - box[1]))
+        if box == (0, 0, width, height) and scale == 1.0:
+            return None
+        return cls(box, width, height, scale)
+
+    def apply(self, frame):
+        """The signer crop of a full frame, downscaled to the target height."""
+        x0, y0, x1, y1 = self.box
+        cropped = frame[y0:y1, x0:x1]
+        if self.scale < 1.0:
+            cropped = cv2.resize(cropped, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return np.ascontiguousarray(cropped)
+
+    def map_landmarks(self, landmark_list):
+        """
+        Renormalizes a MediaPipe landmark list found on an apply()-ed frame to the full frame, in place.
+
+        Resizing keeps normalized coordinates, so only the crop offset and size matter;
+        z is scaled like x, as MediaPipe does for its own normalized depth.
+        """
+        x0, y0, x1, y1 = self.box
+        crop_width, crop_height = x1 - x0, y1 - y0
+        for lm in landmark_list.landmark:
+            lm.x = (x0 + lm.x * crop_width) / self.width
+            lm.y = (y0 + lm.y * crop_height) / self.height
+            lm.z = lm.z * crop_width / self.width
+
+    def __repr__(self):
+        return f"SignerCrop(box={self.box}, frame={self.width}x{self.height}, scale={self.scale:.2f})"
@@ -1,7 +1,11 @@
 import cv2
 import os
-import mediapipe as mp
+from utils.landmark_extractor import acquire_extractor, extractor_config
+from utils.landmark_cache import cached_landmark_arrays, get_landmark_cache
+from utils.landmark_arrays import arrays_to_frames
 import json
+import tempfile
+from contextlib import contextmanager
 import numpy as np
 from utils.trim_sign_language_dead_time import detect_motion_and_trim
 
@@ -9,75 +13,23 @@ from utils.trim_sign_language_dead_time import detect_motion_and_trim
 video_folder = "resources/sign_language_videos/"
 json_folder = "resources/motion_data/"
 output_folder = "resources/generated_videos/"
+# Scratch directory for videos received in memory: tmpfs when available, so decoding never touches the disk
+MEMORY_TEMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
 
 
 def extract_motion_data(video_name, folder_name=video_folder):
-    # Initialize MediaPipe pose and hands modules
-    mp_pose = mp.solutions.pose
-    mp_hands = mp.solutions.hands
-    mp_drawing = mp.solutions.drawing_utils
-
     # Load video
     if not folder_name.endswith('/'):
         folder_name += '/'
     video_path = folder_name + video_name + ".mp4"
+    if get_landmark_cache() is not None:
+        # Opt-in (LANDMARK_CACHE_ENABLED): re-running an evaluation or create_original_motion_data
+        # reads the landmarks from the cache instead of running MediaPipe again
+        landmarks, present, _ = extract_video_landmark_arrays(video_path)
+        return arrays_to_frames(landmarks, present)
     cap = cv2.VideoCapture(video_path)
 
-    # Output file for motion data
-    output_data = []
-
-    # Initialize MediaPipe
-    with mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5) as pose, \
-            mp_hands.Hands(static_image_mode=False, max_num_hands=2, min_detection_confidence=0.5) as hands:
-
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            # Convert frame to RGB (required by MediaPipe)
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # Process pose
-            pose_results = pose.process(frame_rgb)
-            hands_results = hands.process(frame_rgb)
-
-            # Extract key points
-            frame_data = {"pose": [], "hands": []}
-            if pose_results.pose_landmarks:
-                frame_data["pose"] = [
-                    {
-                        "x": lm.x,
-                        "y": lm.y,
-                        "z": lm.z,
-                        "visibility": lm.visibility
-                    } for lm in pose_results.pose_landmarks.landmark
-                ]
-
-            if hands_results.multi_hand_landmarks:
-                for hand_landmarks in hands_results.multi_hand_landmarks:
-                    frame_data["hands"].append([
-                        {"x": lm.x, "y": lm.y, "z": lm.z} for lm in hand_landmarks.landmark
-                    ])
-
-            # Append to output data
-            output_data.append(frame_data)
-
-            # Optionally, draw landmarks on the frame for visualization
-            if pose_results.pose_landmarks:
-                mp_drawing.draw_landmarks(frame, pose_results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
-            if hands_results.multi_hand_landmarks:
-                for hand_landmarks in hands_results.multi_hand_landmarks:
-                    mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-
-            # Show the frame
-            # cv2.imshow('Sign Language Video', frame)  # uncomment to visulise the original video
-            # if cv2.waitKey(1) & 0xFF == ord('q'):
-            #     break
-
-    # Release resources
-    cap.release()
-    cv2.destroyAllWindows()
+    output_data = extract_motion_data_from_capture(cap)
 
     return output_data
     
@@ -86,6 +38,150 @@ def extract_motion_data(video_name, folder_name=video_folder):
     #
     # return trimmed_data
 
+
+def extract_motion_data_from_capture(cap, max_frames=None):
+    """
+    Runs MediaPipe pose + hands over every frame of an opened capture.
+
+    Uses a warm extractor from the process pool (utils/landmark_extractor.py), so no
+    MediaPipe graph is built per video, and nothing is drawn.
+
+    Args:
+        cap (cv2.VideoCapture): An opened video capture. It is released when done.
+        max_frames (int, optional): Stop after this many frames.
+
+    Returns:
+        list: One {"pose": [...], "hands": [...]} dict per decoded frame.
+    """
+    try:
+        with acquire_extractor() as extractor:
+            output_data = extractor.extract(cap, max_frames)
+    finally:
+        # Release resources
+        cap.release()
+
+    return output_data
+
+
+def open_video_window(video_path, start_sec=None, end_sec=None):
+    """
+    Opens a video positioned at start_sec.
+
+    Returns:
+        tuple: (cap, fps, max_frames) — max_frames is the number of frames up to end_sec (None for all).
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps <= 0:
+        cap.release()
+        raise ValueError(f"Invalid FPS value for {video_path}")
+
+    start_frame = int(start_sec * fps) if start_sec else 0
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    max_frames = int(end_sec * fps) - start_frame if end_sec is not None else None
+    return cap, fps, max_frames
+
+
+def extract_video_motion_data(video_path, start_sec=None, end_sec=None):
+    """
+    Runs MediaPipe once over a whole video, so that any time window can later
+    be cut out of the result with slice_motion_data instead of re-extracting it.
+
+    Args:
+        video_path (str): Path to the video file.
+        start_sec (float, optional): Only decode from this time on (frame int(start_sec * fps)).
+        end_sec (float, optional): Stop decoding at this time (frame int(end_sec * fps)).
+
+    Returns:
+        tuple: (frames_data, fps) where frames_data[i] is the motion data of frame i
+        (counted from start_sec when given).
+    """
+    cap, fps, max_frames = open_video_window(video_path, start_sec, end_sec)
+    frames_data = extract_motion_data_from_capture(cap, max_frames)
+    return frames_data, fps
+
+
+def extract_video_landmark_arrays(video_path, start_sec=None, end_sec=None):
+    """
+    Same as extract_video_motion_data, returning landmark arrays instead of JSON motion data.
+
+    The (T, 75, 4) array can be sliced with slice_motion_data and fed to create_feature_vector
+    like frames_data; convert with utils/landmark_arrays.arrays_to_frames where JSON is needed.
+
+    With LANDMARK_CACHE_ENABLED, results are kept in the landmark cache (utils/landmark_cache.py),
+    keyed by the video content, so extracting the same clip again costs one file hash.
+
+    Returns:
+        tuple: (landmarks, present, fps) — (T, 75, 4) float32, (T, 75) bool and the frame rate.
+    """
+    def extract():
+        cap, fps, max_frames = open_video_window(video_path, start_sec, end_sec)
+        try:
+            with acquire_extractor() as extractor:
+                landmarks, present = extractor.extract_arrays(cap, max_frames)
+        finally:
+            cap.release()
+        return landmarks, present, fps
+
+    return cached_landmark_arrays(video_path, extractor_config(), extract, start_sec, end_sec)
+
+
+@contextmanager
+def video_bytes_as_file(video_bytes, suffix=".mp4"):
+    """
+    Yields the path of a temporary copy of an in-memory video, deleted on exit.
+
+    OpenCV can only open files, so the bytes go to MEMORY_TEMP_DIR (tmpfs), where
+    they are decoded once — no re-encoding, no JSON.
+    """
+    with tempfile.NamedTemporaryFile(suffix=suffix, dir=MEMORY_TEMP_DIR) as video_file:
+        video_file.write(video_bytes)
+        video_file.flush()
+        yield video_file.name
+
+
+def extract_motion_data_from_bytes(video_bytes, suffix=".mp4", start_sec=None, end_sec=None):
+    """
+    Same as extract_video_motion_data for a video held in memory (e.g. a decoded upload).
+
+    Returns:
+        tuple: (frames_data, fps).
+    """
+    with video_bytes_as_file(video_bytes, suffix) as video_path:
+        return extract_video_motion_data(video_path, start_sec, end_sec)
+
+
+def extract_landmark_arrays_from_bytes(video_bytes, suffix=".mp4", start_sec=None, end_sec=None):
+    """
+    Same as extract_video_landmark_arrays for a video held in memory.
+
+    Returns:
+        tuple: (landmarks, present, fps).
+    """
+    with video_bytes_as_file(video_bytes, suffix) as video_path:
+        return extract_video_landmark_arrays(video_path, start_sec, end_sec)
+
+
+def slice_motion_data(frames_data, fps, start_sec, end_sec):
+    """
+    Returns the frames of a (start_sec, end_sec) window, using the same frame
+    boundaries as cutting the window into its own video (int(sec * fps)).
+
+    Args:
+        frames_data (list | np.ndarray): Frame-indexed motion data (or landmark array) of the whole video.
+        fps (float): Frame rate of the video the data was extracted from.
+        start_sec (float): Window start in seconds.
+        end_sec (float): Window end in seconds.
+
+    Returns:
+        list | np.ndarray: Motion data of the frames inside the window.
+    """
+    start_frame = int(start_sec * fps)
+    end_frame = int(end_sec * fps)
+    return frames_data[start_frame:end_frame]
+
+
 def motion_data_to_json(frames_data, video_name, folder_name, log_folder_path=None):
     # Ensure log folder exists
     if log_folder_path is None:
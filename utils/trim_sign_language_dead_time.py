@@ -1,40 +1,133 @@
 import json
 import os
 import numpy as np
+from utils.conver_json_to_vector import create_feature_vector
 
-def detect_motion_and_trim(output_data, motion_threshold=0.2, min_active_frames=5):
-    """Trim dead time from motion data based on motion threshold."""
-    frame_motion = []
-    
-    # Calculate motion between consecutive frames
-    for i in range(1, len(output_data)):
-        prev_frame = output_data[i - 1]['pose']
-        curr_frame = output_data[i]['pose']
-        
-        # Calculate Euclidean distance for corresponding landmarks
-        motion = np.sqrt(sum(
-            (curr['x'] - prev['x']) ** 2 + 
-            (curr['y'] - prev['y']) ** 2 + 
-            (curr['z'] - prev['z']) ** 2
-            for curr, prev in zip(curr_frame, prev_frame)
-        )) if prev_frame and curr_frame else 0  # Handle empty pose data
-        
-        frame_motion.append(motion)
-    
-    # Detect the start frame with significant motion
-    active_frames = 0
-    start_frame = None
-    
-    for i, motion in enumerate(frame_motion):
-        if motion > motion_threshold:
-            active_frames += 1
-            if active_frames >= min_active_frames:
-                start_frame = i - min_active_frames + 2  # +2 to adjust for frame index
-                break
-        else:
-            active_frames = 0
-    
-    # Trim the data from the start_frame onward
-    trimmed_data = output_data[start_frame:] if start_frame is not None else []
-    
-    return trimmed_data
+# Points of the 75-landmark feature layout that move when signing: both pose wrists and all hand points
+SIGNING_LANDMARKS = np.r_[15, 16, 33:75]
+# Frames whose smoothed motion energy is above this fraction of the clip's 95th percentile are active
+RELATIVE_MOTION_THRESHOLD = 0.25
+# Motion energy (normalized units per second) below which a clip is treated as fully still
+MIN_MOTION_ENERGY = 0.05
+MIN_SIGN_SEC = 0.3
+MIN_REST_SEC = 0.2
+SMOOTHING_SEC = 0.1
+
+
+def compute_motion_energy(frames_data, fps=None, landmarks=SIGNING_LANDMARKS):
+    """
+    Mean speed of the given landmarks per frame, computed on the whole sequence at once.
+
+    A landmark only contributes between two frames in which it was detected (missing
+    landmarks are zeros in the feature layout).
+
+    Args:
+        frames_data (list): Motion data, one {"pose", "hands"} dict per frame.
+        fps (float, optional): If given, speeds are per second instead of per frame.
+        landmarks (np.ndarray): Indices into the 75-landmark feature layout.
+
+    Returns:
+        np.ndarray: (T,) motion energy, 0 for the first frame.
+    """
+    if len(frames_data) < 2:
+        return np.zeros(len(frames_data), dtype=np.float32)
+
+    points = create_feature_vector(frames_data, max_frames=len(frames_data), fill_missing_pose=True)[:, landmarks]  # (T, L, 3)
+    present = np.any(points != 0, axis=-1)                                               # (T, L)
+
+    speed = np.linalg.norm(np.diff(points, axis=0), axis=-1)                             # (T-1, L)
+    valid = present[1:] & present[:-1]
+    counts = valid.sum(axis=1)
+    energy = np.where(counts > 0, (speed * valid).sum(axis=1) / np.maximum(counts, 1), 0.0)
+    if fps:
+        energy = energy * fps
+
+    return np.r_[0.0, energy].astype(np.float32)
+
+
+def _runs(mask):
+    """(start, end) index pairs of the True runs of a boolean array, end exclusive."""
+    edges = np.diff(np.r_[0, mask.astype(np.int8), 0])
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def detect_active_frames(frames_data, fps, relative_threshold=RELATIVE_MOTION_THRESHOLD,
+                         min_sign_sec=MIN_SIGN_SEC, min_rest_sec=MIN_REST_SEC, smoothing_sec=SMOOTHING_SEC):
+    """
+    Marks the frames in which the signer is moving.
+
+    Motion energy is smoothed, thresholded relative to the clip's own motion level,
+    rest gaps shorter than min_rest_sec are closed and active runs shorter than
+    min_sign_sec are dropped.
+
+    Returns:
+        np.ndarray: (T,) boolean mask of active frames.
+    """
+    energy = compute_motion_energy(frames_data, fps)
+    if len(energy) == 0:
+        return np.zeros(0, dtype=bool)
+
+    window = max(1, int(round(smoothing_sec * fps)))
+    smoothed = np.convolve(energy, np.ones(window) / window, mode="same")
+
+    peak = np.percentile(smoothed, 95)
+    if peak < MIN_MOTION_ENERGY:
+        return np.zeros(len(energy), dtype=bool)
+    active = smoothed > relative_threshold * peak
+
+    # close short pauses inside a sign
+    for start, end in _runs(~active):
+        if 0 < start and end < len(active) and (end - start) < min_rest_sec * fps:
+            active[start:end] = True
+
+    # drop short twitches
+    for start, end in _runs(active):
+        if (end - start) < min_sign_sec * fps:
+            active[start:end] = False
+
+    return active
+
+
+def detect_sign_intervals(frames_data, fps, **kwargs):
+    """
+    Splits a landmark sequence into candidate sign intervals and rest periods.
+
+    Args:
+        frames_data (list): Frame-indexed motion data of the whole video.
+        fps (float): Frame rate of the video.
+        **kwargs: Thresholds forwarded to detect_active_frames.
+
+    Returns:
+        tuple: (sign_intervals, rest_intervals) — lists of (start_sec, end_sec).
+    """
+    active = detect_active_frames(frames_data, fps, **kwargs)
+    signs = [(round(float(start / fps), 2), round(float(end / fps), 2)) for start, end in _runs(active)]
+    rests = [(round(float(start / fps), 2), round(float(end / fps), 2)) for start, end in _runs(~active)]
+    return signs, rests
+
+
+def detect_motion_and_trim(output_data, motion_threshold=0.2, min_active_frames=5, trim_end=False):
+    """Trim dead time from motion data based on motion threshold, at the start (and at the end with trim_end=True)."""
+    if len(output_data) < 2:
+        return []
+
+    # Euclidean distance over all pose landmarks between consecutive frames (0 when pose is missing)
+    pose = np.array([
+        [[lm['x'], lm['y'], lm['z']] for lm in frame['pose']] if len(frame['pose']) == 33 else np.zeros((33, 3))
+        for frame in output_data
+    ])
+    has_pose = np.array([len(frame['pose']) == 33 for frame in output_data])
+    frame_motion = np.sqrt(((pose[1:] - pose[:-1]) ** 2).sum(axis=(1, 2)))
+    frame_motion[~(has_pose[1:] & has_pose[:-1])] = 0
+
+    # First/last run of min_active_frames consecutive moving frames
+    moving = (frame_motion > motion_threshold).astype(np.int32)
+    run_sums = np.convolve(moving, np.ones(min_active_frames, dtype=np.int32), mode="valid")
+    full_runs = np.flatnonzero(run_sums >= min_active_frames)
+    if len(full_runs) == 0:
+        return []
+
+    start_frame = full_runs[0] + 1  # motion index i is between frames i and i+1
+    end_frame = full_runs[-1] + min_active_frames + 1 if trim_end else len(output_data)
+
+    return output_data[start_frame:end_frame]